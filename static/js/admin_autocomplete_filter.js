@@ -0,0 +1,7 @@
+'use strict';
+// 后台外键筛选：自动补全选中后立即提交筛选
+window.addEventListener('load', function() {
+    django.jQuery('form.autocomplete-filter select').on('change', function() {
+        this.form.submit();
+    });
+});
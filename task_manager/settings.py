@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,7 +46,8 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'tasks.middleware.CachedAuthenticationMiddleware',   # BCClub: 替代 AuthenticationMiddleware，缓存用户解析
+    'tasks.middleware.ActivityLogMiddleware',   # BCClub: 请求结束时批量写入任务动态
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -62,6 +64,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'tasks.context_processors.saved_filters',
             ],
         },
     },
@@ -81,6 +84,63 @@ DATABASES = {
 }
 
 
+# BCClub: 会话、用户缓存和任务数据版本号都放在 Django 缓存中，多进程部署必须使用共享缓存，
+# 否则退出登录、修改密码和数据变更只在当前进程生效（tasks.W001 检查会提示）
+# 设置 TASKS_REDIS_URL（如 redis://127.0.0.1:6379/1）启用 Redis；未设置时用于本地单进程开发，使用进程内缓存
+# 会话优先从缓存读取，未命中时才查询会话表，已登录请求识别身份时不查询数据库
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/#using-cached-sessions
+TASKS_REDIS_URL = os.environ.get('TASKS_REDIS_URL', '')
+
+if TASKS_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': TASKS_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# BCClub: 用户缓存有效期（秒）
+TASKS_USER_CACHE_TTL = 60
+
+# BCClub: 任务通知摘要邮件，由 send_notification_digests 命令发送
+# 本地开发默认输出到控制台；改用文件后端时邮件写入 EMAIL_FILE_PATH 目录
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+# EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+DEFAULT_FROM_EMAIL = 'task-manager@localhost'
+# 同一收件人在该时间窗口（秒）内的通知合并为一封摘要
+TASK_NOTIFICATION_DIGEST_WINDOW = 300
+# 每批处理的收件人数
+TASK_NOTIFICATION_BATCH_SIZE = 200
+# 邮件中任务链接的站点地址
+TASK_NOTIFICATION_BASE_URL = 'http://127.0.0.1:8000'
+
+# BCClub: materialize_recurring_tasks 每次生成未来多少天内的周期任务
+TASK_RECURRENCE_HORIZON_DAYS = 90
+
+# BCClub: 相似任务索引（MinHash 签名）的保存目录，多个进程共享；build_similarity_index 命令可重建
+TASK_SIMILARITY_INDEX_DIR = BASE_DIR / 'similarity_index'
+
+# BCClub: 项目出站 Webhook，由 send_webhooks 命令投递
+# 每个请求最多合并的事件数
+TASK_WEBHOOK_BATCH_SIZE = 50
+# 请求超时（秒）
+TASK_WEBHOOK_TIMEOUT = 10
+# 投递失败后的重试间隔（秒），每次连续失败翻倍，不超过上限
+TASK_WEBHOOK_RETRY_BASE = 10
+TASK_WEBHOOK_RETRY_MAX = 3600
+# 投递租约（秒）：worker 认领 Webhook 后在租约内独占投递，每批请求前续租，需大于单个请求的最长耗时
+TASK_WEBHOOK_LEASE = 60
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -120,6 +180,20 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
+# BCClub: collectstatic 输出目录；文件名带内容哈希，并预生成 gzip/brotli 版本
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "tasks.static_pipeline.CompressedManifestStaticFilesStorage",
+    },
+}
+
+# BCClub: 模板中通过变量动态拼接、扫描不到的图标名（不含 bi- 前缀）
+TASKS_EXTRA_ICONS = []
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -14,10 +14,12 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.contrib.auth import views as auth_views
 from tasks import views
+from tasks.static_pipeline import serve_precompressed
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -26,3 +28,9 @@ urlpatterns = [
     path('accounts/logout/', views.loginout_view, name='logout'),
     path('accounts/register/', views.register, name='register'),
 ]
+
+# BCClub: 未由前端服务器接管时，由 Django 提供预压缩的静态文件（DEBUG 下由 runserver 处理）
+if not settings.DEBUG:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % settings.STATIC_URL.lstrip('/'), serve_precompressed),
+    ]
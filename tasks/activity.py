@@ -0,0 +1,279 @@
+from contextvars import ContextVar
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from . import notifications, similarity, webhooks
+from .models import NotificationEvent, Project, ProjectModel, Task, TaskActivityRecord
+
+# 需要记录字段级变更的任务字段（按 attname，外键记录 id）
+TRACKED_TASK_FIELDS = [
+    'task_title',
+    'task_description',
+    'task_status',
+    'task_priority',
+    'task_type',
+    'task_deadline',
+    'task_assigned_to_user_id',
+    'task_belongsto_project_id',
+    'task_belongsto_model_id',
+]
+
+# 长文本字段只记录“已修改”，不保存内容，保持日志紧凑
+_VALUELESS_FIELDS = {'task_description'}
+
+_VALUE_MAX_LENGTH = 255
+
+# 当前请求内缓冲的动态记录；为 None 时表示没有处于请求中，直接写入
+_activity_buffer = ContextVar('activity_buffer', default=None)
+_activity_request = ContextVar('activity_request', default=None)
+
+
+def begin_request(request):
+    """开始缓冲当前请求产生的动态记录"""
+    return _activity_buffer.set([]), _activity_request.set(request)
+
+
+def end_request(tokens):
+    """请求结束：批量写入缓冲的动态记录"""
+    buffer_token, request_token = tokens
+    try:
+        flush()
+    finally:
+        _activity_buffer.reset(buffer_token)
+        _activity_request.reset(request_token)
+
+
+def _write(records):
+    # 动态记录和通知事件各用一次 bulk_create 写入
+    activities = [record for record in records if isinstance(record, TaskActivityRecord)]
+    events = [record for record in records if isinstance(record, NotificationEvent)]
+    if activities:
+        TaskActivityRecord.objects.bulk_create(activities, batch_size=500)
+    if events:
+        NotificationEvent.objects.bulk_create(events, batch_size=500)
+
+
+def discard():
+    """丢弃缓冲区中的记录（视图抛出异常、变更可能已回滚时）"""
+    buffer = _activity_buffer.get()
+    if buffer:
+        buffer.clear()
+
+
+def flush():
+    """将缓冲区中的记录批量写入"""
+    buffer = _activity_buffer.get()
+    if buffer:
+        records = list(buffer)
+        buffer.clear()
+        _write(records)
+
+
+def _current_actor_id():
+    request = _activity_request.get()
+    if request is None:
+        return None
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+def _append(records):
+    if not records:
+        return
+    buffer = _activity_buffer.get()
+    if buffer is None:
+        _write(records)
+    else:
+        buffer.extend(records)
+
+
+def _build(task, action, field='', old_value='', new_value=''):
+    return TaskActivityRecord(
+        activity_action=action,
+        activity_field=field,
+        activity_old_value=old_value,
+        activity_new_value=new_value,
+        activity_task_title=task.task_title[:100],
+        activity_actor_id=_current_actor_id(),
+        activity_belongsto_task_id_id=task.pk,
+        activity_task_assignee_id=task.task_assigned_to_user_id_id,
+    )
+
+
+def _serialize(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)[:_VALUE_MAX_LENGTH]
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return _serialize(value)
+
+
+def _webhook_changes(changes):
+    # Webhook 事件内容需可 JSON 序列化；长文本字段同样只标记“已修改”
+    return [
+        (name, None, None) if name in _VALUELESS_FIELDS else (name, _json_value(old_value), _json_value(new_value))
+        for name, old_value, new_value in changes
+    ]
+
+
+def snapshot_task(task):
+    """记录任务当前的受跟踪字段值，作为下次保存时的对比基线"""
+    task._loaded_values = {
+        task._meta.get_field(name).attname: getattr(task, task._meta.get_field(name).attname)
+        for name in TRACKED_TASK_FIELDS
+    }
+
+
+def diff_task(task):
+    """返回 [(字段名, 原值, 新值)]；未从数据库加载过的字段不参与对比"""
+    loaded = getattr(task, '_loaded_values', None) or {}
+    changes = []
+    for name in TRACKED_TASK_FIELDS:
+        attname = task._meta.get_field(name).attname
+        if attname not in loaded:
+            continue
+        old_value = loaded[attname]
+        new_value = getattr(task, attname)
+        if old_value != new_value:
+            changes.append((name, old_value, new_value))
+    return changes
+
+
+def record_task_created(task):
+    _append([_build(task, 'created')] + notifications.task_created_notifications(task, _current_actor_id()))
+    webhooks.task_events('task.created', [task])
+    snapshot_task(task)
+
+
+def record_task_updated(task):
+    records = []
+    actor_id = _current_actor_id()
+    changes = diff_task(task)
+    for name, old_value, new_value in changes:
+        if name in _VALUELESS_FIELDS:
+            records.append(_build(task, 'updated', name))
+        else:
+            records.append(_build(task, 'updated', name, _serialize(old_value), _serialize(new_value)))
+        records.extend(notifications.task_field_notifications(task, name, old_value, new_value, actor_id))
+    _append(records)
+    if changes:
+        webhooks.task_events('task.updated', [task], _webhook_changes(changes))
+    snapshot_task(task)
+
+
+def record_task_field_change(task, name, old_value, new_value):
+    """供绕过 save() 的更新路径（如条件 UPDATE）手动记录变更"""
+    _append(
+        [_build(task, 'updated', name, _serialize(old_value), _serialize(new_value))]
+        + notifications.task_field_notifications(task, name, old_value, new_value, _current_actor_id())
+    )
+    webhooks.task_events('task.updated', [task], _webhook_changes([(name, old_value, new_value)]))
+
+
+def record_task_deleted(task):
+    # 原值记录所属机型 id，供每日快照找出有任务被删除的机型
+    _append([_build(task, 'deleted', old_value=_serialize(task.task_belongsto_model_id_id))])
+    webhooks.task_events('task.deleted', [task])
+
+
+def record_tasks_created(tasks):
+    """批量创建任务（bulk_create）后补记动态"""
+    actor_id = _current_actor_id()
+    records = []
+    for task in tasks:
+        records.append(_build(task, 'created'))
+        records.extend(notifications.task_created_notifications(task, actor_id))
+    _append(records)
+    webhooks.task_events('task.created', tasks)
+    # bulk_create 不发送 post_save，相似任务索引在这里补充
+    items = [(task.pk, similarity.task_text(task.task_title, task.task_description_excerpt)) for task in tasks]
+    transaction.on_commit(partial(similarity.index_tasks, items))
+
+
+def record_comment_added(comment):
+    task = comment.comment_belongsto_task_id
+    _append(
+        [_build(task, 'comment_added', new_value=_serialize(comment.pk))]
+        + notifications.comment_notifications(comment, _current_actor_id())
+    )
+    webhooks.comment_event(comment)
+
+
+def record_commit_added(commit):
+    task = commit.commit_belongsto_task_id
+    _append([_build(task, 'commit_added', new_value=_serialize(commit.commit_git_hash))])
+    webhooks.commit_event(commit)
+
+
+def describe_activities(records):
+    """
+    将动态记录转换为可展示/序列化的字典
+    外键 id 与选项值按类型批量解析，每种关联表最多一次查询
+    """
+    fk_models = {
+        'task_assigned_to_user_id': (User, 'username'),
+        'task_belongsto_project_id': (Project, 'project_name'),
+        'task_belongsto_model_id': (ProjectModel, 'model_name'),
+    }
+    wanted = {name: set() for name in fk_models}
+    actor_ids = set()
+    for record in records:
+        if record.activity_actor_id:
+            actor_ids.add(record.activity_actor_id)
+        if record.activity_field in wanted:
+            for value in (record.activity_old_value, record.activity_new_value):
+                if value:
+                    wanted[record.activity_field].add(int(value))
+
+    if actor_ids:
+        wanted['task_assigned_to_user_id'] |= actor_ids
+    names = {}
+    for field_name, (model, label_field) in fk_models.items():
+        ids = wanted[field_name]
+        names[field_name] = dict(model.objects.filter(id__in=ids).values_list('id', label_field)) if ids else {}
+    usernames = names['task_assigned_to_user_id']
+
+    choice_labels = {
+        'task_status': dict(Task.TASK_STATUS_CHOICES),
+        'task_type': dict(Task.TASK_TYPE_CHOICES),
+        'task_priority': dict(Task._meta.get_field('task_priority').choices),
+    }
+    field_labels = {name: str(Task._meta.get_field(name).verbose_name) for name in TRACKED_TASK_FIELDS}
+    action_labels = dict(TaskActivityRecord.ACTIVITY_ACTION_CHOICES)
+
+    def display(field, value):
+        if not value:
+            return ''
+        if field in names:
+            return names[field].get(int(value), f'#{value}')
+        if field in choice_labels:
+            return choice_labels[field].get(value, value)
+        return value
+
+    items = []
+    for record in records:
+        field = record.activity_field
+        items.append({
+            'id': record.id,
+            'action': record.activity_action,
+            'action_display': action_labels.get(record.activity_action, record.activity_action),
+            'field': field,
+            'field_display': field_labels.get(field, field),
+            'old_value': display(field, record.activity_old_value),
+            'new_value': display(field, record.activity_new_value) if field else record.activity_new_value,
+            'task_id': record.activity_belongsto_task_id_id,
+            'task_title': record.activity_task_title,
+            'actor': usernames.get(record.activity_actor_id, ''),
+            'created_time': record.activity_created_time,
+        })
+    return items
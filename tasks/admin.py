@@ -1,51 +1,344 @@
+from django import forms
 from django.contrib import admin
-from .models import Project, ProjectModel, Task, TaskCommitRecord, TaskCommentRecord, TrickRecord
+from django.contrib.admin.utils import get_last_value_from_parameters
+from django.contrib.admin.views.main import ERROR_FLAG, PAGE_VAR, ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models.functions import Substr
+from django.utils.functional import cached_property
+from django.utils.text import Truncator
+from django.utils.translation import gettext_lazy as _
+
+from .models import Project, ProjectModel, Task, TaskCommitRecord, TaskCommentRecord, TrickRecord, TaskActivityRecord, SavedTaskFilter, NotificationEvent, RecurringTaskTemplate, ProjectWebhook, WebhookOutboxEvent
+
+# 列表页长文本列显示的字符数
+TRUNCATE_LENGTH = 60
+
+# 估算行数低于该值时直接 COUNT(*)，小表的精确计数很便宜
+APPROXIMATE_COUNT_THRESHOLD = 100000
+
+
+def estimate_row_count(model, using='default'):
+    """从数据库统计信息读取表的估算行数；不支持的数据库或尚未统计时返回 None"""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)'
+    elif connection.vendor == 'mysql':
+        sql = 'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s'
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [model._meta.db_table])
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class ApproximateCountPaginator(Paginator):
+    """未加任何筛选/搜索条件时用估算行数代替对整张大表的 COUNT(*)"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= APPROXIMATE_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """外键筛选：用自动补全输入框代替在侧栏列出关联表的全部记录"""
+
+    template = 'admin/tasks/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        self.lookup_val = get_last_value_from_parameters(params, self.lookup_kwarg)
+        self.admin_site = model_admin.admin_site
+        super().__init__(field, request, params, model, model_admin, field_path)
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def has_output(self):
+        return True
+
+    def _render_widget(self):
+        form_field = forms.ModelChoiceField(
+            queryset=self.field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(self.field, self.admin_site),
+            required=False,
+        )
+        attrs = {'id': f'autocomplete_filter_{self.field_path}'}
+        try:
+            # 只有已选中的一条关联记录会被查询出来作为初始选项
+            return form_field.widget.render(self.lookup_kwarg, self.lookup_val, attrs=attrs)
+        except (ValueError, ValidationError):
+            return form_field.widget.render(self.lookup_kwarg, None, attrs=attrs)
+
+    def choices(self, changelist):
+        hidden_params = [
+            (name, value)
+            for name, values in changelist.params.items()
+            if name not in (self.lookup_kwarg, PAGE_VAR, ERROR_FLAG)
+            for value in (values if isinstance(values, list) else [values])
+        ]
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': _('All'),
+            'widget': self._render_widget(),
+            'hidden_params': hidden_params,
+        }
+
+
+def truncated_column(field_name, description, length=TRUNCATE_LENGTH):
+    """列表页只显示长文本字段的开头部分，数据由 LeanChangeList 截取后查询"""
+
+    @admin.display(description=description)
+    def column(self, obj):
+        return Truncator(getattr(obj, f'{field_name}_preview') or '').chars(length)
+
+    column.__name__ = f'{field_name}_preview'
+    return column
+
+
+class LeanChangeList(ChangeList):
+    """列表查询不加载长文本全文：truncated_fields 只取前若干字符，list_deferred_fields 延迟加载"""
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        truncated = self.model_admin.truncated_fields
+        if truncated:
+            queryset = queryset.annotate(**{
+                f'{name}_preview': Substr(name, 1, TRUNCATE_LENGTH + 1) for name in truncated
+            })
+        deferred = tuple(truncated) + tuple(self.model_admin.list_deferred_fields)
+        return queryset.defer(*deferred) if deferred else queryset
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    """
+    面向大表的后台基类：
+    - 关联列通过 list_select_related 一次 JOIN 查出
+    - 长文本列截断显示，不加载全文
+    - 外键筛选和外键输入框使用自动补全
+    - 分页估算总数，并跳过未筛选总数的第二次 COUNT
+    """
+
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+    truncated_fields = ()
+    list_deferred_fields = ()
+    # __str__ 用到的关联对象（如任务名带机型名），自动补全结果和外键选项也需要一并 JOIN
+    str_select_related = ()
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.str_select_related:
+            # 列表页看到已有 select_related 时不再应用 list_select_related，这里一并加上
+            queryset = queryset.select_related(*self.str_select_related, *self.list_select_related)
+        return queryset
+
+    def get_changelist(self, request, **kwargs):
+        return LeanChangeList
+
+    @property
+    def media(self):
+        media = super().media
+        if any(isinstance(item, tuple) and item[1] is AutocompleteFilter for item in self.list_filter):
+            media += AutocompleteSelect(None, self.admin_site).media
+            media += forms.Media(js=['js/admin_autocomplete_filter.js'])
+        return media
+
 
 # Register your models here.
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
-    list_display = ('project_name', 'project_description','project_priority', 'project_creator', 'project_created_time', 'project_updated_time')
+class ProjectAdmin(ScalableModelAdmin):
+    list_display = ('project_name', 'project_description_preview', 'project_priority', 'project_creator', 'project_created_time', 'project_updated_time')
     search_fields = ('project_name', 'project_description', 'project_creator__username')
     list_filter = ('project_priority', 'project_created_time', 'project_updated_time')
-    ordering = ('-project_priority', '-project_created_time', 'project_name')
+    list_select_related = ('project_creator',)
+    autocomplete_fields = ('project_creator',)
+    ordering = ('-project_priority_rank', '-project_created_time', 'project_name')
     readonly_fields = ('project_created_time', 'project_updated_time')
+    truncated_fields = ('project_description',)
+
+    project_description_preview = truncated_column('project_description', '项目描述')
 
 @admin.register(ProjectModel)
-class ProjectModelAdmin(admin.ModelAdmin):
-    list_display = ('model_name', 'model_description', 'model_priority', 'model_creator', 'model_belongsto_project_id', 'model_created_time', 'model_updated_time')
+class ProjectModelAdmin(ScalableModelAdmin):
+    list_display = ('model_name', 'model_description_preview', 'model_priority', 'model_creator', 'model_belongsto_project_id', 'model_created_time', 'model_updated_time')
     search_fields = ('model_name', 'model_description', 'model_creator__username', 'model_belongsto_project_id__project_name')
-    list_filter = ('model_priority', 'model_created_time', 'model_updated_time', 'model_belongsto_project_id')
-    ordering = ('-model_priority', '-model_created_time', 'model_name')
+    list_filter = ('model_priority', 'model_created_time', 'model_updated_time', ('model_belongsto_project_id', AutocompleteFilter))
+    list_select_related = ('model_creator', 'model_belongsto_project_id')
+    autocomplete_fields = ('model_creator', 'model_belongsto_project_id')
+    ordering = ('-model_priority_rank', '-model_created_time', 'model_name')
     readonly_fields = ('model_created_time', 'model_updated_time')
+    truncated_fields = ('model_description',)
+    str_select_related = ('model_belongsto_project_id',)
+    list_deferred_fields = ('model_belongsto_project_id__project_description',)
+
+    model_description_preview = truncated_column('model_description', '机型描述')
 
 @admin.register(Task)
-class TaskAdmin(admin.ModelAdmin):
-    list_display = ('task_title', 'task_description', 'task_type', 'task_status', 'task_priority', 'task_creator', 'task_assigned_to_user_id', 'task_belongsto_model_id', 'task_created_time', 'task_updated_time')
+class TaskAdmin(ScalableModelAdmin):
+    list_display = ('task_title', 'task_description_preview', 'task_type', 'task_status', 'task_priority', 'task_creator', 'task_assigned_to_user_id', 'task_belongsto_model_id', 'task_created_time', 'task_updated_time')
     search_fields = ('task_title', 'task_description', 'task_creator__username', 'task_assigned_to_user_id__username', 'task_belongsto_model_id__model_name')
-    list_filter = ('task_type', 'task_status', 'task_priority', 'task_created_time', 'task_updated_time', 'task_belongsto_model_id')
-    ordering = ('-task_priority', '-task_created_time', 'task_title')
+    list_filter = (
+        'task_type', 'task_status', 'task_priority', 'task_created_time', 'task_updated_time',
+        ('task_belongsto_project_id', AutocompleteFilter),
+        ('task_belongsto_model_id', AutocompleteFilter),
+        ('task_assigned_to_user_id', AutocompleteFilter),
+    )
+    list_select_related = ('task_creator', 'task_assigned_to_user_id', 'task_belongsto_model_id__model_belongsto_project_id')
+    autocomplete_fields = ('task_creator', 'task_assigned_to_user_id', 'task_belongsto_project_id', 'task_belongsto_model_id', 'task_source_task_id')
+    ordering = ('-task_priority_rank', '-task_created_time', 'task_title')
     readonly_fields = ('task_created_time', 'task_updated_time')
+    truncated_fields = ('task_description',)
+    str_select_related = ('task_belongsto_model_id',)
+    list_deferred_fields = (
+        'task_description_html',
+        'task_belongsto_model_id__model_description',
+        'task_belongsto_model_id__model_belongsto_project_id__project_description',
+    )
+
+    task_description_preview = truncated_column('task_description', '任务描述')
 
 @admin.register(TaskCommitRecord)
-class TaskCommitRecordAdmin(admin.ModelAdmin):
-    list_display = ('commit_git_hash', 'commit_message', 'commit_is_merged', 'commit_belongsto_task_id', 'commit_submit_time', 'commit_created_time')
+class TaskCommitRecordAdmin(ScalableModelAdmin):
+    list_display = ('commit_git_hash', 'commit_message_preview', 'commit_is_merged', 'commit_belongsto_task_id', 'commit_submit_time', 'commit_created_time')
     search_fields = ('commit_git_hash', 'commit_message', 'commit_belongsto_task_id__task_title')
-    list_filter = ('commit_is_merged', 'commit_submit_time', 'commit_created_time', 'commit_belongsto_task_id')
+    list_filter = ('commit_is_merged', 'commit_submit_time', 'commit_created_time', ('commit_belongsto_task_id', AutocompleteFilter))
+    list_select_related = ('commit_belongsto_task_id__task_belongsto_model_id',)
+    autocomplete_fields = ('commit_belongsto_task_id',)
     ordering = ('-commit_created_time', '-commit_submit_time', 'commit_belongsto_task_id')
     readonly_fields = ('commit_created_time',)
+    truncated_fields = ('commit_message',)
+    list_deferred_fields = (
+        'commit_belongsto_task_id__task_description',
+        'commit_belongsto_task_id__task_description_html',
+        'commit_belongsto_task_id__task_belongsto_model_id__model_description',
+    )
+
+    commit_message_preview = truncated_column('commit_message', '提交信息')
 
 @admin.register(TaskCommentRecord)
-class TaskCommentRecordAdmin(admin.ModelAdmin):
-    list_display = ('comment_creator', 'comment_belongsto_task_id', 'comment_created_time', 'comment_updated_time')
+class TaskCommentRecordAdmin(ScalableModelAdmin):
+    list_display = ('comment_content_preview', 'comment_creator', 'comment_belongsto_task_id', 'comment_created_time', 'comment_updated_time')
     search_fields = ('comment_content', 'comment_creator__username', 'comment_belongsto_task_id__task_title')
-    list_filter = ('comment_created_time', 'comment_updated_time', 'comment_belongsto_task_id')
+    list_filter = ('comment_created_time', 'comment_updated_time', ('comment_belongsto_task_id', AutocompleteFilter))
+    list_select_related = ('comment_creator', 'comment_belongsto_task_id__task_belongsto_model_id')
+    autocomplete_fields = ('comment_creator', 'comment_belongsto_task_id')
     ordering = ('-comment_created_time', 'comment_belongsto_task_id', 'comment_creator')
     readonly_fields = ('comment_created_time', 'comment_updated_time')
-    
+    truncated_fields = ('comment_content',)
+    list_deferred_fields = (
+        'comment_content_html',
+        'comment_belongsto_task_id__task_description',
+        'comment_belongsto_task_id__task_description_html',
+        'comment_belongsto_task_id__task_belongsto_model_id__model_description',
+    )
+
+    comment_content_preview = truncated_column('comment_content', '评论内容')
+
 @admin.register(TrickRecord)
-class TrickRecordAdmin(admin.ModelAdmin):
-    list_display = ('trick_title', 'trick_content', 'trick_creator', 'trick_created_time', 'trick_updated_time')
+class TrickRecordAdmin(ScalableModelAdmin):
+    list_display = ('trick_title', 'trick_content_preview', 'trick_creator', 'trick_created_time', 'trick_updated_time')
     search_fields = ('trick_title', 'trick_content', 'trick_creator__username')
     list_filter = ('trick_created_time', 'trick_updated_time')
+    list_select_related = ('trick_creator',)
+    autocomplete_fields = ('trick_creator',)
     ordering = ('-trick_created_time', 'trick_title')
-    readonly_fields = ('trick_created_time', 'trick_updated_time')
\ No newline at end of file
+    readonly_fields = ('trick_created_time', 'trick_updated_time')
+    truncated_fields = ('trick_content',)
+    list_deferred_fields = ('trick_content_html',)
+
+    trick_content_preview = truncated_column('trick_content', '技巧内容')
+
+@admin.register(TaskActivityRecord)
+class TaskActivityRecordAdmin(ScalableModelAdmin):
+    list_display = ('activity_task_title', 'activity_action', 'activity_field', 'activity_old_value', 'activity_new_value', 'activity_actor', 'activity_created_time')
+    search_fields = ('activity_task_title', 'activity_actor__username')
+    list_filter = ('activity_action', 'activity_created_time', ('activity_actor', AutocompleteFilter))
+    list_select_related = ('activity_actor',)
+    ordering = ('-id',)
+
+    # 动态日志只追加，不允许在后台修改或删除
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(SavedTaskFilter)
+class SavedTaskFilterAdmin(ScalableModelAdmin):
+    list_display = ('filter_name', 'filter_owner', 'filter_task_status', 'filter_belongsto_project_id', 'filter_belongsto_model_id', 'filter_query', 'filter_created_time')
+    search_fields = ('filter_name', 'filter_owner__username')
+    list_filter = ('filter_task_status', ('filter_owner', AutocompleteFilter))
+    list_select_related = ('filter_owner', 'filter_belongsto_project_id', 'filter_belongsto_model_id__model_belongsto_project_id')
+    autocomplete_fields = ('filter_owner', 'filter_belongsto_project_id', 'filter_belongsto_model_id')
+    ordering = ('filter_owner', 'filter_name')
+
+@admin.register(NotificationEvent)
+class NotificationEventAdmin(ScalableModelAdmin):
+    list_display = ('notification_task_title', 'notification_kind', 'notification_recipient', 'notification_actor', 'notification_created_time', 'notification_sent_time')
+    search_fields = ('notification_task_title', 'notification_recipient__username')
+    list_filter = ('notification_kind', 'notification_created_time', 'notification_sent_time', ('notification_recipient', AutocompleteFilter))
+    list_select_related = ('notification_recipient', 'notification_actor')
+    ordering = ('-id',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(RecurringTaskTemplate)
+class RecurringTaskTemplateAdmin(ScalableModelAdmin):
+    list_display = ('template_title', 'template_rrule', 'template_type', 'template_belongsto_project_id', 'template_belongsto_model_id', 'template_assigned_to_user_id', 'template_is_active', 'template_materialized_until')
+    search_fields = ('template_title', 'template_belongsto_project_id__project_name')
+    list_filter = ('template_is_active', 'template_type', ('template_belongsto_project_id', AutocompleteFilter))
+    list_select_related = ('template_belongsto_project_id', 'template_belongsto_model_id__model_belongsto_project_id', 'template_assigned_to_user_id')
+    autocomplete_fields = ('template_creator', 'template_assigned_to_user_id', 'template_belongsto_project_id', 'template_belongsto_model_id')
+    ordering = ('template_belongsto_project_id', 'template_title')
+    readonly_fields = ('template_materialized_until', 'template_created_time', 'template_updated_time')
+
+@admin.register(ProjectWebhook)
+class ProjectWebhookAdmin(ScalableModelAdmin):
+    list_display = ('webhook_name', 'webhook_url', 'webhook_belongsto_project_id', 'webhook_events', 'webhook_is_active', 'webhook_failure_count', 'webhook_next_attempt_time', 'webhook_last_error', 'webhook_last_delivery_time')
+    search_fields = ('webhook_name', 'webhook_url', 'webhook_belongsto_project_id__project_name')
+    list_filter = ('webhook_is_active', ('webhook_belongsto_project_id', AutocompleteFilter))
+    list_select_related = ('webhook_belongsto_project_id',)
+    autocomplete_fields = ('webhook_creator', 'webhook_belongsto_project_id')
+    ordering = ('webhook_belongsto_project_id', 'webhook_name')
+    readonly_fields = ('webhook_created_time', 'webhook_failure_count', 'webhook_next_attempt_time', 'webhook_last_error', 'webhook_last_delivery_time', 'webhook_locked_until')
+    list_deferred_fields = ('webhook_belongsto_project_id__project_description',)
+    actions = ['retry_now']
+
+    @admin.action(description='立即重试所选 Webhook')
+    def retry_now(self, request, queryset):
+        updated = queryset.update(webhook_next_attempt_time=None)
+        self.message_user(request, f'已重置 {updated} 个 Webhook 的重试时间')
+
+@admin.register(WebhookOutboxEvent)
+class WebhookOutboxEventAdmin(ScalableModelAdmin):
+    list_display = ('id', 'outbox_event', 'outbox_webhook', 'outbox_created_time', 'outbox_attempts', 'outbox_delivered_time')
+    list_filter = ('outbox_event', 'outbox_created_time', 'outbox_delivered_time', ('outbox_webhook', AutocompleteFilter))
+    list_select_related = ('outbox_webhook',)
+    ordering = ('-id',)
+    list_deferred_fields = ('outbox_payload',)
+
+    # 发件箱由业务变更写入，后台只用于查看
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
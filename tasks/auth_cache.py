@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user, get_user_model
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+# 用户缓存的有效期（秒）；缓存在 Django 缓存中，多进程部署需配置共享缓存，
+# 用户信息变更、修改密码或退出登录时由信号删除，所有进程立即生效
+USER_CACHE_TTL = getattr(settings, 'TASKS_USER_CACHE_TTL', 60)
+
+
+def _user_key(user_id):
+    return f'tasks:user:{user_id}'
+
+
+def get_cached_user(request):
+    """
+    与 django.contrib.auth.get_user 等价的用户解析，命中用户缓存时不查询数据库
+    仍校验会话中的密码哈希，修改密码后旧会话会回落到 get_user() 并被注销
+    """
+    session = request.session
+    try:
+        user_id = get_user_model()._meta.pk.to_python(session[SESSION_KEY])
+        backend_path = session[BACKEND_SESSION_KEY]
+    except (KeyError, ValueError):
+        return get_user(request)
+
+    # 缓存读取返回反序列化的新对象，视图修改它不会影响其他请求
+    cached = cache.get(_user_key(user_id))
+    if cached is not None and backend_path in settings.AUTHENTICATION_BACKENDS:
+        session_hash = session.get(HASH_SESSION_KEY)
+        if session_hash and constant_time_compare(session_hash, cached.get_session_auth_hash()):
+            cached.backend = backend_path
+            return cached
+
+    user = get_user(request)
+    if user.is_authenticated:
+        cache.set(_user_key(user.pk), user, USER_CACHE_TTL)
+    return user
+
+
+def invalidate_user(user_id):
+    cache.delete(_user_key(user_id))
@@ -0,0 +1,25 @@
+from django.core.cache import cache
+
+# 任务数据版本号：任意任务变更时递增，基于任务数据的缓存把它作为键的一部分，
+# 版本变化后旧缓存自然失效，无需逐个删除
+TASK_CACHE_VERSION_KEY = 'tasks:task-cache-version'
+
+
+def get_task_cache_version():
+    version = cache.get(TASK_CACHE_VERSION_KEY)
+    if version is None:
+        cache.add(TASK_CACHE_VERSION_KEY, 1, timeout=None)
+        version = cache.get(TASK_CACHE_VERSION_KEY, 1)
+    return version
+
+
+def bump_task_cache_version():
+    try:
+        cache.incr(TASK_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(TASK_CACHE_VERSION_KEY, 2, timeout=None)
+
+
+def task_cache_key(*parts):
+    """生成随任务数据版本变化的缓存键"""
+    return ':'.join(['tasks', str(get_task_cache_version())] + [str(part) for part in parts])
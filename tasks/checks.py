@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core import checks
+
+# 只在当前进程内有效的缓存后端
+_PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """部署检查：会话、用户缓存和任务数据版本号依赖共享缓存，进程内缓存下退出登录和修改密码不会同步到其他进程"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend in _PROCESS_LOCAL_CACHES:
+        return [checks.Warning(
+            '默认缓存为进程内缓存，多进程部署时退出登录、修改密码和任务变更无法同步到其他进程',
+            hint='设置 TASKS_REDIS_URL 使用 Redis 等共享缓存',
+            id='tasks.W001',
+        )]
+    return []
@@ -0,0 +1,114 @@
+import functools
+import hashlib
+from importlib import metadata
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib import messages
+from django.db.models import Count, Max, Q, Value
+from django.views.decorators.cache import cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
+
+from . import rendering
+from .filters import saved_filter_specs, saved_filters_with_counts
+
+
+def table_states(*specs):
+    """
+    [(模型, 更新时间字段, 筛选条件)] -> [(最近更新时间, 行数)]
+    各表的聚合用 UNION ALL 合并为一次查询；行数用于感知删除
+    """
+    querysets = [
+        model.objects.filter(q or Q()).order_by()
+        .annotate(state_index=Value(index)).values('state_index')
+        .annotate(latest=Max(field), total=Count('pk'))
+        .values_list('state_index', 'latest', 'total')
+        for index, (model, field, q) in enumerate(specs)
+    ]
+    rows = querysets[0].union(*querysets[1:], all=True) if len(querysets) > 1 else querysets[0]
+    states = {index: (latest, total) for index, latest, total in rows}
+    return [states.get(index, (None, 0)) for index in range(len(specs))]
+
+
+@functools.cache
+def build_marker():
+    """
+    模板、静态文件清单和富文本渲染库版本的摘要，部署新版本或升级依赖后旧页面随之失效
+    每个进程只计算一次
+    """
+    digest = hashlib.sha1()
+    for package in ('markdown', 'pygments'):
+        try:
+            version = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            version = ''
+        digest.update(f'{package}={version}\n'.encode('utf-8'))
+    template_dirs = [Path(apps.get_app_config('tasks').path) / 'templates']
+    template_dirs += [Path(path) for engine in settings.TEMPLATES for path in engine.get('DIRS', [])]
+    files = [path for root in template_dirs for path in sorted(root.rglob('*')) if path.is_file()]
+    if settings.STATIC_ROOT:
+        # collectstatic 生成的清单记录了带内容哈希的静态文件名
+        files.append(Path(settings.STATIC_ROOT) / 'staticfiles.json')
+    for path in files:
+        if path.is_file():
+            digest.update(str(path).encode('utf-8'))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _validators(request, state_func, args, kwargs):
+    """计算 (ETag, Last-Modified)，同一请求内只计算一次"""
+    cached = getattr(request, '_page_validators', None)
+    if cached is not None:
+        return cached
+    validators = (None, None)
+    # 只对 GET/HEAD 做条件请求；有待显示的消息时页面内容必然不同，直接完整渲染
+    if request.method in ('GET', 'HEAD') and not len(messages.get_messages(request)):
+        specs = state_func(request, *args, **kwargs)
+        if specs is not None:
+            user = request.user
+            # 每个页面的侧边栏都显示当前用户的筛选及结果数，依赖其名下任务和保存的筛选
+            sidebar_specs = saved_filter_specs(user)
+            states = table_states(*sidebar_specs, *specs)
+            # 完整渲染时侧边栏沿用这次查询的结果
+            request._saved_filter_states = states[:len(sidebar_specs)]
+            parts = [
+                user.pk,
+                # 页面中的表单带有 CSRF 令牌，令牌更换后不能继续使用旧页面
+                request.META.get('CSRF_COOKIE', ''),
+                request.path,
+                request.GET.urlencode(),
+                # 模板、静态文件或渲染规则变化后，数据库中的行状态不变，页面内容却已不同
+                rendering.RENDERER_VERSION,
+                build_marker(),
+                saved_filters_with_counts(user, request._saved_filter_states),
+                states,
+            ]
+            etag = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+            times = [latest for latest, _ in states if latest is not None]
+            validators = (etag, max(times) if times else None)
+    request._page_validators = validators
+    return validators
+
+
+def conditional_page(state_func):
+    """
+    页面的条件 GET：在执行视图的查询和模板渲染之前，用廉价的校验值判断页面是否变化，未变化返回 304
+    - state_func(request, *args, **kwargs) 返回页面依赖的 [(模型, 更新时间字段, 筛选条件)]，返回 None 表示不做条件请求
+    - 校验值取自数据库中这些表的 (最近更新时间, 行数)，连同当前用户名下的任务和筛选一次查询得出；
+      不依赖进程内的缓存版本号，其他进程中的修改和删除、缓存被清空都不会让旧页面继续有效
+    - 校验值还包含富文本渲染器版本和 build_marker()，重新渲染或部署新模板、静态文件后旧页面失效
+    - 完整响应使用 gzip 压缩；Cache-Control 要求浏览器每次重新验证
+    """
+    def etag(request, *args, **kwargs):
+        return _validators(request, state_func, args, kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return _validators(request, state_func, args, kwargs)[1]
+
+    def decorator(view):
+        view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+        return gzip_page(cache_control(private=True, no_cache=True)(view))
+    return decorator
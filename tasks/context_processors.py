@@ -0,0 +1,12 @@
+from django.utils.functional import SimpleLazyObject
+
+from .filters import saved_filters_with_counts
+
+
+def saved_filters(request):
+    # 侧边栏“我的筛选”，只在模板实际用到时查询
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {'saved_filters': []}
+    states = getattr(request, '_saved_filter_states', None)
+    return {'saved_filters': SimpleLazyObject(lambda: saved_filters_with_counts(user, states))}
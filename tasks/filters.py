@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .caching import task_cache_key
+from .models import SavedTaskFilter, Task
+
+SAVED_FILTER_CACHE_TIMEOUT = 600
+
+
+def task_filter_q(params):
+    """由 task_list 的查询参数（task_status / project_id / model_id / q）构造筛选条件"""
+    q = Q()
+    if params.get('task_status'):
+        q &= Q(task_status=params['task_status'])
+    if params.get('project_id'):
+        q &= Q(task_belongsto_project_id=params['project_id'])
+    if params.get('model_id'):
+        q &= Q(task_belongsto_model_id=params['model_id'])
+    if params.get('q'):
+        q &= Q(task_title__icontains=params['q']) | Q(task_description__icontains=params['q'])
+    return q
+
+
+def _saved_filters_key(user_id):
+    return task_cache_key('saved_filters', user_id)
+
+
+def _count_saved_filters(user, filters):
+    """一次条件聚合查询得到所有筛选的结果数"""
+    if not filters:
+        return {}
+    aggregates = {}
+    for saved_filter in filters:
+        q = task_filter_q(saved_filter.params)
+        aggregates[f'filter_{saved_filter.id}'] = Count('id', filter=q) if q else Count('id')
+    totals = Task.objects.filter(task_assigned_to_user_id=user).aggregate(**aggregates)
+    return {saved_filter.id: totals[f'filter_{saved_filter.id}'] for saved_filter in filters}
+
+
+def saved_filter_specs(user):
+    """侧边栏筛选结果数依赖的表：用户名下的任务和保存的筛选，供 table_states 使用"""
+    return [
+        (Task, 'task_updated_time', Q(task_assigned_to_user_id=user.pk)),
+        (SavedTaskFilter, 'filter_created_time', Q(filter_owner=user.pk)),
+    ]
+
+
+def saved_filters_with_counts(user, states=None):
+    """
+    用户保存的筛选及其结果数，供侧边栏展示
+    缓存连同计算时数据库中相关表的 (最近更新时间, 行数) 一起保存，读取时比对：
+    其他进程的修改不会递增本进程的任务数据版本，靠数据库状态感知；筛选本身增删改时由信号清除
+    states 为 table_states(*saved_filter_specs(user)) 的结果，调用方已查询过时传入以省去一次查询
+    """
+    if states is None:
+        # conditional 依赖本模块，这里延迟导入
+        from .conditional import table_states
+        states = table_states(*saved_filter_specs(user))
+    key = _saved_filters_key(user.id)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == states:
+        return cached[1]
+    filters = list(SavedTaskFilter.objects.filter(filter_owner=user))
+    counts = _count_saved_filters(user, filters)
+    items = [
+        {'id': f.id, 'name': f.filter_name, 'url': f.get_absolute_url(), 'count': counts[f.id]}
+        for f in filters
+    ]
+    cache.set(key, (states, items), SAVED_FILTER_CACHE_TIMEOUT)
+    return items
+
+
+def invalidate_saved_filters(user_id):
+    cache.delete(_saved_filters_key(user_id))
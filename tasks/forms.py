@@ -1,5 +1,5 @@
 from django import forms
-from .models import Project, Task, ProjectModel, TaskCommitRecord, TaskCommentRecord, TrickRecord
+from .models import Project, Task, ProjectModel, TaskCommitRecord, TaskCommentRecord, TrickRecord, SavedTaskFilter
 
 class ProjectForm(forms.ModelForm):
     class Meta:
@@ -111,4 +111,13 @@ class TrickForm(forms.ModelForm):
         widgets = {
             'trick_title': forms.TextInput(attrs={'class': 'form-control'}),
             'trick_content': forms.Textarea(attrs={'rows': 5, 'class': 'form-control'}),
-        }
\ No newline at end of file
+        }
+
+
+class SavedTaskFilterForm(forms.ModelForm):
+    class Meta:
+        model = SavedTaskFilter
+        fields = ['filter_name', 'filter_task_status', 'filter_belongsto_project_id', 'filter_belongsto_model_id', 'filter_query']
+        widgets = {
+            'filter_name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': '筛选名称'}),
+        }
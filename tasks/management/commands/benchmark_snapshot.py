@@ -0,0 +1,96 @@
+import os
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from tasks.models import Project, ProjectModel, Task, TaskActivityRecord, TaskCommentRecord
+from tasks.snapshot import flush_tables, read_snapshot, snapshot_models, write_snapshot
+
+
+class Command(BaseCommand):
+    help = '在临时测试数据库中生成数据，对比 snapshot/restore 与 dumpdata/loaddata 的耗时和文件大小（不会影响现有数据）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=20000, help='生成的任务数')
+        parser.add_argument('--users', type=int, default=50, help='生成的用户数')
+        parser.add_argument('--projects', type=int, default=10, help='生成的项目数（每个项目 10 个机型）')
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.seed(options['users'], options['projects'], options['tasks'])
+            with tempfile.TemporaryDirectory() as directory:
+                self.run(directory)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def seed(self, user_count, project_count, task_count):
+        started = time.perf_counter()
+        users = User.objects.bulk_create(User(username=f'user{i}', email=f'user{i}@example.com') for i in range(user_count))
+        projects = Project.objects.bulk_create(
+            Project(project_name=f'项目{i}', project_creator=users[i % user_count]) for i in range(project_count)
+        )
+        models = ProjectModel.objects.bulk_create(
+            ProjectModel(model_name=f'机型{i}', model_belongsto_project_id=projects[i % project_count]) for i in range(project_count * 10)
+        )
+        tasks = []
+        for i in range(task_count):
+            model = models[i % len(models)]
+            task = Task(
+                task_title=f'任务{i}',
+                task_description=f'第 {i} 个任务的描述\n' * 5,
+                task_status=Task.TASK_STATUS_CHOICES[i % len(Task.TASK_STATUS_CHOICES)][0],
+                task_creator=users[i % user_count],
+                task_assigned_to_user_id=users[(i + 1) % user_count],
+                task_belongsto_project_id_id=model.model_belongsto_project_id_id,
+                task_belongsto_model_id=model,
+            )
+            task.sync_denormalized_fields()
+            tasks.append(task)
+        tasks = Task.objects.bulk_create(tasks, batch_size=500)
+        comments = []
+        for task in tasks:
+            comment = TaskCommentRecord(comment_content='评论内容', comment_creator=task.task_creator, comment_belongsto_task_id=task)
+            comment.sync_denormalized_fields()
+            comments.append(comment)
+        TaskCommentRecord.objects.bulk_create(comments, batch_size=500)
+        TaskActivityRecord.objects.bulk_create((
+            TaskActivityRecord(
+                activity_action='created', activity_task_title=task.task_title,
+                activity_actor_id=task.task_creator_id, activity_belongsto_task_id_id=task.pk,
+            ) for task in tasks
+        ), batch_size=500)
+        total = sum(model._base_manager.count() for model in snapshot_models())
+        self.stdout.write(f'生成 {total} 行数据，用时 {time.perf_counter() - started:.2f} 秒')
+
+    def timed(self, label, func):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{label:<12}{elapsed:>8.2f} 秒')
+        return elapsed
+
+    def run(self, directory):
+        models = snapshot_models()
+        labels = [model._meta.label for model in models]
+        fixture = os.path.join(directory, 'dump.json')
+        snapshot = os.path.join(directory, 'snapshot.jsonl.gz')
+
+        results = {}
+        results['dumpdata'] = self.timed('dumpdata', lambda: call_command('dumpdata', *labels, output=fixture, verbosity=0))
+        results['snapshot'] = self.timed('snapshot', lambda: write_snapshot(snapshot))
+        flush_tables(models)
+        results['loaddata'] = self.timed('loaddata', lambda: call_command('loaddata', fixture, verbosity=0))
+        results['restore'] = self.timed('restore', lambda: read_snapshot(snapshot, flush=True))
+
+        self.stdout.write(f'文件大小: dumpdata {os.path.getsize(fixture) / 1024 / 1024:.1f} MB，'
+                          f'snapshot {os.path.getsize(snapshot) / 1024 / 1024:.1f} MB')
+        self.stdout.write(self.style.SUCCESS(
+            f"导出快 {results['dumpdata'] / results['snapshot']:.1f} 倍，"
+            f"恢复快 {results['loaddata'] / results['restore']:.1f} 倍"
+        ))
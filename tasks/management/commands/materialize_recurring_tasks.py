@@ -0,0 +1,24 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.occurrences import materialize_occurrences
+
+
+class Command(BaseCommand):
+    help = '根据周期任务模板批量生成接下来一段时间内的任务，可重复运行，建议每天定时执行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='以该日期为“今天”计算（YYYY-MM-DD），默认今天')
+        parser.add_argument('--days', type=int, help='生成未来多少天内的任务，默认使用 TASK_RECURRENCE_HORIZON_DAYS')
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"无效的日期: {options['date']}")
+
+        created, templates = materialize_occurrences(today=today, horizon_days=options['days'])
+        self.stdout.write(self.style.SUCCESS(f'处理 {templates} 个模板，新建 {created} 个任务'))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.models import Task, TaskCommentRecord, TrickRecord
+
+RICH_TEXT_MODELS = [Task, TaskCommentRecord, TrickRecord]
+
+
+class Command(BaseCommand):
+    help = '批量重新渲染富文本缓存（升级渲染器后运行），只处理内容哈希不一致的记录'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='忽略内容哈希，全部重新渲染')
+        parser.add_argument('--batch-size', type=int, default=500, help='每批读取和写回的记录数')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model in RICH_TEXT_MODELS:
+            total = 0
+            # bulk_update 不会自动更新 auto_now 字段：手动写入修改时间，
+            # 按更新时间判断变化的每日快照、缓存和页面校验值才能感知重新渲染
+            touched_fields = [field.attname for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+            for rich_text in model.rich_text_fields:
+                fields = [rich_text.source] + rich_text.rendered_fields
+                update_fields = rich_text.rendered_fields + touched_fields
+                pending = []
+                # 只读取相关字段，按主键顺序分批处理，避免一次加载整张表
+                queryset = model.objects.only('pk', *fields).order_by('pk')
+                for instance in queryset.iterator(chunk_size=batch_size):
+                    if rich_text.refresh(instance, force=options['force']):
+                        now = timezone.now()
+                        for name in touched_fields:
+                            setattr(instance, name, now)
+                        pending.append(instance)
+                    if len(pending) >= batch_size:
+                        model.objects.bulk_update(pending, update_fields)
+                        total += len(pending)
+                        pending = []
+                if pending:
+                    model.objects.bulk_update(pending, update_fields)
+                    total += len(pending)
+            self.stdout.write(f'{model._meta.verbose_name}: 重新渲染 {total} 条')
+        self.stdout.write(self.style.SUCCESS('富文本渲染完成'))
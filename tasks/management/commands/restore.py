@@ -0,0 +1,30 @@
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from tasks.snapshot import DEFAULT_CHUNK_SIZE, read_snapshot
+
+
+class Command(BaseCommand):
+    help = '从 snapshot 命令导出的快照恢复用户和任务数据，按外键顺序批量插入'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='快照文件路径')
+        parser.add_argument('--database', default='default', help='恢复到的数据库别名')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_CHUNK_SIZE, help='每批插入的行数')
+        parser.add_argument('--flush', action='store_true', help='恢复前清空相关表（会同时清空引用用户的其他表，如后台操作日志）')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            counts = read_snapshot(
+                options['path'], using=options['database'], batch_size=options['batch_size'], flush=options['flush'],
+            )
+        except (OSError, ValueError, ValidationError, IntegrityError) as exc:
+            raise CommandError(f'恢复失败: {exc}')
+        for label, count in counts.items():
+            self.stdout.write(f'{label}: {count} 行')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'恢复 {sum(counts.values())} 行，用时 {elapsed:.2f} 秒'))
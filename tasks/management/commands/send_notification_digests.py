@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.notifications import deliver_digests
+
+
+class Command(BaseCommand):
+    help = '按收件人合并任务通知并发送摘要邮件；加 --loop 作为常驻后台任务运行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='循环运行，每隔 --interval 秒检查一次')
+        parser.add_argument('--interval', type=int, default=60, help='循环间隔（秒），默认 60')
+        parser.add_argument('--window', type=int, help='合并窗口（秒），默认使用 TASK_NOTIFICATION_DIGEST_WINDOW')
+        parser.add_argument('--batch-size', type=int, help='每批处理的收件人数，默认使用 TASK_NOTIFICATION_BATCH_SIZE')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, processed = deliver_digests(window=options['window'], batch_size=options['batch_size'])
+            if sent or processed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'已发送 {sent} 封摘要邮件，处理 {processed} 条通知事件'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
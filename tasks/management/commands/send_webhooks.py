@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.webhooks import ConnectionPool, deliver_webhooks, purge_delivered
+
+
+class Command(BaseCommand):
+    help = '投递 Webhook 发件箱中的事件；加 --loop 作为常驻后台任务运行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='循环运行，每隔 --interval 秒检查一次')
+        parser.add_argument('--interval', type=int, default=5, help='循环间隔（秒），默认 5')
+        parser.add_argument('--batch-size', type=int, help='每个请求合并的事件数，默认使用 TASK_WEBHOOK_BATCH_SIZE')
+        parser.add_argument('--purge-days', type=int, default=7, help='删除投递成功超过该天数的事件，默认 7，0 表示不删除')
+
+    def handle(self, *args, **options):
+        # 循环运行时在各轮之间复用 keep-alive 连接
+        pool = ConnectionPool()
+        try:
+            while True:
+                delivered, requests, failed = deliver_webhooks(batch_size=options['batch_size'], pool=pool)
+                if delivered or failed or not options['loop']:
+                    self.stdout.write(self.style.SUCCESS(f'已投递 {delivered} 个事件，发送 {requests} 个请求，{failed} 个 Webhook 投递失败'))
+                if options['purge_days']:
+                    purge_delivered(options['purge_days'])
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        finally:
+            pool.close()
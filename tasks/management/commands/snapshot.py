@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.snapshot import DEFAULT_CHUNK_SIZE, write_snapshot
+
+
+class Command(BaseCommand):
+    help = '将用户和任务相关的全部数据导出为压缩快照（gzip JSONL），在一个一致的只读事务中流式读取'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='快照文件路径，例如 backup.jsonl.gz')
+        parser.add_argument('--database', default='default', help='导出的数据库别名')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='每次从数据库读取的行数')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = write_snapshot(options['path'], using=options['database'], chunk_size=options['chunk_size'])
+        for label, count in counts.items():
+            self.stdout.write(f'{label}: {count} 行')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"导出 {sum(counts.values())} 行到 {options['path']}，用时 {elapsed:.2f} 秒"))
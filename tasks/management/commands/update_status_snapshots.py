@@ -0,0 +1,28 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.snapshots import update_snapshots
+
+
+class Command(BaseCommand):
+    help = '增量生成项目/机型的每日任务状态快照（用于燃尽图和累积流图），建议每天定时运行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='快照日期（YYYY-MM-DD），默认今天')
+
+    def handle(self, *args, **options):
+        day = None
+        if options['date']:
+            try:
+                day = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"无效的日期: {options['date']}")
+
+        try:
+            gap_days, changed_models = update_snapshots(day)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f'快照已更新：补齐 {gap_days} 天，重新统计 {changed_models} 个机型'
+        ))
@@ -0,0 +1,40 @@
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from . import activity
+from .auth_cache import get_cached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    替代 AuthenticationMiddleware：request.user 优先从进程内用户缓存解析，
+    已登录用户的页面请求在进入视图前无需查询用户表
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
+
+
+class ActivityLogMiddleware:
+    """
+    在请求期间缓冲任务动态记录，响应生成后一次性批量写入，
+    避免每个字段变更单独执行一条 INSERT
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tokens = activity.begin_request(request)
+        try:
+            return self.get_response(request)
+        except BaseException:
+            activity.discard()
+            raise
+        finally:
+            activity.end_request(tokens)
+
+    def process_exception(self, request, exception):
+        # 视图抛出异常时其中的变更可能已随事务回滚，不写入对应的动态
+        activity.discard()
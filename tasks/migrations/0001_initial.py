@@ -0,0 +1,354 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:08
+
+import django.db.models.deletion
+import django.utils.timezone
+import tasks.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Project',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project_name', models.CharField(max_length=100, unique=True, verbose_name='项目名称')),
+                ('project_description', models.TextField(blank=True, verbose_name='项目描述')),
+                ('project_priority', models.CharField(choices=[('low', '低'), ('medium', '中'), ('high', '高'), ('urgent', '紧急')], default='medium', max_length=32, verbose_name='项目优先级')),
+                ('project_priority_rank', models.PositiveSmallIntegerField(default=2, editable=False, verbose_name='项目优先级排序值')),
+                ('project_created_time', models.DateTimeField(auto_now_add=True, verbose_name='项目创建时间')),
+                ('project_updated_time', models.DateTimeField(auto_now=True, verbose_name='项目更新时间')),
+                ('project_creator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='created_projects', to=settings.AUTH_USER_MODEL, verbose_name='项目创建者')),
+            ],
+            options={
+                'verbose_name': '项目',
+                'verbose_name_plural': '项目',
+                'ordering': ['-project_priority_rank', '-project_created_time', 'project_name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=100, verbose_name='机型名称')),
+                ('model_description', models.TextField(blank=True, verbose_name='机型描述')),
+                ('model_priority', models.CharField(choices=[('low', '低'), ('medium', '中'), ('high', '高'), ('urgent', '紧急')], default='medium', max_length=32, verbose_name='机型优先级')),
+                ('model_priority_rank', models.PositiveSmallIntegerField(default=2, editable=False, verbose_name='机型优先级排序值')),
+                ('model_created_time', models.DateTimeField(auto_now_add=True, verbose_name='机型创建时间')),
+                ('model_updated_time', models.DateTimeField(auto_now=True, verbose_name='机型更新时间')),
+                ('model_git_repository', models.URLField(blank=True, verbose_name='机型代码仓库')),
+                ('model_git_branch', models.CharField(blank=True, max_length=100, verbose_name='机型代码分支')),
+                ('model_belongsto_project_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='models', to='tasks.project', verbose_name='所属项目')),
+                ('model_creator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='created_models', to=settings.AUTH_USER_MODEL, verbose_name='机型创建者')),
+            ],
+            options={
+                'verbose_name': '机型',
+                'verbose_name_plural': '机型',
+                'ordering': ['-model_priority_rank', '-model_created_time', 'model_name', 'model_belongsto_project_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectStatusSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField(verbose_name='快照日期')),
+                ('snapshot_task_status', models.CharField(choices=[('pending', '待处理'), ('in_progress', '进行中'), ('completed', '已完成'), ('on_hold', '暂停'), ('cancelled', '已取消')], max_length=32, verbose_name='任务状态')),
+                ('snapshot_task_type', models.CharField(choices=[('feature', '功能开发'), ('bugfix', 'Bug修复'), ('feedback', '横展反馈'), ('documentation', '文档编写'), ('optimization', '性能优化'), ('testing', '测试'), ('research', '功能调研'), ('other', '其他')], max_length=32, verbose_name='任务类型')),
+                ('snapshot_task_priority', models.CharField(choices=[('low', '低'), ('medium', '中'), ('high', '高'), ('urgent', '紧急')], max_length=32, verbose_name='任务优先级')),
+                ('snapshot_task_count', models.PositiveIntegerField(default=0, verbose_name='任务数')),
+                ('snapshot_belongsto_model_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_snapshots', to='tasks.projectmodel', verbose_name='所属机型')),
+                ('snapshot_belongsto_project_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_snapshots', to='tasks.project', verbose_name='所属项目')),
+            ],
+            options={
+                'verbose_name': '任务状态快照',
+                'verbose_name_plural': '任务状态快照',
+                'ordering': ['snapshot_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectWebhook',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('webhook_name', models.CharField(max_length=100, verbose_name='名称')),
+                ('webhook_url', models.URLField(max_length=500, verbose_name='推送地址')),
+                ('webhook_secret', models.CharField(default=tasks.models.generate_webhook_secret, max_length=64, verbose_name='签名密钥')),
+                ('webhook_events', models.CharField(blank=True, help_text='逗号分隔，例如 task.created,comment.created；留空表示全部事件', max_length=255, validators=[tasks.models.validate_webhook_events], verbose_name='订阅事件')),
+                ('webhook_is_active', models.BooleanField(default=True, verbose_name='是否启用')),
+                ('webhook_created_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('webhook_failure_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='连续失败次数')),
+                ('webhook_next_attempt_time', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='下次重试时间')),
+                ('webhook_last_error', models.CharField(blank=True, editable=False, max_length=255, verbose_name='最近错误')),
+                ('webhook_last_delivery_time', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='最近成功投递时间')),
+                ('webhook_belongsto_project_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='webhooks', to='tasks.project', verbose_name='所属项目')),
+                ('webhook_creator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_webhooks', to=settings.AUTH_USER_MODEL, verbose_name='创建者')),
+            ],
+            options={
+                'verbose_name': '项目 Webhook',
+                'verbose_name_plural': '项目 Webhook',
+                'ordering': ['webhook_belongsto_project_id', 'webhook_name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecurringTaskTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('template_title', models.CharField(max_length=80, verbose_name='任务标题')),
+                ('template_description', models.TextField(blank=True, verbose_name='任务描述')),
+                ('template_type', models.CharField(choices=[('feature', '功能开发'), ('bugfix', 'Bug修复'), ('feedback', '横展反馈'), ('documentation', '文档编写'), ('optimization', '性能优化'), ('testing', '测试'), ('research', '功能调研'), ('other', '其他')], default='testing', max_length=32, verbose_name='任务类型')),
+                ('template_priority', models.CharField(choices=[('low', '低'), ('medium', '中'), ('high', '高'), ('urgent', '紧急')], default='medium', max_length=32, verbose_name='任务优先级')),
+                ('template_rrule', models.CharField(help_text='例如 FREQ=WEEKLY;INTERVAL=2;BYDAY=MO', max_length=200, validators=[tasks.models.validate_rrule], verbose_name='重复规则')),
+                ('template_start_date', models.DateField(verbose_name='开始日期')),
+                ('template_end_date', models.DateField(blank=True, null=True, verbose_name='结束日期')),
+                ('template_deadline_days', models.PositiveSmallIntegerField(blank=True, help_text='发生日期之后多少天截止，留空表示无截止时间', null=True, verbose_name='截止天数')),
+                ('template_is_active', models.BooleanField(default=True, verbose_name='是否启用')),
+                ('template_materialized_until', models.DateField(blank=True, editable=False, null=True, verbose_name='已生成至')),
+                ('template_created_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('template_updated_time', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('template_assigned_to_user_id', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_task_templates', to=settings.AUTH_USER_MODEL, verbose_name='负责人')),
+                ('template_belongsto_model_id', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='task_templates', to='tasks.projectmodel', verbose_name='所属机型')),
+                ('template_belongsto_project_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_templates', to='tasks.project', verbose_name='所属项目')),
+                ('template_creator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_task_templates', to=settings.AUTH_USER_MODEL, verbose_name='模板创建者')),
+            ],
+            options={
+                'verbose_name': '周期任务模板',
+                'verbose_name_plural': '周期任务模板',
+                'ordering': ['template_belongsto_project_id', 'template_title'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SavedTaskFilter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filter_name', models.CharField(max_length=50, verbose_name='筛选名称')),
+                ('filter_task_status', models.CharField(blank=True, choices=[('pending', '待处理'), ('in_progress', '进行中'), ('completed', '已完成'), ('on_hold', '暂停'), ('cancelled', '已取消')], max_length=32, verbose_name='任务状态')),
+                ('filter_query', models.CharField(blank=True, max_length=100, verbose_name='搜索关键字')),
+                ('filter_created_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('filter_belongsto_model_id', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tasks.projectmodel', verbose_name='所属机型')),
+                ('filter_belongsto_project_id', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tasks.project', verbose_name='所属项目')),
+                ('filter_owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_task_filters', to=settings.AUTH_USER_MODEL, verbose_name='所属用户')),
+            ],
+            options={
+                'verbose_name': '保存的筛选',
+                'verbose_name_plural': '保存的筛选',
+                'ordering': ['filter_name', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_title', models.CharField(max_length=100, verbose_name='任务标题')),
+                ('task_description', models.TextField(blank=True, verbose_name='任务描述')),
+                ('task_description_html', models.TextField(blank=True, editable=False, verbose_name='任务描述（渲染结果）')),
+                ('task_description_hash', models.CharField(blank=True, editable=False, max_length=40, verbose_name='任务描述内容哈希')),
+                ('task_description_excerpt', models.CharField(blank=True, editable=False, max_length=200, verbose_name='任务描述摘要')),
+                ('task_priority', models.CharField(choices=[('low', '低'), ('medium', '中'), ('high', '高'), ('urgent', '紧急')], default='medium', max_length=32, verbose_name='任务优先级')),
+                ('task_priority_rank', models.PositiveSmallIntegerField(default=2, editable=False, verbose_name='任务优先级排序值')),
+                ('task_created_time', models.DateTimeField(auto_now_add=True, verbose_name='任务创建时间')),
+                ('task_updated_time', models.DateTimeField(auto_now=True, verbose_name='任务更新时间')),
+                ('task_start_time', models.DateTimeField(blank=True, null=True, verbose_name='任务开始时间')),
+                ('task_end_time', models.DateTimeField(blank=True, null=True, verbose_name='任务结束时间')),
+                ('task_deadline', models.DateTimeField(blank=True, null=True, verbose_name='任务截止时间')),
+                ('task_status', models.CharField(choices=[('pending', '待处理'), ('in_progress', '进行中'), ('completed', '已完成'), ('on_hold', '暂停'), ('cancelled', '已取消')], default='pending', max_length=32, verbose_name='任务状态')),
+                ('task_type', models.CharField(choices=[('feature', '功能开发'), ('bugfix', 'Bug修复'), ('feedback', '横展反馈'), ('documentation', '文档编写'), ('optimization', '性能优化'), ('testing', '测试'), ('research', '功能调研'), ('other', '其他')], default='feature', max_length=32, verbose_name='任务类型')),
+                ('task_comment_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='评论数')),
+                ('task_commit_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='提交记录数')),
+                ('task_board_position', models.FloatField(default=tasks.models.default_board_position, editable=False, verbose_name='看板位置')),
+                ('task_version', models.PositiveIntegerField(default=0, editable=False, verbose_name='版本号')),
+                ('task_occurrence_date', models.DateField(blank=True, editable=False, null=True, verbose_name='发生日期')),
+                ('task_assigned_to_user_id', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_tasks', to=settings.AUTH_USER_MODEL, verbose_name='负责人')),
+                ('task_belongsto_model_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='tasks.projectmodel', verbose_name='所属机型')),
+                ('task_belongsto_project_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='tasks.project', verbose_name='所属项目')),
+                ('task_creator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='created_tasks', to=settings.AUTH_USER_MODEL, verbose_name='任务创建者')),
+                ('task_recurring_template', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='tasks.recurringtasktemplate', verbose_name='周期任务模板')),
+                ('task_source_task_id', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sub_tasks', to='tasks.task', verbose_name='源任务ID')),
+            ],
+            options={
+                'verbose_name': '任务',
+                'verbose_name_plural': '任务',
+                'ordering': ['-task_priority_rank', '-task_created_time', 'task_title', 'task_belongsto_model_id', 'task_status', 'task_deadline', 'task_assigned_to_user_id', 'task_type', 'task_creator'],
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_kind', models.CharField(choices=[('assigned', '任务分配'), ('status_changed', '状态变更'), ('comment_added', '新评论')], max_length=32, verbose_name='通知类型')),
+                ('notification_task_title', models.CharField(max_length=100, verbose_name='任务标题')),
+                ('notification_old_value', models.CharField(blank=True, max_length=255, verbose_name='原值')),
+                ('notification_new_value', models.CharField(blank=True, max_length=255, verbose_name='新值')),
+                ('notification_created_time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='产生时间')),
+                ('notification_sent_time', models.DateTimeField(blank=True, null=True, verbose_name='发送时间')),
+                ('notification_actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='操作人')),
+                ('notification_recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL, verbose_name='接收人')),
+                ('notification_belongsto_task_id', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='tasks.task', verbose_name='所属任务')),
+            ],
+            options={
+                'verbose_name': '通知事件',
+                'verbose_name_plural': '通知事件',
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskActivityRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('activity_action', models.CharField(choices=[('created', '创建任务'), ('updated', '更新字段'), ('deleted', '删除任务'), ('comment_added', '添加评论'), ('commit_added', '添加提交记录')], max_length=32, verbose_name='动作')),
+                ('activity_field', models.CharField(blank=True, max_length=64, verbose_name='变更字段')),
+                ('activity_old_value', models.CharField(blank=True, max_length=255, verbose_name='原值')),
+                ('activity_new_value', models.CharField(blank=True, max_length=255, verbose_name='新值')),
+                ('activity_task_title', models.CharField(max_length=100, verbose_name='任务标题')),
+                ('activity_created_time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='操作时间')),
+                ('activity_actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='task_activities', to=settings.AUTH_USER_MODEL, verbose_name='操作人')),
+                ('activity_belongsto_task_id', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='activities', to='tasks.task', verbose_name='所属任务')),
+                ('activity_task_assignee', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='任务负责人')),
+            ],
+            options={
+                'verbose_name': '任务动态',
+                'verbose_name_plural': '任务动态',
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskCommentRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('comment_content', models.TextField(verbose_name='评论内容')),
+                ('comment_content_html', models.TextField(blank=True, editable=False, verbose_name='评论内容（渲染结果）')),
+                ('comment_content_hash', models.CharField(blank=True, editable=False, max_length=40, verbose_name='评论内容哈希')),
+                ('comment_content_excerpt', models.CharField(blank=True, editable=False, max_length=200, verbose_name='评论摘要')),
+                ('comment_created_time', models.DateTimeField(auto_now_add=True, verbose_name='评论创建时间')),
+                ('comment_updated_time', models.DateTimeField(auto_now=True, verbose_name='评论更新时间')),
+                ('comment_belongsto_task_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='tasks.task', verbose_name='所属任务')),
+                ('comment_creator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='created_comments', to=settings.AUTH_USER_MODEL, verbose_name='评论创建者')),
+            ],
+            options={
+                'verbose_name': '评论记录',
+                'verbose_name_plural': '评论记录',
+                'ordering': ['-comment_created_time', 'comment_belongsto_task_id', 'comment_creator'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskCommitRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('commit_git_hash', models.CharField(max_length=64, verbose_name='Git提交哈希')),
+                ('commit_message', models.TextField(blank=True, verbose_name='提交信息')),
+                ('commit_url', models.URLField(verbose_name='提交链接')),
+                ('commit_submit_time', models.DateTimeField(verbose_name='提交日期时间')),
+                ('commit_created_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('commit_is_merged', models.BooleanField(default=False, verbose_name='是否已合并')),
+                ('commit_merge_request_url', models.URLField(blank=True, verbose_name='合并请求链接')),
+                ('commit_belongsto_task_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='commit_records', to='tasks.task', verbose_name='所属任务')),
+            ],
+            options={
+                'verbose_name': '提交记录',
+                'verbose_name_plural': '提交记录',
+                'ordering': ['-commit_created_time', '-commit_submit_time', 'commit_belongsto_task_id', 'commit_git_hash'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TrickRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trick_title', models.CharField(max_length=100, verbose_name='技巧标题')),
+                ('trick_content', models.TextField(blank=True, verbose_name='技巧内容')),
+                ('trick_content_html', models.TextField(blank=True, editable=False, verbose_name='技巧内容（渲染结果）')),
+                ('trick_content_hash', models.CharField(blank=True, editable=False, max_length=40, verbose_name='技巧内容哈希')),
+                ('trick_content_excerpt', models.CharField(blank=True, editable=False, max_length=200, verbose_name='技巧摘要')),
+                ('trick_created_time', models.DateTimeField(auto_now_add=True, verbose_name='技巧创建时间')),
+                ('trick_updated_time', models.DateTimeField(auto_now=True, verbose_name='技巧更新时间')),
+                ('trick_creator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='created_tricks', to=settings.AUTH_USER_MODEL, verbose_name='技巧创建者')),
+            ],
+            options={
+                'verbose_name': '技巧记录',
+                'verbose_name_plural': '技巧记录',
+                'ordering': ['-trick_created_time', 'trick_title'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WebhookOutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('outbox_event', models.CharField(choices=[('task.created', '任务创建'), ('task.updated', '任务更新'), ('task.deleted', '任务删除'), ('comment.created', '新评论'), ('commit.created', '新提交记录')], max_length=32, verbose_name='事件类型')),
+                ('outbox_payload', models.JSONField(verbose_name='事件内容')),
+                ('outbox_created_time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='产生时间')),
+                ('outbox_attempts', models.PositiveIntegerField(default=0, verbose_name='投递次数')),
+                ('outbox_delivered_time', models.DateTimeField(blank=True, null=True, verbose_name='投递时间')),
+                ('outbox_webhook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbox_events', to='tasks.projectwebhook', verbose_name='Webhook')),
+            ],
+            options={
+                'verbose_name': 'Webhook 事件',
+                'verbose_name_plural': 'Webhook 事件',
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-project_priority_rank', '-project_created_time'], name='project_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectmodel',
+            index=models.Index(fields=['model_belongsto_project_id', '-model_priority_rank', '-model_created_time'], name='model_project_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectstatussnapshot',
+            index=models.Index(fields=['snapshot_belongsto_project_id', 'snapshot_date'], name='snapshot_project_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='projectstatussnapshot',
+            constraint=models.UniqueConstraint(fields=('snapshot_belongsto_model_id', 'snapshot_date', 'snapshot_task_status', 'snapshot_task_type', 'snapshot_task_priority'), name='unique_model_daily_snapshot'),
+        ),
+        migrations.AddConstraint(
+            model_name='savedtaskfilter',
+            constraint=models.UniqueConstraint(fields=('filter_owner', 'filter_name'), name='saved_filter_owner_name_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['task_assigned_to_user_id', 'task_status', 'task_priority'], name='task_workload_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['task_assigned_to_user_id', '-task_priority_rank', '-task_created_time'], name='task_assignee_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['task_belongsto_project_id', '-task_priority_rank', '-task_created_time'], name='task_project_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['task_assigned_to_user_id', 'task_status', 'task_board_position'], name='task_user_board_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['task_belongsto_project_id', 'task_status', 'task_board_position'], name='task_project_board_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(fields=('task_recurring_template', 'task_belongsto_model_id', 'task_occurrence_date'), name='task_occurrence_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationevent',
+            index=models.Index(condition=models.Q(('notification_sent_time__isnull', True)), fields=['notification_recipient', 'id'], name='notification_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskactivityrecord',
+            index=models.Index(fields=['activity_belongsto_task_id', '-id'], name='activity_task_timeline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskactivityrecord',
+            index=models.Index(fields=['activity_task_assignee', '-id'], name='activity_user_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='webhookoutboxevent',
+            index=models.Index(condition=models.Q(('outbox_delivered_time__isnull', True)), fields=['outbox_webhook', 'id'], name='webhook_outbox_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# 迁移中不引用模型模块的常量，保持迁移结果与代码演进无关
+PRIORITY_RANKS = {
+    'low': 1,
+    'medium': 2,
+    'high': 3,
+    'urgent': 4,
+}
+
+
+def backfill_priority_ranks(apps, schema_editor):
+    # 只更新排序值与优先级不一致的行
+    db_alias = schema_editor.connection.alias
+    for model_name, priority_field, rank_field in (
+        ('Project', 'project_priority', 'project_priority_rank'),
+        ('ProjectModel', 'model_priority', 'model_priority_rank'),
+        ('Task', 'task_priority', 'task_priority_rank'),
+    ):
+        model = apps.get_model('tasks', model_name)
+        for priority, rank in PRIORITY_RANKS.items():
+            (model.objects.using(db_alias)
+                .filter(**{priority_field: priority})
+                .exclude(**{rank_field: rank})
+                .update(**{rank_field: rank}))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_priority_ranks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count_subquery(model, fk_field):
+    counts = (model.objects.filter(**{fk_field: OuterRef('pk')})
+        .order_by().values(fk_field).annotate(total=Count('id')).values('total'))
+    return Coalesce(Subquery(counts), 0)
+
+
+def backfill_record_counts(apps, schema_editor):
+    # 校正评论数/提交记录数冗余字段
+    db_alias = schema_editor.connection.alias
+    Task = apps.get_model('tasks', 'Task')
+    TaskCommentRecord = apps.get_model('tasks', 'TaskCommentRecord')
+    TaskCommitRecord = apps.get_model('tasks', 'TaskCommitRecord')
+    Task.objects.using(db_alias).update(
+        task_comment_count=_count_subquery(TaskCommentRecord, 'comment_belongsto_task_id'),
+        task_commit_count=_count_subquery(TaskCommitRecord, 'commit_belongsto_task_id'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_backfill_priority_ranks'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_record_counts, migrations.RunPython.noop),
+    ]
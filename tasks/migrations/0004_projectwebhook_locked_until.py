@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_backfill_record_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectwebhook',
+            name='webhook_locked_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='投递租约到期时间'),
+        ),
+    ]
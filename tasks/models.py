@@ -1,8 +1,14 @@
-from django.db import models
+import secrets
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
 
+from .recurrence import parse_rrule
+from .rendering import RichText
+
 # Create your models here.
 
 PRIORITY_CHOICES = [
@@ -12,22 +18,86 @@ PRIORITY_CHOICES = [
     ('urgent', '紧急'),
 ]
 
+# 优先级的整数排序值：字符串排序会把 medium 排在 high 之前，排序和索引统一使用该值
+PRIORITY_RANKS = {
+    'low': 1,
+    'medium': 2,
+    'high': 3,
+    'urgent': 4,
+}
+
+
+def _with_dependent_fields(update_fields, source_field, dependent_fields):
+    # 使用 update_fields 局部保存源字段时，同时保存由它派生的冗余字段
+    if update_fields is not None and source_field in update_fields:
+        update_fields = set(update_fields) | set(dependent_fields)
+    return update_fields
+
+
+def _priority_rank(value):
+    # 字面值直接换算；表达式（如 F()）在数据库中按 CASE 换算
+    if isinstance(value, str):
+        return PRIORITY_RANKS.get(value, 0)
+    return models.Case(
+        *[models.When(models.lookups.Exact(value, priority), then=rank) for priority, rank in PRIORITY_RANKS.items()],
+        default=0,
+    )
+
+
+class PriorityRankQuerySet(models.QuerySet):
+    """
+    update() / bulk_update() 修改优先级时同步排序值，绕过 save() 的路径也不会让排序值与优先级不一致
+    模型通过 priority_rank_fields = (优先级字段, 排序值字段) 声明
+    """
+
+    def update(self, **kwargs):
+        priority_field, rank_field = self.model.priority_rank_fields
+        if priority_field in kwargs and rank_field not in kwargs:
+            kwargs[rank_field] = _priority_rank(kwargs[priority_field])
+        return super().update(**kwargs)
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        priority_field, rank_field = self.model.priority_rank_fields
+        if priority_field in fields and rank_field not in fields:
+            objs = list(objs)
+            for obj in objs:
+                setattr(obj, rank_field, PRIORITY_RANKS.get(getattr(obj, priority_field), 0))
+            fields = [*fields, rank_field]
+        return super().bulk_update(objs, fields, batch_size=batch_size)
+
+
+def default_board_position():
+    # 看板列内按位置升序排列；新任务取负的创建时间戳，默认排在列首
+    return -timezone.now().timestamp()
+
 # BCClub: 
 class Project(models.Model):
     project_name = models.CharField(max_length=100, unique=True, verbose_name="项目名称")
     project_description = models.TextField(blank=True, verbose_name="项目描述")
     project_priority = models.CharField(max_length=32, choices=PRIORITY_CHOICES, default='medium', verbose_name="项目优先级")
+    project_priority_rank = models.PositiveSmallIntegerField(default=PRIORITY_RANKS['medium'], editable=False, verbose_name="项目优先级排序值")
     project_creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_projects', null=True, blank=True, verbose_name="项目创建者")
     project_created_time = models.DateTimeField(auto_now_add=True, verbose_name="项目创建时间")
     project_updated_time = models.DateTimeField(auto_now=True, verbose_name="项目更新时间")
+
+    objects = PriorityRankQuerySet.as_manager()
+    priority_rank_fields = ('project_priority', 'project_priority_rank')
     
     class Meta:
         verbose_name = "项目"
         verbose_name_plural = "项目"
-        ordering = ['-project_priority', '-project_created_time', 'project_name']
+        ordering = ['-project_priority_rank', '-project_created_time', 'project_name']
+        indexes = [
+            models.Index(fields=['-project_priority_rank', '-project_created_time'], name='project_priority_idx'),
+        ]
         
     def __str__(self):
         return self.project_name
+
+    def save(self, *args, **kwargs):
+        self.project_priority_rank = PRIORITY_RANKS.get(self.project_priority, 0)
+        kwargs['update_fields'] = _with_dependent_fields(kwargs.get('update_fields'), 'project_priority', ['project_priority_rank'])
+        super().save(*args, **kwargs)
     
     def get_absolute_url(self):
         return reverse('tasks:project_detail', kwargs={'project_id': self.id})
@@ -36,20 +106,32 @@ class ProjectModel(models.Model):
     model_name = models.CharField(max_length=100, verbose_name="机型名称")
     model_description = models.TextField(blank=True, verbose_name="机型描述")
     model_priority = models.CharField(max_length=32, choices=PRIORITY_CHOICES, default='medium', verbose_name="机型优先级")
+    model_priority_rank = models.PositiveSmallIntegerField(default=PRIORITY_RANKS['medium'], editable=False, verbose_name="机型优先级排序值")
     model_creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_models', null=True, blank=True, verbose_name="机型创建者")
     model_created_time = models.DateTimeField(auto_now_add=True, verbose_name="机型创建时间")
     model_updated_time = models.DateTimeField(auto_now=True, verbose_name="机型更新时间")
     model_git_repository = models.URLField(blank=True, verbose_name="机型代码仓库")
     model_git_branch = models.CharField(max_length=100, blank=True, verbose_name="机型代码分支")
     model_belongsto_project_id = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='models', verbose_name="所属项目")
+
+    objects = PriorityRankQuerySet.as_manager()
+    priority_rank_fields = ('model_priority', 'model_priority_rank')
     
     class Meta:
         verbose_name = "机型"
         verbose_name_plural = "机型"
-        ordering = ['-model_priority', '-model_created_time', 'model_name', 'model_belongsto_project_id']
+        ordering = ['-model_priority_rank', '-model_created_time', 'model_name', 'model_belongsto_project_id']
+        indexes = [
+            models.Index(fields=['model_belongsto_project_id', '-model_priority_rank', '-model_created_time'], name='model_project_priority_idx'),
+        ]
         
     def __str__(self):
         return f"{self.model_name} ({self.model_belongsto_project_id.project_name})"
+
+    def save(self, *args, **kwargs):
+        self.model_priority_rank = PRIORITY_RANKS.get(self.model_priority, 0)
+        kwargs['update_fields'] = _with_dependent_fields(kwargs.get('update_fields'), 'model_priority', ['model_priority_rank'])
+        super().save(*args, **kwargs)
     
     def get_absolute_url(self):
         return reverse('tasks:model_detail', kwargs={'model_id': self.id})
@@ -73,10 +155,18 @@ class Task(models.Model):
         ('on_hold', '暂停'),
         ('cancelled', '已取消'),
     ]
+    # 结束状态：进入时记录结束时间
+    DONE_STATUSES = ('completed', 'cancelled')
+    # 由信号以 F() 原子递增维护的计数字段，完整保存时不写回实例中可能过期的值
+    COUNTER_FIELDS = ('task_comment_count', 'task_commit_count')
     
     task_title = models.CharField(max_length=100, verbose_name="任务标题")
     task_description = models.TextField(blank=True, verbose_name="任务描述")
+    task_description_html = models.TextField(blank=True, editable=False, verbose_name="任务描述（渲染结果）")
+    task_description_hash = models.CharField(max_length=40, blank=True, editable=False, verbose_name="任务描述内容哈希")
+    task_description_excerpt = models.CharField(max_length=200, blank=True, editable=False, verbose_name="任务描述摘要")
     task_priority = models.CharField(max_length=32, choices=PRIORITY_CHOICES, default='medium', verbose_name="任务优先级")
+    task_priority_rank = models.PositiveSmallIntegerField(default=PRIORITY_RANKS['medium'], editable=False, verbose_name="任务优先级排序值")
     task_creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_tasks', null=True, blank=True, verbose_name="任务创建者")
     task_created_time = models.DateTimeField(auto_now_add=True, verbose_name="任务创建时间")
     task_updated_time = models.DateTimeField(auto_now=True, verbose_name="任务更新时间")
@@ -89,18 +179,110 @@ class Task(models.Model):
     task_belongsto_model_id = models.ForeignKey(ProjectModel, on_delete=models.CASCADE, related_name='tasks', verbose_name="所属机型")
     task_source_task_id = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='sub_tasks', verbose_name="源任务ID")
     task_assigned_to_user_id = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_tasks', verbose_name="负责人")
+    # 冗余计数，由评论/提交记录的信号维护，展示总数时无需 COUNT(*)
+    task_comment_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="评论数")
+    task_commit_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="提交记录数")
+    # 看板列内的排序位置；拖动时取相邻两张卡片位置的中间值，无需重排整列
+    task_board_position = models.FloatField(default=default_board_position, editable=False, verbose_name="看板位置")
+    # 乐观锁版本号：每次保存递增，看板移动的条件 UPDATE 以此检测并发修改
+    task_version = models.PositiveIntegerField(default=0, editable=False, verbose_name="版本号")
+    # 由周期任务模板生成的任务：所属模板及对应的发生日期
+    task_recurring_template = models.ForeignKey('RecurringTaskTemplate', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='occurrences', verbose_name="周期任务模板")
+    task_occurrence_date = models.DateField(null=True, blank=True, editable=False, verbose_name="发生日期")
+
+    objects = PriorityRankQuerySet.as_manager()
+    priority_rank_fields = ('task_priority', 'task_priority_rank')
 
     class Meta:
         verbose_name = "任务"
         verbose_name_plural = "任务"
-        ordering = ['-task_priority', '-task_created_time', 'task_title', 'task_belongsto_model_id', 'task_status', 'task_deadline', 'task_assigned_to_user_id', 'task_type', 'task_creator']
+        ordering = ['-task_priority_rank', '-task_created_time', 'task_title', 'task_belongsto_model_id', 'task_status', 'task_deadline', 'task_assigned_to_user_id', 'task_type', 'task_creator']
+        indexes = [
+            # 团队负载统计的 GROUP BY 可直接走覆盖索引
+            models.Index(fields=['task_assigned_to_user_id', 'task_status', 'task_priority'], name='task_workload_idx'),
+            # “优先级最高的在前”的列表直接按索引顺序读取
+            models.Index(fields=['task_assigned_to_user_id', '-task_priority_rank', '-task_created_time'], name='task_assignee_priority_idx'),
+            models.Index(fields=['task_belongsto_project_id', '-task_priority_rank', '-task_created_time'], name='task_project_priority_idx'),
+            # 看板每一列按 (负责人|项目, 状态, 位置) 顺序读取
+            models.Index(fields=['task_assigned_to_user_id', 'task_status', 'task_board_position'], name='task_user_board_idx'),
+            models.Index(fields=['task_belongsto_project_id', 'task_status', 'task_board_position'], name='task_project_board_idx'),
+        ]
+        constraints = [
+            # 同一模板在同一机型、同一天只生成一个任务，重复运行生成器不会产生重复任务
+            models.UniqueConstraint(fields=['task_recurring_template', 'task_belongsto_model_id', 'task_occurrence_date'], name='task_occurrence_uniq'),
+        ]
         
     def __str__(self):
         return f"{self.task_title} ({self.task_belongsto_model_id.model_name})"
     
     def get_absolute_url(self):
         return reverse('tasks:task_detail', kwargs={'task_id': self.id})
+
+    # 任务描述保持纯文本展示，预先渲染为转义后的 HTML
+    rich_text_fields = [RichText('task_description', kind='plain')]
+
+    def sync_denormalized_fields(self):
+        # 同步冗余字段；bulk_create 等绕过 save() 的路径需手动调用
+        self.task_priority_rank = PRIORITY_RANKS.get(self.task_priority, 0)
+        for rich_text in self.rich_text_fields:
+            rich_text.refresh(self)
+        # 新建任务或状态发生变化时同步开始/结束时间（未加载原状态时不做判断）
+        loaded = getattr(self, '_loaded_values', None) or {}
+        if self._state.adding or loaded.get('task_status', self.task_status) != self.task_status:
+            for field, value in self.status_time_changes(self.task_status).items():
+                setattr(self, field, value)
+
+    def save(self, *args, **kwargs):
+        self.sync_denormalized_fields()
+        update_fields = _with_dependent_fields(kwargs.get('update_fields'), 'task_priority', ['task_priority_rank'])
+        update_fields = _with_dependent_fields(update_fields, 'task_status', ['task_start_time', 'task_end_time'])
+        for rich_text in self.rich_text_fields:
+            update_fields = _with_dependent_fields(update_fields, rich_text.source, rich_text.rendered_fields)
+        bump_version = not self._state.adding
+        if bump_version and update_fields is None:
+            # 与 Django 对延迟加载实例的处理一致：只保存已加载的字段
+            deferred = self.get_deferred_fields()
+            update_fields = {
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS and field.attname not in deferred
+            }
+        if bump_version:
+            # 本地递增版本号随本次 UPDATE 写入，post_save 和调用方拿到的就是保存后的值，无需再查询
+            self.task_version += 1
+            update_fields = set(update_fields) | {'task_version'}
+        kwargs['update_fields'] = update_fields
+        # post_save 信号中写入的 Webhook 发件箱记录与任务变更在同一个事务中提交
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except BaseException:
+            if bump_version:
+                self.task_version -= 1
+            raise
+
+    def status_time_changes(self, new_status, now=None):
+        """
+        状态变化时需要同步的开始/结束时间：首次进入进行中记录开始时间，完成或取消记录结束时间，
+        重新打开已结束的任务时清除结束时间（再次完成时重新记录）
+        """
+        now = now or timezone.now()
+        changes = {}
+        if new_status == 'in_progress' and self.task_start_time is None:
+            changes['task_start_time'] = now
+        if new_status in self.DONE_STATUSES:
+            if self.task_end_time is None:
+                changes['task_end_time'] = now
+        elif self.task_end_time is not None:
+            changes['task_end_time'] = None
+        return changes
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录从数据库加载时的字段值，用于保存时计算字段级变更
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def is_overdue(self):
         if self.task_deadline and self.task_status != 'completed':
             return timezone.now() > self.task_deadline
@@ -123,9 +305,16 @@ class TaskCommitRecord(models.Model):
         
     def __str__(self):
         return f"Commit {self.commit_git_hash} for Task {self.commit_belongsto_task_id.task_title}"
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
 class TaskCommentRecord(models.Model):
     comment_content = models.TextField(verbose_name="评论内容")
+    comment_content_html = models.TextField(blank=True, editable=False, verbose_name="评论内容（渲染结果）")
+    comment_content_hash = models.CharField(max_length=40, blank=True, editable=False, verbose_name="评论内容哈希")
+    comment_content_excerpt = models.CharField(max_length=200, blank=True, editable=False, verbose_name="评论摘要")
     comment_creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_comments', null=True, blank=True, verbose_name="评论创建者")
     comment_created_time = models.DateTimeField(auto_now_add=True, verbose_name="评论创建时间")
     comment_updated_time = models.DateTimeField(auto_now=True, verbose_name="评论更新时间")
@@ -139,9 +328,27 @@ class TaskCommentRecord(models.Model):
     def __str__(self):
         return f"Comment by {self.comment_creator} on Task {self.comment_belongsto_task_id.task_title}"
 
+    rich_text_fields = [RichText('comment_content')]
+
+    def sync_denormalized_fields(self):
+        for rich_text in self.rich_text_fields:
+            rich_text.refresh(self)
+
+    def save(self, *args, **kwargs):
+        self.sync_denormalized_fields()
+        update_fields = kwargs.get('update_fields')
+        for rich_text in self.rich_text_fields:
+            update_fields = _with_dependent_fields(update_fields, rich_text.source, rich_text.rendered_fields)
+        kwargs['update_fields'] = update_fields
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 class TrickRecord(models.Model):
     trick_title = models.CharField(max_length=100, verbose_name="技巧标题")
     trick_content = models.TextField(blank=True, verbose_name="技巧内容")
+    trick_content_html = models.TextField(blank=True, editable=False, verbose_name="技巧内容（渲染结果）")
+    trick_content_hash = models.CharField(max_length=40, blank=True, editable=False, verbose_name="技巧内容哈希")
+    trick_content_excerpt = models.CharField(max_length=200, blank=True, editable=False, verbose_name="技巧摘要")
     trick_creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_tricks', null=True, blank=True, verbose_name="技巧创建者")
     trick_created_time = models.DateTimeField(auto_now_add=True, verbose_name="技巧创建时间")
     trick_updated_time = models.DateTimeField(auto_now=True, verbose_name="技巧更新时间")
@@ -155,4 +362,267 @@ class TrickRecord(models.Model):
         return self.trick_title
     
     def get_absolute_url(self):
-        return reverse('tasks:trick_detail', kwargs={'trick_id': self.id})
\ No newline at end of file
+        return reverse('tasks:trick_detail', kwargs={'trick_id': self.id})
+
+    rich_text_fields = [RichText('trick_content')]
+
+    def sync_denormalized_fields(self):
+        for rich_text in self.rich_text_fields:
+            rich_text.refresh(self)
+
+    def save(self, *args, **kwargs):
+        self.sync_denormalized_fields()
+        update_fields = kwargs.get('update_fields')
+        for rich_text in self.rich_text_fields:
+            update_fields = _with_dependent_fields(update_fields, rich_text.source, rich_text.rendered_fields)
+        kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+class TaskActivityRecord(models.Model):
+    ACTIVITY_ACTION_CHOICES = [
+        ('created', '创建任务'),
+        ('updated', '更新字段'),
+        ('deleted', '删除任务'),
+        ('comment_added', '添加评论'),
+        ('commit_added', '添加提交记录'),
+    ]
+
+    activity_action = models.CharField(max_length=32, choices=ACTIVITY_ACTION_CHOICES, verbose_name="动作")
+    activity_field = models.CharField(max_length=64, blank=True, verbose_name="变更字段")
+    activity_old_value = models.CharField(max_length=255, blank=True, verbose_name="原值")
+    activity_new_value = models.CharField(max_length=255, blank=True, verbose_name="新值")
+    activity_task_title = models.CharField(max_length=100, verbose_name="任务标题")
+    activity_actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='task_activities', verbose_name="操作人")
+    activity_created_time = models.DateTimeField(default=timezone.now, verbose_name="操作时间")
+    # 日志只追加不删除：任务删除后仍保留记录，因此不建立数据库外键约束
+    activity_belongsto_task_id = models.ForeignKey(Task, on_delete=models.DO_NOTHING, db_constraint=False, related_name='activities', verbose_name="所属任务")
+    activity_task_assignee = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+', verbose_name="任务负责人")
+
+    class Meta:
+        verbose_name = "任务动态"
+        verbose_name_plural = "任务动态"
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['activity_belongsto_task_id', '-id'], name='activity_task_timeline_idx'),
+            models.Index(fields=['activity_task_assignee', '-id'], name='activity_user_feed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_activity_action_display()} {self.activity_field} on Task {self.activity_task_title}"
+
+
+class ProjectStatusSnapshot(models.Model):
+    # 每日快照：某机型下按 状态 × 类型 × 优先级 统计的任务数，项目级数据按机型汇总
+    snapshot_date = models.DateField(verbose_name="快照日期")
+    snapshot_belongsto_project_id = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='status_snapshots', verbose_name="所属项目")
+    snapshot_belongsto_model_id = models.ForeignKey(ProjectModel, on_delete=models.CASCADE, related_name='status_snapshots', verbose_name="所属机型")
+    snapshot_task_status = models.CharField(max_length=32, choices=Task.TASK_STATUS_CHOICES, verbose_name="任务状态")
+    snapshot_task_type = models.CharField(max_length=32, choices=Task.TASK_TYPE_CHOICES, verbose_name="任务类型")
+    snapshot_task_priority = models.CharField(max_length=32, choices=PRIORITY_CHOICES, verbose_name="任务优先级")
+    snapshot_task_count = models.PositiveIntegerField(default=0, verbose_name="任务数")
+
+    class Meta:
+        verbose_name = "任务状态快照"
+        verbose_name_plural = "任务状态快照"
+        ordering = ['snapshot_date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['snapshot_belongsto_model_id', 'snapshot_date', 'snapshot_task_status', 'snapshot_task_type', 'snapshot_task_priority'],
+                name='unique_model_daily_snapshot',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['snapshot_belongsto_project_id', 'snapshot_date'], name='snapshot_project_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.snapshot_date} {self.snapshot_belongsto_model_id_id} {self.snapshot_task_status}: {self.snapshot_task_count}"
+
+
+class SavedTaskFilter(models.Model):
+    # 用户保存的任务列表筛选条件，与 task_list 的查询参数一一对应
+    filter_name = models.CharField(max_length=50, verbose_name="筛选名称")
+    filter_owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_task_filters', verbose_name="所属用户")
+    filter_task_status = models.CharField(max_length=32, blank=True, choices=Task.TASK_STATUS_CHOICES, verbose_name="任务状态")
+    filter_belongsto_project_id = models.ForeignKey(Project, on_delete=models.CASCADE, null=True, blank=True, related_name='+', verbose_name="所属项目")
+    filter_belongsto_model_id = models.ForeignKey(ProjectModel, on_delete=models.CASCADE, null=True, blank=True, related_name='+', verbose_name="所属机型")
+    filter_query = models.CharField(max_length=100, blank=True, verbose_name="搜索关键字")
+    filter_created_time = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+
+    class Meta:
+        verbose_name = "保存的筛选"
+        verbose_name_plural = "保存的筛选"
+        ordering = ['filter_name', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['filter_owner', 'filter_name'], name='saved_filter_owner_name_uniq'),
+        ]
+
+    def __str__(self):
+        return self.filter_name
+
+    def get_absolute_url(self):
+        return f"{reverse('tasks:task_list')}?filter={self.id}"
+
+    @property
+    def params(self):
+        """转换为 task_list 的查询参数"""
+        return {
+            'task_status': self.filter_task_status,
+            'project_id': self.filter_belongsto_project_id_id,
+            'model_id': self.filter_belongsto_model_id_id,
+            'q': self.filter_query,
+        }
+
+
+class NotificationEvent(models.Model):
+    # 待发送的通知事件：请求中随任务动态一起批量写入，由后台任务按收件人合并为摘要邮件
+    NOTIFICATION_KIND_CHOICES = [
+        ('assigned', '任务分配'),
+        ('status_changed', '状态变更'),
+        ('comment_added', '新评论'),
+    ]
+
+    notification_kind = models.CharField(max_length=32, choices=NOTIFICATION_KIND_CHOICES, verbose_name="通知类型")
+    notification_recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications', verbose_name="接收人")
+    notification_actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="操作人")
+    # 与任务动态相同，任务删除后仍可发送已产生的通知，不建立数据库外键约束
+    notification_belongsto_task_id = models.ForeignKey(Task, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+', verbose_name="所属任务")
+    notification_task_title = models.CharField(max_length=100, verbose_name="任务标题")
+    notification_old_value = models.CharField(max_length=255, blank=True, verbose_name="原值")
+    notification_new_value = models.CharField(max_length=255, blank=True, verbose_name="新值")
+    notification_created_time = models.DateTimeField(default=timezone.now, verbose_name="产生时间")
+    notification_sent_time = models.DateTimeField(null=True, blank=True, verbose_name="发送时间")
+
+    class Meta:
+        verbose_name = "通知事件"
+        verbose_name_plural = "通知事件"
+        ordering = ['-id']
+        indexes = [
+            # 后台任务只扫描未发送的事件
+            models.Index(
+                fields=['notification_recipient', 'id'],
+                condition=models.Q(notification_sent_time__isnull=True),
+                name='notification_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_notification_kind_display()} -> {self.notification_recipient_id}: {self.notification_task_title}"
+
+
+def validate_rrule(value):
+    try:
+        parse_rrule(value)
+    except ValueError as exc:
+        raise ValidationError(str(exc))
+
+
+class RecurringTaskTemplate(models.Model):
+    # 周期任务模板：按 RRULE 规则为项目下的所有机型（或指定机型）定期生成任务
+    template_title = models.CharField(max_length=80, verbose_name="任务标题")
+    template_description = models.TextField(blank=True, verbose_name="任务描述")
+    template_type = models.CharField(max_length=32, choices=Task.TASK_TYPE_CHOICES, default='testing', verbose_name="任务类型")
+    template_priority = models.CharField(max_length=32, choices=PRIORITY_CHOICES, default='medium', verbose_name="任务优先级")
+    template_rrule = models.CharField(max_length=200, validators=[validate_rrule], help_text="例如 FREQ=WEEKLY;INTERVAL=2;BYDAY=MO", verbose_name="重复规则")
+    template_start_date = models.DateField(verbose_name="开始日期")
+    template_end_date = models.DateField(null=True, blank=True, verbose_name="结束日期")
+    template_deadline_days = models.PositiveSmallIntegerField(null=True, blank=True, help_text="发生日期之后多少天截止，留空表示无截止时间", verbose_name="截止天数")
+    template_is_active = models.BooleanField(default=True, verbose_name="是否启用")
+    template_creator = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='created_task_templates', verbose_name="模板创建者")
+    template_assigned_to_user_id = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_task_templates', verbose_name="负责人")
+    template_belongsto_project_id = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='task_templates', verbose_name="所属项目")
+    # 留空时为项目下的每个机型各生成一个任务
+    template_belongsto_model_id = models.ForeignKey(ProjectModel, on_delete=models.CASCADE, null=True, blank=True, related_name='task_templates', verbose_name="所属机型")
+    # 水位线：已生成到的日期，下次从其后一天继续
+    template_materialized_until = models.DateField(null=True, blank=True, editable=False, verbose_name="已生成至")
+    template_created_time = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+    template_updated_time = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+
+    class Meta:
+        verbose_name = "周期任务模板"
+        verbose_name_plural = "周期任务模板"
+        ordering = ['template_belongsto_project_id', 'template_title']
+
+    def __str__(self):
+        return self.template_title
+
+
+WEBHOOK_EVENT_CHOICES = [
+    ('task.created', '任务创建'),
+    ('task.updated', '任务更新'),
+    ('task.deleted', '任务删除'),
+    ('comment.created', '新评论'),
+    ('commit.created', '新提交记录'),
+]
+
+
+def generate_webhook_secret():
+    return secrets.token_hex(20)
+
+
+def validate_webhook_events(value):
+    valid = {event for event, _ in WEBHOOK_EVENT_CHOICES}
+    unknown = [event for event in (item.strip() for item in value.split(',')) if event and event not in valid]
+    if unknown:
+        raise ValidationError(f"未知的事件类型: {', '.join(unknown)}")
+
+
+class ProjectWebhook(models.Model):
+    # 项目的出站 Webhook：任务、评论、提交记录变更时把事件推送给其他内部系统
+    webhook_name = models.CharField(max_length=100, verbose_name="名称")
+    webhook_url = models.URLField(max_length=500, verbose_name="推送地址")
+    # 用于 HMAC-SHA256 签名，接收方据此校验请求来源
+    webhook_secret = models.CharField(max_length=64, default=generate_webhook_secret, verbose_name="签名密钥")
+    webhook_events = models.CharField(
+        max_length=255, blank=True, validators=[validate_webhook_events],
+        help_text="逗号分隔，例如 task.created,comment.created；留空表示全部事件", verbose_name="订阅事件",
+    )
+    webhook_is_active = models.BooleanField(default=True, verbose_name="是否启用")
+    webhook_belongsto_project_id = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='webhooks', verbose_name="所属项目")
+    webhook_creator = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='created_webhooks', verbose_name="创建者")
+    webhook_created_time = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+    # 投递状态：连续失败次数决定下次重试时间（指数退避）
+    webhook_failure_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="连续失败次数")
+    webhook_next_attempt_time = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="下次重试时间")
+    webhook_last_error = models.CharField(max_length=255, blank=True, editable=False, verbose_name="最近错误")
+    webhook_last_delivery_time = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="最近成功投递时间")
+    # 投递租约：worker 用条件 UPDATE 认领后在此时间前独占投递，进程异常退出时租约到期后自动释放
+    webhook_locked_until = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="投递租约到期时间")
+
+    class Meta:
+        verbose_name = "项目 Webhook"
+        verbose_name_plural = "项目 Webhook"
+        ordering = ['webhook_belongsto_project_id', 'webhook_name']
+
+    def __str__(self):
+        return self.webhook_name
+
+    @property
+    def event_list(self):
+        return [event.strip() for event in self.webhook_events.split(',') if event.strip()]
+
+
+class WebhookOutboxEvent(models.Model):
+    # 发件箱：与业务变更在同一事务中写入，由 send_webhooks 后台任务按顺序批量投递
+    outbox_webhook = models.ForeignKey(ProjectWebhook, on_delete=models.CASCADE, related_name='outbox_events', verbose_name="Webhook")
+    outbox_event = models.CharField(max_length=32, choices=WEBHOOK_EVENT_CHOICES, verbose_name="事件类型")
+    outbox_payload = models.JSONField(verbose_name="事件内容")
+    outbox_created_time = models.DateTimeField(default=timezone.now, verbose_name="产生时间")
+    outbox_attempts = models.PositiveIntegerField(default=0, verbose_name="投递次数")
+    outbox_delivered_time = models.DateTimeField(null=True, blank=True, verbose_name="投递时间")
+
+    class Meta:
+        verbose_name = "Webhook 事件"
+        verbose_name_plural = "Webhook 事件"
+        ordering = ['-id']
+        indexes = [
+            # 后台任务按 Webhook 顺序读取未投递的事件
+            models.Index(
+                fields=['outbox_webhook', 'id'],
+                condition=models.Q(outbox_delivered_time__isnull=True),
+                name='webhook_outbox_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.outbox_event} -> {self.outbox_webhook_id}"
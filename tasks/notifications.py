@@ -0,0 +1,166 @@
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Min
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import NotificationEvent, Task
+
+DEFAULT_DIGEST_WINDOW = 300
+DEFAULT_BATCH_SIZE = 200
+
+_STATUS_LABELS = dict(Task.TASK_STATUS_CHOICES)
+
+
+def _event(kind, recipient_id, task, actor_id, old_value='', new_value=''):
+    return NotificationEvent(
+        notification_kind=kind,
+        notification_recipient_id=recipient_id,
+        notification_actor_id=actor_id,
+        notification_belongsto_task_id_id=task.pk,
+        notification_task_title=task.task_title[:100],
+        notification_old_value=old_value,
+        notification_new_value=new_value,
+    )
+
+
+def _recipients(actor_id, *user_ids):
+    # 去重，且不通知操作人自己
+    return [uid for uid in OrderedDict.fromkeys(user_ids) if uid and uid != actor_id]
+
+
+def task_field_notifications(task, name, old_value, new_value, actor_id):
+    """任务字段变更产生的通知：分配通知新负责人，状态变更通知负责人和创建者"""
+    if name == 'task_assigned_to_user_id':
+        return [_event('assigned', uid, task, actor_id) for uid in _recipients(actor_id, new_value)]
+    if name == 'task_status':
+        return [
+            _event('status_changed', uid, task, actor_id, old_value or '', new_value or '')
+            for uid in _recipients(actor_id, task.task_assigned_to_user_id_id, task.task_creator_id)
+        ]
+    return []
+
+
+def task_created_notifications(task, actor_id):
+    return task_field_notifications(task, 'task_assigned_to_user_id', None, task.task_assigned_to_user_id_id, actor_id)
+
+
+def comment_notifications(comment, actor_id):
+    task = comment.comment_belongsto_task_id
+    return [
+        _event('comment_added', uid, task, actor_id, new_value=comment.comment_content_excerpt[:255])
+        for uid in _recipients(actor_id, task.task_assigned_to_user_id_id, task.task_creator_id)
+    ]
+
+
+def _digest_items(events, tasks):
+    """
+    按任务合并同一收件人的事件：
+    - 多次状态变更合并为 最初状态 → 最终状态，来回改动后状态未变则不再提示
+    - 任务已删除或已改派给他人时，丢弃分配通知
+    """
+    by_task = OrderedDict()
+    for event in events:
+        by_task.setdefault(event.notification_belongsto_task_id_id, []).append(event)
+
+    items = []
+    for task_id, task_events in by_task.items():
+        task = tasks.get(task_id)
+        recipient_id = task_events[0].notification_recipient_id
+        lines = []
+        if any(e.notification_kind == 'assigned' for e in task_events):
+            if task is not None and task.task_assigned_to_user_id_id == recipient_id:
+                lines.append('任务已分配给您')
+        status_events = [e for e in task_events if e.notification_kind == 'status_changed']
+        if status_events:
+            old_status = status_events[0].notification_old_value
+            new_status = status_events[-1].notification_new_value
+            if old_status != new_status:
+                lines.append(f'状态：{_STATUS_LABELS.get(old_status, old_status)} → {_STATUS_LABELS.get(new_status, new_status)}')
+        comments = [e.notification_new_value for e in task_events if e.notification_kind == 'comment_added']
+        if comments:
+            lines.append(f'{len(comments)} 条新评论，最新：{comments[-1]}')
+        if lines:
+            items.append({
+                'title': task.task_title if task is not None else task_events[-1].notification_task_title,
+                'url': f"{settings.TASK_NOTIFICATION_BASE_URL.rstrip('/')}{task.get_absolute_url()}" if task is not None else '',
+                'deleted': task is None,
+                'lines': lines,
+            })
+    return items
+
+
+def _build_message(user, items, connection):
+    context = {'user': user, 'items': items}
+    return EmailMessage(
+        subject=f'[任务管理] 您有 {len(items)} 个任务有新动态',
+        body=render_to_string('tasks/email/notification_digest.txt', context),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+        connection=connection,
+    )
+
+
+def deliver_digests(now=None, window=None, batch_size=None):
+    """
+    发送通知摘要，返回 (发送邮件数, 处理事件数)
+    - 只处理最早一条未发送事件已超过合并窗口的收件人，窗口内的后续事件一并合并发送
+    - 每批最多 batch_size 个收件人：事件、用户、任务各一次批量查询，邮件通过同一连接批量发送
+    """
+    now = now or timezone.now()
+    if window is None:
+        window = getattr(settings, 'TASK_NOTIFICATION_DIGEST_WINDOW', DEFAULT_DIGEST_WINDOW)
+    batch_size = batch_size or getattr(settings, 'TASK_NOTIFICATION_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    cutoff = now - timedelta(seconds=window)
+    pending = NotificationEvent.objects.filter(notification_sent_time__isnull=True)
+
+    connection = get_connection()
+    connection.open()
+    try:
+        sent_messages, processed = _deliver_batches(pending, cutoff, now, batch_size, connection)
+    finally:
+        connection.close()
+    return sent_messages, processed
+
+
+def _deliver_batches(pending, cutoff, now, batch_size, connection):
+    sent_messages = processed = 0
+    while True:
+        recipient_ids = list(
+            pending.values('notification_recipient')
+            .annotate(first_created=Min('notification_created_time'))
+            .filter(first_created__lte=cutoff)
+            .order_by('first_created')
+            .values_list('notification_recipient', flat=True)[:batch_size]
+        )
+        if not recipient_ids:
+            break
+
+        events = list(pending.filter(notification_recipient__in=recipient_ids, notification_created_time__lte=now).order_by('id'))
+        users = User.objects.in_bulk(recipient_ids)
+        tasks = Task.objects.only(
+            'id', 'task_title', 'task_assigned_to_user_id',
+        ).in_bulk({event.notification_belongsto_task_id_id for event in events})
+
+        events_by_user = OrderedDict((uid, []) for uid in recipient_ids)
+        for event in events:
+            events_by_user[event.notification_recipient_id].append(event)
+
+        messages = []
+        for uid, user_events in events_by_user.items():
+            user = users.get(uid)
+            if user is None or not user.email or not user.is_active:
+                continue
+            items = _digest_items(user_events, tasks)
+            if items:
+                messages.append(_build_message(user, items, connection))
+
+        if messages:
+            sent_messages += connection.send_messages(messages) or 0
+        NotificationEvent.objects.filter(id__in=[event.id for event in events]).update(notification_sent_time=now)
+        processed += len(events)
+    return sent_messages, processed
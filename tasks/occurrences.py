@@ -0,0 +1,128 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .activity import record_tasks_created
+from .caching import bump_task_cache_version
+from .models import ProjectModel, RecurringTaskTemplate, Task
+from .recurrence import iter_occurrences, parse_rrule
+
+DEFAULT_HORIZON_DAYS = 90
+
+
+def _deadline(template, occurrence):
+    if template.template_deadline_days is None:
+        return None
+    day = occurrence + timedelta(days=template.template_deadline_days)
+    return timezone.make_aware(datetime.combine(day, time(23, 59, 59)))
+
+
+def _rendered_fields(template):
+    # 同一模板的描述相同，只渲染一次，生成的任务直接复用渲染结果
+    prototype = Task(task_description=template.template_description)
+    prototype.sync_denormalized_fields()
+    return {
+        field: getattr(prototype, field)
+        for rich_text in Task.rich_text_fields for field in rich_text.rendered_fields
+    }
+
+
+def _build_task(template, model_id, occurrence, rendered):
+    task = Task(
+        task_title=f'{template.template_title} {occurrence:%Y-%m-%d}',
+        task_description=template.template_description,
+        task_type=template.template_type,
+        task_priority=template.template_priority,
+        task_deadline=_deadline(template, occurrence),
+        task_creator_id=template.template_creator_id,
+        task_assigned_to_user_id_id=template.template_assigned_to_user_id_id,
+        task_belongsto_project_id_id=template.template_belongsto_project_id_id,
+        task_belongsto_model_id_id=model_id,
+        task_recurring_template=template,
+        task_occurrence_date=occurrence,
+        **rendered,
+    )
+    # bulk_create 不调用 save()，手动同步优先级排序值；描述哈希一致，不会重复渲染
+    task.sync_denormalized_fields()
+    return task
+
+
+def _occurrence_key(task):
+    return task.task_recurring_template_id, task.task_belongsto_model_id_id, task.task_occurrence_date
+
+
+def materialize_occurrences(today=None, horizon_days=None, templates=None):
+    """
+    为启用的周期任务模板生成截至 today + horizon_days 的任务，返回 (新建任务数, 处理的模板数)
+    - 每个模板从水位线（已生成至）的后一天继续，只生成新的发生日期
+    - 项目下还没有机型时不推进水位线，之后新增机型时仍从原水位线生成；已有机型后再新增的机型只从水位线之后生成
+    - 所有任务一次 bulk_create(ignore_conflicts=True)，(模板, 机型, 日期) 唯一约束保证重复运行幂等
+    """
+    today = today or timezone.localdate()
+    if horizon_days is None:
+        horizon_days = getattr(settings, 'TASK_RECURRENCE_HORIZON_DAYS', DEFAULT_HORIZON_DAYS)
+    horizon = today + timedelta(days=horizon_days)
+
+    if templates is None:
+        templates = RecurringTaskTemplate.objects.filter(template_is_active=True)
+    templates = list(templates)
+
+    # 未指定机型的模板展开到项目下的所有机型，一次查询
+    project_ids = {t.template_belongsto_project_id_id for t in templates if t.template_belongsto_model_id_id is None}
+    project_models = {}
+    for model_id, project_id in ProjectModel.objects.filter(model_belongsto_project_id__in=project_ids).values_list('id', 'model_belongsto_project_id'):
+        project_models.setdefault(project_id, []).append(model_id)
+
+    new_tasks = []
+    touched = []
+    window = Q()
+    for template in templates:
+        start = template.template_start_date
+        if template.template_materialized_until:
+            start = max(start, template.template_materialized_until + timedelta(days=1))
+        end = min(horizon, template.template_end_date) if template.template_end_date else horizon
+        if start > end:
+            continue
+        if template.template_belongsto_model_id_id:
+            model_ids = [template.template_belongsto_model_id_id]
+        else:
+            model_ids = project_models.get(template.template_belongsto_project_id_id, [])
+        if not model_ids:
+            continue
+        rule = parse_rrule(template.template_rrule)
+        rendered = _rendered_fields(template)
+        for occurrence in iter_occurrences(rule, template.template_start_date, start, end):
+            new_tasks.extend(_build_task(template, model_id, occurrence, rendered) for model_id in model_ids)
+        template.template_materialized_until = end
+        touched.append(template)
+        window |= Q(task_recurring_template=template, task_occurrence_date__gte=start, task_occurrence_date__lte=end)
+
+    if not touched:
+        return 0, 0
+
+    created = []
+    with transaction.atomic():
+        # 锁定模板，同一模板的并发运行串行执行，已存在集合在插入前不会过期
+        list(RecurringTaskTemplate.objects.select_for_update().filter(pk__in=[t.pk for t in touched]).values_list('pk', flat=True))
+        if new_tasks:
+            # ignore_conflicts 时不回填主键：先记下窗口内已存在的 (模板, 机型, 日期)，插入后按唯一键查回本次新建的任务
+            windowed = Task.objects.filter(window).order_by()
+            existing = set(windowed.values_list('task_recurring_template', 'task_belongsto_model_id', 'task_occurrence_date'))
+            new_tasks = [task for task in new_tasks if _occurrence_key(task) not in existing]
+            Task.objects.bulk_create(new_tasks, batch_size=500, ignore_conflicts=True)
+            inserted = {_occurrence_key(task) for task in new_tasks}
+            created = [
+                task for task in windowed.only(
+                    'id', 'task_title', 'task_description_excerpt', 'task_status', 'task_type', 'task_priority', 'task_creator', 'task_assigned_to_user_id',
+                    'task_belongsto_project_id', 'task_belongsto_model_id', 'task_recurring_template', 'task_occurrence_date',
+                )
+                if _occurrence_key(task) in inserted
+            ]
+        RecurringTaskTemplate.objects.bulk_update(touched, ['template_materialized_until'], batch_size=500)
+        record_tasks_created(created)
+    if created:
+        bump_task_cache_version()
+    return len(created), len(touched)
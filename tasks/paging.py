@@ -0,0 +1,60 @@
+from django.db.models import Q
+
+
+def parse_cursor(value):
+    """解析游标参数，非法值按首页处理"""
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor > 0 else None
+
+
+def cursor_paginate(queryset, cursor=None, limit=20):
+    """
+    按主键倒序的游标分页
+    - cursor 为上一页最后一条记录的 id，只取比它更早的记录
+    - 多取一条用于判断是否还有下一页，避免额外的 COUNT(*)
+    返回 (记录列表, 下一页游标或 None)
+    """
+    queryset = queryset.order_by('-id')
+    if cursor:
+        queryset = queryset.filter(id__lt=cursor)
+    items = list(queryset[:limit + 1])
+    if len(items) > limit:
+        items = items[:limit]
+        return items, items[-1].id
+    return items, None
+
+
+def parse_position_cursor(value):
+    """解析 “位置_id” 形式的游标，非法值按首页处理"""
+    if not value:
+        return None
+    position, _, pk = str(value).rpartition('_')
+    try:
+        position, pk = float(position), int(pk)
+    except ValueError:
+        return None
+    if position != position or pk <= 0:  # NaN
+        return None
+    return position, pk
+
+
+def position_paginate(queryset, field, cursor=None, limit=20):
+    """
+    按 (field 升序, id 倒序) 的游标分页，用于看板等按位置排列的列表
+    - cursor 为 parse_position_cursor 的返回值，即上一页最后一条记录的 (位置, id)
+    - 同样多取一条判断是否还有下一页
+    返回 (记录列表, 下一页游标字符串或 None)
+    """
+    queryset = queryset.order_by(field, '-id')
+    if cursor:
+        position, pk = cursor
+        queryset = queryset.filter(Q(**{f'{field}__gt': position}) | Q(**{field: position, 'id__lt': pk}))
+    items = list(queryset[:limit + 1])
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        return items, f'{getattr(last, field)!r}_{last.id}'
+    return items, None
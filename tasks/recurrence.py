@@ -0,0 +1,117 @@
+import calendar
+from datetime import date, timedelta
+
+WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY')
+
+
+def parse_rrule(value):
+    """
+    解析 RRULE 子集，例如 FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH
+    支持 FREQ（DAILY/WEEKLY/MONTHLY）、INTERVAL、BYDAY、BYMONTHDAY、COUNT、UNTIL（YYYYMMDD）
+    规则无效时抛出 ValueError
+    """
+    parts = {}
+    for item in (value or '').strip().upper().removeprefix('RRULE:').split(';'):
+        if not item:
+            continue
+        key, sep, val = item.partition('=')
+        if not sep or not val:
+            raise ValueError(f'无法解析的规则片段: {item}')
+        parts[key.strip()] = val.strip()
+
+    freq = parts.pop('FREQ', None)
+    if freq not in FREQUENCIES:
+        raise ValueError('FREQ 必须为 DAILY、WEEKLY 或 MONTHLY')
+    rule = {'freq': freq, 'interval': 1, 'byday': None, 'bymonthday': None, 'count': None, 'until': None}
+    try:
+        if 'INTERVAL' in parts:
+            rule['interval'] = int(parts.pop('INTERVAL'))
+            if rule['interval'] < 1:
+                raise ValueError('INTERVAL 必须为正整数')
+        if 'BYDAY' in parts:
+            days = parts.pop('BYDAY').split(',')
+            if any(day not in WEEKDAYS for day in days):
+                raise ValueError('BYDAY 只支持 MO,TU,WE,TH,FR,SA,SU')
+            rule['byday'] = sorted({WEEKDAYS.index(day) for day in days})
+        if 'BYMONTHDAY' in parts:
+            monthdays = [int(day) for day in parts.pop('BYMONTHDAY').split(',')]
+            if any(day == 0 or not -31 <= day <= 31 for day in monthdays):
+                raise ValueError('BYMONTHDAY 必须在 1..31 或 -31..-1 之间')
+            rule['bymonthday'] = monthdays
+        if 'COUNT' in parts:
+            rule['count'] = int(parts.pop('COUNT'))
+            if rule['count'] < 1:
+                raise ValueError('COUNT 必须为正整数')
+        if 'UNTIL' in parts:
+            until = parts.pop('UNTIL')[:8]
+            rule['until'] = date(int(until[:4]), int(until[4:6]), int(until[6:8]))
+    except (TypeError, IndexError) as exc:
+        raise ValueError(f'规则参数有误: {exc}')
+    if parts:
+        raise ValueError(f"不支持的规则参数: {', '.join(sorted(parts))}")
+    if rule['bymonthday'] and freq != 'MONTHLY':
+        raise ValueError('BYMONTHDAY 只能用于 FREQ=MONTHLY')
+    return rule
+
+
+def _month_days(year, month, bymonthday):
+    last = calendar.monthrange(year, month)[1]
+    days = set()
+    for day in bymonthday:
+        actual = day if day > 0 else last + day + 1
+        # 与 RFC 5545 一致：不存在的日期（如 2 月 30 日）直接跳过
+        if 1 <= actual <= last:
+            days.add(date(year, month, actual))
+    return sorted(days)
+
+
+def _periods(rule, dtstart):
+    """按周期依次产出 (周期起始日, 该周期内的候选日期升序列表)"""
+    interval = rule['interval']
+    if rule['freq'] == 'DAILY':
+        current = dtstart
+        while True:
+            if rule['byday'] is None or current.weekday() in rule['byday']:
+                yield current, [current]
+            else:
+                yield current, []
+            current += timedelta(days=interval)
+    elif rule['freq'] == 'WEEKLY':
+        weekdays = rule['byday'] if rule['byday'] is not None else [dtstart.weekday()]
+        week_start = dtstart - timedelta(days=dtstart.weekday())
+        while True:
+            yield week_start, [week_start + timedelta(days=weekday) for weekday in weekdays]
+            week_start += timedelta(weeks=interval)
+    else:
+        bymonthday = rule['bymonthday'] or [dtstart.day]
+        month_index = dtstart.year * 12 + dtstart.month - 1
+        while True:
+            year, month = divmod(month_index, 12)
+            days = _month_days(year, month + 1, bymonthday)
+            if rule['byday'] is not None:
+                days = [day for day in days if day.weekday() in rule['byday']]
+            yield date(year, month + 1, 1), days
+            month_index += interval
+
+
+def iter_occurrences(rule, dtstart, start, end):
+    """产出 [start, end] 区间内的发生日期；COUNT 从 dtstart 起计数"""
+    if isinstance(rule, str):
+        rule = parse_rrule(rule)
+    until = min(end, rule['until']) if rule['until'] else end
+    produced = 0
+    for period_start, days in _periods(rule, dtstart):
+        # 周期起点已超过截止日期时结束（也避免永远没有有效日期的规则无限循环）
+        if period_start > until:
+            return
+        for day in days:
+            if day < dtstart:
+                continue
+            if day > until:
+                return
+            produced += 1
+            if rule['count'] is not None and produced > rule['count']:
+                return
+            if day >= start:
+                yield day
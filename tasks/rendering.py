@@ -0,0 +1,103 @@
+import hashlib
+import re
+from html import unescape
+
+import markdown
+from markdown.extensions import Extension
+from markdown.treeprocessors import Treeprocessor
+from django.utils.html import escape, linebreaks, strip_tags
+
+# 渲染规则变化（升级 Markdown 扩展、调整清洗规则等）时递增，
+# 之后运行 rerender_richtext 命令批量重新渲染
+RENDERER_VERSION = '1'
+
+EXCERPT_LENGTH = 120
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'codehilite', 'tables', 'sane_lists', 'nl2br']
+MARKDOWN_EXTENSION_CONFIGS = {
+    'codehilite': {'guess_lang': False, 'css_class': 'codehilite'},
+}
+
+_SAFE_URL_RE = re.compile(r'^(https?:|mailto:|/|#|\.)', re.IGNORECASE)
+
+
+class _SafeUrlTreeprocessor(Treeprocessor):
+    # 去掉 javascript: 等不安全协议的链接和图片地址
+    def run(self, root):
+        for element in root.iter():
+            for attribute in ('href', 'src'):
+                value = element.get(attribute)
+                if value is not None and not _SAFE_URL_RE.match(value.strip()):
+                    element.set(attribute, '#')
+            if element.tag == 'a':
+                element.set('rel', 'nofollow noopener')
+
+
+class SanitizeExtension(Extension):
+    """禁用原始 HTML（作为普通文本转义输出），并清洗链接地址"""
+
+    def extendMarkdown(self, md):
+        md.preprocessors.deregister('html_block')
+        md.inlinePatterns.deregister('html')
+        md.treeprocessors.register(_SafeUrlTreeprocessor(md), 'safe_url', 0)
+
+
+def render_markdown(source):
+    md = markdown.Markdown(
+        extensions=MARKDOWN_EXTENSIONS + [SanitizeExtension()],
+        extension_configs=MARKDOWN_EXTENSION_CONFIGS,
+        output_format='html',
+    )
+    return md.convert(source)
+
+
+def render_plain(source):
+    """纯文本：转义后保留换行"""
+    return linebreaks(escape(source))
+
+
+RENDERERS = {
+    'markdown': render_markdown,
+    'plain': render_plain,
+}
+
+_BLOCK_BREAK_RE = re.compile(r'<br\s*/?>|</(?:p|li|h\d|pre|tr|td|th)>', re.IGNORECASE)
+
+
+def make_excerpt(html, length=EXCERPT_LENGTH):
+    """由渲染结果生成列表页使用的纯文本摘要：去掉标签、还原转义字符并压缩空白"""
+    text = ' '.join(unescape(strip_tags(_BLOCK_BREAK_RE.sub(' ', html))).split())
+    if len(text) > length:
+        text = text[:length - 1].rstrip() + '…'
+    return text
+
+
+def content_hash(kind, source):
+    return hashlib.sha1(f'{RENDERER_VERSION}:{kind}:{source}'.encode('utf-8')).hexdigest()
+
+
+class RichText:
+    """描述模型上一组 源文本 / 渲染结果 / 内容哈希 / 摘要 字段"""
+
+    def __init__(self, source, kind='markdown'):
+        self.source = source
+        self.kind = kind
+        self.html = f'{source}_html'
+        self.hash = f'{source}_hash'
+        self.excerpt = f'{source}_excerpt'
+
+    @property
+    def rendered_fields(self):
+        return [self.html, self.hash, self.excerpt]
+
+    def refresh(self, instance, force=False):
+        """源文本变化（或渲染器版本变化）时重新渲染，返回是否有更新"""
+        source = getattr(instance, self.source) or ''
+        digest = content_hash(self.kind, source)
+        if not force and getattr(instance, self.hash) == digest:
+            return False
+        html = RENDERERS[self.kind](source)
+        setattr(instance, self.html, html)
+        setattr(instance, self.hash, digest)
+        setattr(instance, self.excerpt, make_excerpt(html))
+        return True
@@ -0,0 +1,267 @@
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count
+
+from .caching import task_cache_key
+from .conditional import table_states
+from .models import PRIORITY_CHOICES, Project, ProjectModel, Task
+
+WORKLOAD_CACHE_TIMEOUT = 600
+
+# 可选的拆分维度：参数名 -> (任务字段, 关联模型, 名称字段)
+WORKLOAD_SPLITS = {
+    'project': ('task_belongsto_project_id', Project, 'project_name'),
+    'model': ('task_belongsto_model_id', ProjectModel, 'model_name'),
+}
+
+UNASSIGNED_LABEL = '未分配'
+
+
+def _build_workload(split):
+    statuses = [value for value, _ in Task.TASK_STATUS_CHOICES]
+    priorities = [value for value, _ in PRIORITY_CHOICES]
+    status_index = {value: i for i, value in enumerate(statuses)}
+    priority_index = {value: i for i, value in enumerate(priorities)}
+
+    group_field = WORKLOAD_SPLITS[split][0] if split else None
+    fields = ['task_assigned_to_user_id', 'task_status', 'task_priority']
+    if group_field:
+        fields.append(group_field)
+
+    # 一次 GROUP BY 得到 负责人 × 状态 × 优先级（× 项目/机型）的任务数
+    rows = list(Task.objects.values_list(*fields).annotate(total=Count('id')).order_by())
+
+    if rows:
+        columns = list(zip(*rows))
+        # 未分配任务的负责人为 NULL，用 0 代替（用户 id 从 1 开始）
+        user_ids = np.fromiter((uid or 0 for uid in columns[0]), dtype=np.int64, count=len(rows))
+        status_idx = np.fromiter((status_index.get(v, -1) for v in columns[1]), dtype=np.int64, count=len(rows))
+        priority_idx = np.fromiter((priority_index.get(v, -1) for v in columns[2]), dtype=np.int64, count=len(rows))
+        totals = np.fromiter(columns[-1], dtype=np.int64, count=len(rows))
+        if group_field:
+            group_ids = np.fromiter(columns[3], dtype=np.int64, count=len(rows))
+        else:
+            group_ids = np.zeros(len(rows), dtype=np.int64)
+        # 忽略不在选项中的历史脏数据
+        valid = (status_idx >= 0) & (priority_idx >= 0)
+        user_ids, status_idx, priority_idx, totals, group_ids = (
+            user_ids[valid], status_idx[valid], priority_idx[valid], totals[valid], group_ids[valid]
+        )
+    else:
+        user_ids = status_idx = priority_idx = totals = group_ids = np.zeros(0, dtype=np.int64)
+
+    unique_users, user_pos = np.unique(user_ids, return_inverse=True)
+    unique_groups, group_pos = np.unique(group_ids, return_inverse=True)
+
+    counts = np.zeros((len(unique_groups), len(unique_users), len(statuses), len(priorities)), dtype=np.int64)
+    np.add.at(counts, (group_pos, user_pos, status_idx, priority_idx), totals)
+
+    usernames = dict(User.objects.filter(id__in=[int(uid) for uid in unique_users if uid]).values_list('id', 'username'))
+    users = [(int(uid), usernames.get(int(uid), UNASSIGNED_LABEL) if uid else UNASSIGNED_LABEL) for uid in unique_users]
+
+    groups = []
+    if group_field:
+        model, label_field = WORKLOAD_SPLITS[split][1:]
+        names = dict(model.objects.filter(id__in=[int(gid) for gid in unique_groups]).values_list('id', label_field))
+        groups = [(int(gid), names.get(int(gid), f'#{gid}')) for gid in unique_groups]
+
+    return {
+        'split': split,
+        'users': users,
+        'groups': groups,
+        'statuses': statuses,
+        'priorities': priorities,
+        'counts': counts,
+    }
+
+
+def _task_table_state():
+    # 数据库中任务的 (最近更新时间, 行数)，作为缓存键的一部分
+    latest, total = table_states((Task, 'task_updated_time', None))[0]
+    return latest.isoformat() if latest else '', total
+
+
+def workload_matrix(split=None):
+    """
+    负责人 × 状态 × 优先级 的任务数矩阵（NumPy 数组，形状为 [分组, 用户, 状态, 优先级]）
+    缓存键除任务数据版本外还包含数据库中任务的 (最近更新时间, 行数)：
+    版本号只在本进程的缓存中递增，未配置共享缓存时其他进程的修改靠后者感知
+    """
+    if split not in WORKLOAD_SPLITS:
+        split = None
+    key = task_cache_key('workload', split or 'all', *_task_table_state())
+    result = cache.get(key)
+    if result is None:
+        result = _build_workload(split)
+        cache.set(key, result, WORKLOAD_CACHE_TIMEOUT)
+    return result
+
+
+def select_group(workload, group_id=None):
+    """取某个分组的 [用户, 状态, 优先级] 矩阵；未指定分组时对所有分组求和"""
+    counts = workload['counts']
+    if group_id is not None:
+        for index, (gid, _) in enumerate(workload['groups']):
+            if gid == group_id:
+                return counts[index]
+    return counts.sum(axis=0) if counts.shape[0] else np.zeros(counts.shape[1:], dtype=np.int64)
+
+
+def iter_workload_csv_rows(workload):
+    """导出为长表格式：分组, 负责人, 状态, 优先级, 任务数（只输出非零单元格）"""
+    counts = workload['counts']
+    groups = workload['groups'] or [(None, '')]
+    for g, u, s, p in zip(*np.nonzero(counts)):
+        yield [
+            groups[g][1],
+            workload['users'][u][1],
+            workload['statuses'][s],
+            workload['priorities'][p],
+            int(counts[g, u, s, p]),
+        ]
+
+
+# BCClub: 交付周期统计
+# 前置时间（lead time）：创建 → 完成；周期时间（cycle time）：开始处理 → 完成
+CYCLE_TIME_CACHE_TIMEOUT = 600
+CYCLE_TIME_PERCENTILES = (50, 85, 95)
+
+# 可选的分组维度：参数名 -> (任务字段, 名称来源)
+CYCLE_TIME_GROUPS = {
+    'project': ('task_belongsto_project_id', (Project, 'project_name')),
+    'model': ('task_belongsto_model_id', (ProjectModel, 'model_name')),
+    'type': ('task_type', dict(Task.TASK_TYPE_CHOICES)),
+    'assignee': ('task_assigned_to_user_id', (User, 'username')),
+}
+
+# 可选的筛选条件：参数名 -> 任务字段
+CYCLE_TIME_FILTERS = {
+    'project': 'task_belongsto_project_id',
+    'model': 'task_belongsto_model_id',
+    'type': 'task_type',
+    'assignee': 'task_assigned_to_user_id',
+}
+
+_SECONDS_PER_DAY = 86400.0
+
+
+def _timestamps(values):
+    # 时间列转为秒级时间戳数组，空值为 NaN
+    return np.fromiter((value.timestamp() if value is not None else np.nan for value in values), dtype=np.float64, count=len(values))
+
+
+def grouped_percentiles(group_pos, values, group_count, percentiles=CYCLE_TIME_PERCENTILES):
+    """
+    按分组计算分位数（线性插值，与 np.percentile 默认方法一致），返回 (各组样本数, [分组, 分位数] 数组)
+    先按 (分组, 数值) 排序，再用各组的偏移量一次性算出所有分组、所有分位数的插值位置，没有逐组循环
+    忽略 NaN；没有样本的分组结果为 NaN
+    """
+    valid = ~np.isnan(values)
+    group_pos, values = group_pos[valid], values[valid]
+    order = np.lexsort((values, group_pos))
+    sorted_values = values[order]
+    counts = np.bincount(group_pos, minlength=group_count)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    q = np.asarray(percentiles, dtype=np.float64) / 100
+    positions = (np.maximum(counts, 1) - 1)[:, None] * q[None, :]
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    if sorted_values.size:
+        base = offsets[:, None]
+        low_values = sorted_values[np.minimum(base + lower, sorted_values.size - 1)]
+        high_values = sorted_values[np.minimum(base + upper, sorted_values.size - 1)]
+        result = low_values + (high_values - low_values) * (positions - lower)
+    else:
+        result = np.full(positions.shape, np.nan)
+    result[counts == 0] = np.nan
+    return counts, result
+
+
+def _group_names(group, keys):
+    source = CYCLE_TIME_GROUPS[group][1]
+    if isinstance(source, dict):
+        return {key: source.get(key, key) for key in keys}
+    model, label_field = source
+    names = dict(model.objects.filter(id__in=[key for key in keys if key is not None]).values_list('id', label_field))
+    return {key: names.get(key, f'#{key}') if key is not None else UNASSIGNED_LABEL for key in keys}
+
+
+def _summary(counts, percentiles):
+    return {'count': int(counts), **{
+        f'p{p}': None if np.isnan(value) else round(float(value), 2)
+        for p, value in zip(CYCLE_TIME_PERCENTILES, percentiles)
+    }}
+
+
+def _build_cycle_times(group, filters):
+    fields = ['task_created_time', 'task_start_time', 'task_end_time']
+    if group:
+        fields.append(CYCLE_TIME_GROUPS[group][0])
+    lookups = {CYCLE_TIME_FILTERS[key]: value for key, value in filters}
+    rows = list(
+        Task.objects.filter(task_status='completed', task_end_time__isnull=False, **lookups)
+        .values_list(*fields).order_by()
+    )
+
+    columns = list(zip(*rows)) if rows else [()] * len(fields)
+    created, started, ended = (_timestamps(column) for column in columns[:3])
+    lead = (ended - created) / _SECONDS_PER_DAY
+    cycle = (ended - started) / _SECONDS_PER_DAY
+
+    if group:
+        keys = list(dict.fromkeys(columns[3]))
+        key_index = {key: index for index, key in enumerate(keys)}
+        group_pos = np.fromiter((key_index[key] for key in columns[3]), dtype=np.int64, count=len(rows))
+    else:
+        keys = []
+        group_pos = np.zeros(len(rows), dtype=np.int64)
+
+    group_count = max(len(keys), 1)
+    lead_counts, lead_result = grouped_percentiles(group_pos, lead, group_count)
+    cycle_counts, cycle_result = grouped_percentiles(group_pos, cycle, group_count)
+    all_pos = np.zeros(len(rows), dtype=np.int64)
+    overall_lead = grouped_percentiles(all_pos, lead, 1)
+    overall_cycle = grouped_percentiles(all_pos, cycle, 1)
+
+    groups = []
+    if group:
+        names = _group_names(group, keys)
+        for index, key in enumerate(keys):
+            groups.append({
+                'key': key,
+                'name': names[key],
+                'lead_time': _summary(lead_counts[index], lead_result[index]),
+                'cycle_time': _summary(cycle_counts[index], cycle_result[index]),
+            })
+        groups.sort(key=lambda item: item['lead_time']['count'], reverse=True)
+
+    return {
+        'group': group,
+        'filters': dict(filters),
+        'unit': 'days',
+        'percentiles': list(CYCLE_TIME_PERCENTILES),
+        'overall': {
+            'lead_time': _summary(overall_lead[0][0], overall_lead[1][0]),
+            'cycle_time': _summary(overall_cycle[0][0], overall_cycle[1][0]),
+        },
+        'groups': groups,
+    }
+
+
+def cycle_time_stats(group=None, **filters):
+    """
+    已完成任务的前置时间 / 周期时间分布（单位：天），可按项目、机型、类型或负责人分组
+    结果按 (分组, 筛选条件)、任务数据版本和数据库中任务的 (最近更新时间, 行数) 缓存，
+    其他进程中的任务变更同样会使其失效
+    """
+    if group not in CYCLE_TIME_GROUPS:
+        group = None
+    filters = tuple(sorted((key, value) for key, value in filters.items() if key in CYCLE_TIME_FILTERS and value is not None))
+    key = task_cache_key('cycle_time', group or 'all', *(f'{name}={value}' for name, value in filters), *_task_table_state())
+    result = cache.get(key)
+    if result is None:
+        result = _build_cycle_times(group, filters)
+        cache.set(key, result, CYCLE_TIME_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,81 @@
+from django.db import transaction
+from django.db.models import Count, FilteredRelation, Q
+
+from .activity import record_tasks_created
+from .caching import bump_task_cache_version
+from .models import ProjectModel, Task
+
+
+def _clone(source, model_id, creator_id):
+    task = Task(
+        task_title=source.task_title,
+        task_description=source.task_description,
+        task_type='feedback',
+        task_priority=source.task_priority,
+        task_deadline=source.task_deadline,
+        task_creator_id=creator_id,
+        task_assigned_to_user_id_id=source.task_assigned_to_user_id_id,
+        task_belongsto_project_id_id=source.task_belongsto_project_id_id,
+        task_belongsto_model_id_id=model_id,
+        task_source_task_id=source,
+        # 描述相同，直接复用源任务的渲染结果，不重复渲染
+        **{field: getattr(source, field) for rich_text in Task.rich_text_fields for field in rich_text.rendered_fields},
+    )
+    task.sync_denormalized_fields()
+    return task
+
+
+def fan_out_task(source, model_ids=None, creator=None):
+    """
+    将任务横展到同项目的其他机型：一次 bulk_create 为每个机型创建一个关联源任务的横展反馈任务
+    - model_ids 为空时横展到项目下的全部机型
+    - 跳过源任务所在机型和已有关联任务的机型，返回新建的任务列表
+    """
+    targets = ProjectModel.objects.filter(model_belongsto_project_id=source.task_belongsto_project_id_id).exclude(id=source.task_belongsto_model_id_id)
+    if model_ids is not None:
+        targets = targets.filter(id__in=model_ids)
+
+    with transaction.atomic():
+        # 锁住源任务，避免并发横展为同一机型重复创建
+        Task.objects.select_for_update().filter(pk=source.pk).values_list('pk').first()
+        covered = Task.objects.filter(task_source_task_id=source).values('task_belongsto_model_id')
+        target_ids = list(targets.exclude(id__in=covered).values_list('id', flat=True))
+        if not target_ids:
+            return []
+        creator_id = creator.pk if creator is not None else source.task_creator_id
+        Task.objects.bulk_create([_clone(source, model_id, creator_id) for model_id in target_ids], batch_size=500)
+        # 部分数据库不回填主键，按 (源任务, 机型) 查回本次创建的任务
+        created = list(
+            Task.objects.filter(task_source_task_id=source, task_belongsto_model_id__in=target_ids)
+            .only(
+                'id', 'task_title', 'task_description_excerpt', 'task_status', 'task_type', 'task_priority', 'task_creator', 'task_assigned_to_user_id',
+                'task_belongsto_project_id', 'task_belongsto_model_id',
+            )
+        )
+        record_tasks_created(created)
+    bump_task_cache_version()
+    return created
+
+
+def rollout_progress(source):
+    """
+    横展进度：项目内其他机型中已有关联任务的机型数，以及关联任务按状态的数量，一次聚合查询
+    通过 FilteredRelation 只关联该源任务的子任务，不扫描各机型的全部任务
+    """
+    linked = Q(linked__isnull=False)
+    aggregates = {
+        'models': Count('id', distinct=True),
+        'covered': Count('id', filter=linked, distinct=True),
+        'tasks': Count('linked'),
+    }
+    for status, _ in Task.TASK_STATUS_CHOICES:
+        aggregates[status] = Count('linked', filter=Q(linked__task_status=status))
+    progress = (
+        ProjectModel.objects.filter(model_belongsto_project_id=source.task_belongsto_project_id_id)
+        .exclude(id=source.task_belongsto_model_id_id)
+        .annotate(linked=FilteredRelation('tasks', condition=Q(tasks__task_source_task_id=source.pk)))
+        .aggregate(**aggregates)
+    )
+    done = progress['completed'] + progress['cancelled']
+    progress['percent'] = round(done * 100 / progress['tasks']) if progress['tasks'] else 0
+    return progress
@@ -0,0 +1,50 @@
+from collections import namedtuple
+
+from .models import PRIORITY_CHOICES, Task
+
+# 列表行的字段 -> 查询列；项目名和机型名随同一条查询 JOIN 取出
+TASK_ROW_COLUMNS = {
+    'id': 'id',
+    'title': 'task_title',
+    'excerpt': 'task_description_excerpt',
+    'type': 'task_type',
+    'status': 'task_status',
+    'priority': 'task_priority',
+    'deadline': 'task_deadline',
+    'project_name': 'task_belongsto_project_id__project_name',
+    'model_name': 'task_belongsto_model_id__model_name',
+}
+
+# 状态徽标的样式，覆盖 Task.TASK_STATUS_CHOICES 的每个状态
+STATUS_BADGES = {
+    'pending': 'bg-warning',
+    'in_progress': 'bg-primary',
+    'completed': 'bg-success',
+    'on_hold': 'bg-secondary',
+    'cancelled': 'bg-dark',
+}
+
+TaskRow = namedtuple('TaskRow', [*TASK_ROW_COLUMNS, 'status_display', 'type_display', 'priority_display', 'status_badge'])
+
+_STATUS_LABELS = dict(Task.TASK_STATUS_CHOICES)
+_TYPE_LABELS = dict(Task.TASK_TYPE_CHOICES)
+_PRIORITY_LABELS = dict(PRIORITY_CHOICES)
+
+
+def task_rows(queryset):
+    """
+    列表渲染用的精简任务行：一次 values_list 查询，不加载描述全文，也不构造模型实例
+    显示文本和徽标样式在这里一并算好，模板中不再调用 get_*_display 或访问关联对象
+    """
+    rows = []
+    for values in queryset.values_list(*TASK_ROW_COLUMNS.values()):
+        row = dict(zip(TASK_ROW_COLUMNS, values))
+        status = row['status']
+        row.update(
+            status_display=_STATUS_LABELS.get(status, status),
+            type_display=_TYPE_LABELS.get(row['type'], row['type']),
+            priority_display=_PRIORITY_LABELS.get(row['priority'], row['priority']),
+            status_badge=STATUS_BADGES.get(status, 'bg-secondary'),
+        )
+        rows.append(TaskRow._make(row[field] for field in TaskRow._fields))
+    return rows
@@ -0,0 +1,107 @@
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import activity
+from .auth_cache import invalidate_user
+from .caching import bump_task_cache_version
+from .filters import invalidate_saved_filters
+from .similarity import index_task, task_text, unindex_task
+from .webhooks import begin_project_delete, end_project_delete, invalidate_webhooks
+from .models import Project, ProjectWebhook, SavedTaskFilter, Task, TaskCommentRecord, TaskCommitRecord
+
+
+# BCClub: 任务及关联记录的变更动态
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    bump_task_cache_version()
+    # 标题或描述变化时，事务提交后增量更新相似任务索引
+    if created or any(name in ('task_title', 'task_description') for name, _, _ in activity.diff_task(instance)):
+        transaction.on_commit(partial(index_task, instance.pk, task_text(instance.task_title, instance.task_description_excerpt)))
+    if created:
+        activity.record_task_created(instance)
+    else:
+        activity.record_task_updated(instance)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    bump_task_cache_version()
+    transaction.on_commit(partial(unindex_task, instance.pk))
+    activity.record_task_deleted(instance)
+
+
+# 计数用 UPDATE 维护，不经过任务的信号，需手动递增任务数据版本；
+# UPDATE 不会自动更新 auto_now 字段，同时写入任务更新时间，供快照和页面校验值感知变化
+@receiver(post_save, sender=TaskCommentRecord)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Task.objects.filter(pk=instance.comment_belongsto_task_id_id).update(task_comment_count=F('task_comment_count') + 1, task_updated_time=timezone.now())
+        bump_task_cache_version()
+        activity.record_comment_added(instance)
+
+
+@receiver(post_delete, sender=TaskCommentRecord)
+def comment_deleted(sender, instance, **kwargs):
+    Task.objects.filter(pk=instance.comment_belongsto_task_id_id, task_comment_count__gt=0).update(task_comment_count=F('task_comment_count') - 1, task_updated_time=timezone.now())
+    bump_task_cache_version()
+
+
+@receiver(post_save, sender=TaskCommitRecord)
+def commit_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Task.objects.filter(pk=instance.commit_belongsto_task_id_id).update(task_commit_count=F('task_commit_count') + 1, task_updated_time=timezone.now())
+        bump_task_cache_version()
+        activity.record_commit_added(instance)
+
+
+@receiver(post_delete, sender=TaskCommitRecord)
+def commit_deleted(sender, instance, **kwargs):
+    Task.objects.filter(pk=instance.commit_belongsto_task_id_id, task_commit_count__gt=0).update(task_commit_count=F('task_commit_count') - 1, task_updated_time=timezone.now())
+    bump_task_cache_version()
+
+
+# BCClub: 保存的筛选增删改后清除侧边栏缓存
+@receiver(post_save, sender=SavedTaskFilter)
+@receiver(post_delete, sender=SavedTaskFilter)
+def saved_filter_changed(sender, instance, **kwargs):
+    invalidate_saved_filters(instance.filter_owner_id)
+
+
+# BCClub: Webhook 配置变更后清除项目 Webhook 缓存
+@receiver(post_save, sender=ProjectWebhook)
+@receiver(post_delete, sender=ProjectWebhook)
+def webhook_changed(sender, instance, **kwargs):
+    invalidate_webhooks()
+
+
+# BCClub: 删除项目时，级联删除的任务不再写入该项目的 Webhook 事件（Webhook 会被一并删除）
+@receiver(pre_delete, sender=Project)
+def project_deleting(sender, instance, **kwargs):
+    begin_project_delete(instance.pk)
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    end_project_delete(instance.pk)
+
+
+# BCClub: 用户信息、密码变更或退出登录时清除进程内用户缓存
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def user_logged_out_handler(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_user(user.pk)
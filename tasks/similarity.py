@@ -0,0 +1,364 @@
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # 非 POSIX 平台没有 fcntl，只保证同一进程内的线程互斥
+    fcntl = None
+
+# MinHash 参数：修改后已持久化的签名不再有效，加载时会发现参数不一致并重建
+NUM_PERM = 32
+BAND_ROWS = 2
+BANDS = NUM_PERM // BAND_ROWS
+SIGNATURE_PARAMS = f'minhash-bigram-v1-{NUM_PERM}x{BAND_ROWS}'
+
+_PRIME = (1 << 31) - 1
+# 空文本的签名值；哈希结果都小于 _PRIME，不会与真实签名相等
+EMPTY = np.uint32(_PRIME)
+# 固定种子，保证各进程、各次启动计算出的签名一致
+_rng = np.random.RandomState(20240601)
+_A = _rng.randint(1, _PRIME, NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, _PRIME, NUM_PERM).astype(np.uint64)
+
+DEFAULT_TOP_K = 5
+MIN_SCORE = 0.2
+# 批量计算签名时每批的 shingle 数上限，控制中间矩阵的内存占用
+_MAX_BATCH_SHINGLES = 200000
+
+# 增量日志记录：操作（1 更新、2 删除）、任务 id、签名，定长便于直接用 NumPy 读取
+_UPSERT, _DELETE = 1, 2
+DELTA_DTYPE = np.dtype([('op', 'u1'), ('id', '<i8'), ('sig', '<u4', (NUM_PERM,))])
+
+_NORMALIZE_RE = re.compile(r'[\W_]+')
+
+
+def task_text(title, excerpt):
+    # 标题 + 描述摘要；摘要是保存时生成的纯文本，重建索引时无需读取完整描述
+    return f'{title or ""} {excerpt or ""}'
+
+
+def _shingles(text):
+    """去掉空白和标点后的相邻字符二元组（对中文标题比分词更稳定），编码为整数并映射到 [0, _PRIME)"""
+    chars = np.frombuffer(_NORMALIZE_RE.sub('', (text or '').lower()).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    if chars.size >= 2:
+        chars = chars[:-1] * np.uint64(0x110000) + chars[1:]
+    return chars % np.uint64(_PRIME)
+
+
+def signatures(texts):
+    """批量计算 MinHash 签名，返回 (len(texts), NUM_PERM) 的 uint32 数组"""
+    result = np.full((len(texts), NUM_PERM), EMPTY, dtype=np.uint32)
+    batch, rows, size = [], [], 0
+
+    def flush():
+        shingles = np.concatenate(batch)
+        offsets = np.cumsum([0] + [len(item) for item in batch[:-1]])
+        hashed = (shingles[:, None] * _A[None, :] + _B[None, :]) % np.uint64(_PRIME)
+        result[rows] = np.minimum.reduceat(hashed, offsets, axis=0)
+
+    for row, text in enumerate(texts):
+        shingles = _shingles(text)
+        if not shingles.size:
+            continue
+        batch.append(shingles)
+        rows.append(row)
+        size += shingles.size
+        if size >= _MAX_BATCH_SHINGLES:
+            flush()
+            batch, rows, size = [], [], 0
+    if batch:
+        flush()
+    return result
+
+
+def _band_keys(sigs):
+    # 每个 band 的两行签名拼成一个 uint64 作为桶键，形状 (BANDS, N)
+    pairs = sigs.reshape(len(sigs), BANDS, BAND_ROWS).astype(np.uint64)
+    return ((pairs[:, :, 0] << np.uint64(32)) | pairs[:, :, 1]).T
+
+
+class SimilarityIndex:
+    """
+    任务标题/描述的 MinHash + LSH 相似度索引
+    - 基础文件 base.npz 保存按 id 排序的签名；之后的增删追加到 delta-<代数>.bin 增量日志
+    - 每次查询前检查文件变化：基础文件被替换（重建）时重新加载，增量日志只读取新追加的部分，
+      多个进程共享同一目录时也能看到彼此的更新
+    - 追加增量与替换基础文件通过目录下的文件锁互斥：追加持共享锁，替换持排他锁
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.base_path = self.directory / 'base.npz'
+        self.lock_path = self.directory / 'index.lock'
+        self._lock = threading.RLock()
+        self._base_stat = None
+        self._set_base(np.zeros(0, dtype=np.int64), np.zeros((0, NUM_PERM), dtype=np.uint32), generation=0)
+
+    def _delta_path(self, generation):
+        return self.directory / f'delta-{generation}.bin'
+
+    def _set_base(self, ids, sigs, generation):
+        order = np.argsort(ids, kind='stable')
+        self.ids = ids[order]
+        self.sigs = sigs[order]
+        self.alive = np.ones(len(self.ids), dtype=bool)
+        keys = _band_keys(self.sigs)
+        self.band_rows = np.argsort(keys, axis=1, kind='stable').astype(np.int32)
+        self.band_keys = np.take_along_axis(keys, self.band_rows, axis=1)
+        self.generation = generation
+        self.delta = {}
+        self._delta_arrays = None
+        self._delta_offset = 0
+
+    def _row(self, task_id):
+        row = int(np.searchsorted(self.ids, task_id))
+        return row if row < len(self.ids) and self.ids[row] == task_id else None
+
+    def _apply(self, records):
+        for op, task_id, sig in zip(records['op'], records['id'].tolist(), records['sig']):
+            row = self._row(task_id)
+            if row is not None:
+                self.alive[row] = False
+            if op == _UPSERT:
+                self.delta[task_id] = sig
+            else:
+                self.delta.pop(task_id, None)
+        self._delta_arrays = None
+
+    def sync(self):
+        """与磁盘保持一致，返回索引是否存在（基础文件是否已生成）"""
+        with self._lock:
+            try:
+                stat = os.stat(self.base_path)
+            except FileNotFoundError:
+                return False
+            base_stat = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if base_stat != self._base_stat:
+                with np.load(self.base_path) as data:
+                    if str(data['params']) != SIGNATURE_PARAMS:
+                        return False
+                    self._set_base(data['ids'], data['sigs'], int(data['generation']))
+                self._base_stat = base_stat
+            delta_path = self._delta_path(self.generation)
+            try:
+                size = os.path.getsize(delta_path)
+            except FileNotFoundError:
+                return True
+            # 只读取完整的记录，写入中的半条记录留到下次
+            end = size - size % DELTA_DTYPE.itemsize
+            if end > self._delta_offset:
+                with open(delta_path, 'rb') as source:
+                    source.seek(self._delta_offset)
+                    records = np.frombuffer(source.read(end - self._delta_offset), dtype=DELTA_DTYPE)
+                self._apply(records)
+                self._delta_offset = end
+            return True
+
+    @contextmanager
+    def file_lock(self, exclusive=False, name=None):
+        """跨进程的文件锁，关闭文件时释放"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / name if name else self.lock_path, 'a') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def delta_position(self):
+        """当前代数和增量日志中已读取到的位置；重建前记下，替换时从这里重放重建期间追加的记录"""
+        with self._lock:
+            self.sync()
+            return self.generation, self._delta_offset
+
+    def _append(self, records):
+        with self._lock, self.file_lock():
+            # 先同步：其他进程可能已重建索引，需要写入新一代的增量日志
+            self.sync()
+            # 追加写入是原子的，多个进程可以同时写同一个日志
+            with open(self._delta_path(self.generation), 'ab') as output:
+                output.write(records.tobytes())
+            self.sync()
+
+    def update(self, task_id, text):
+        self.update_many([(task_id, text)])
+
+    def update_many(self, items):
+        # [(任务 id, 文本)] 一次追加写入
+        records = np.zeros(len(items), dtype=DELTA_DTYPE)
+        records['op'], records['id'] = _UPSERT, [task_id for task_id, _ in items]
+        records['sig'] = signatures([text for _, text in items])
+        self._append(records)
+
+    def remove(self, task_id):
+        record = np.zeros(1, dtype=DELTA_DTYPE)
+        record['op'], record['id'] = _DELETE, task_id
+        self._append(record)
+
+    def write_base(self, ids, sigs, since=None):
+        """
+        写入新的基础文件（代数加一），替换是原子的
+        since 为读取数据库前的 delta_position()：此后追加的记录不一定包含在 ids/sigs 中，
+        按原顺序复制到新一代的增量日志重放（重放已包含的更新结果不变），再删除旧日志
+        """
+        with self._lock, self.file_lock(exclusive=True):
+            self.sync()
+            generation = self.generation + 1
+            replay = b''
+            if since is not None:
+                since_generation, offset = since
+                try:
+                    with open(self._delta_path(since_generation), 'rb') as source:
+                        source.seek(offset)
+                        replay = source.read()
+                except FileNotFoundError:
+                    pass
+                replay = replay[:len(replay) - len(replay) % DELTA_DTYPE.itemsize]
+            temp_path = self.directory / f'base-{os.getpid()}.tmp.npz'
+            np.savez(temp_path, ids=ids, sigs=sigs, generation=generation, params=SIGNATURE_PARAMS)
+            if replay:
+                with open(self._delta_path(generation), 'wb') as output:
+                    output.write(replay)
+            os.replace(temp_path, self.base_path)
+            for path in self.directory.glob('delta-*.bin'):
+                if path.name != self._delta_path(generation).name:
+                    path.unlink(missing_ok=True)
+            self._base_stat = None
+            self.sync()
+
+    def _delta_snapshot(self):
+        if self._delta_arrays is None:
+            ids = np.fromiter(self.delta.keys(), dtype=np.int64, count=len(self.delta))
+            sigs = np.array(list(self.delta.values()), dtype=np.uint32).reshape(len(self.delta), NUM_PERM)
+            self._delta_arrays = (ids, sigs)
+        return self._delta_arrays
+
+    def query(self, text, k=DEFAULT_TOP_K, exclude=(), min_score=MIN_SCORE):
+        """返回最相似的 k 个任务 [(任务 id, 估计的 Jaccard 相似度)]，按相似度降序"""
+        sig = signatures([text])[0]
+        if (sig == EMPTY).all():
+            return []
+        with self._lock:
+            self.sync()
+            # 基础文件：各 band 中落入同一个桶的行为候选，只对候选计算相似度
+            keys = _band_keys(sig[None, :])[:, 0]
+            ranges = []
+            for band in range(BANDS):
+                lo = np.searchsorted(self.band_keys[band], keys[band], 'left')
+                hi = np.searchsorted(self.band_keys[band], keys[band], 'right')
+                if hi > lo:
+                    ranges.append(self.band_rows[band, lo:hi])
+            rows = np.unique(np.concatenate(ranges)) if ranges else np.zeros(0, dtype=np.int32)
+            rows = rows[self.alive[rows]]
+            base_ids = self.ids[rows]
+            base_scores = (self.sigs[rows] == sig).mean(axis=1)
+            # 增量部分数量很少，直接全部比较
+            delta_ids, delta_sigs = self._delta_snapshot()
+            delta_scores = (delta_sigs == sig).mean(axis=1)
+
+        ids = np.concatenate([base_ids, delta_ids])
+        scores = np.concatenate([base_scores, delta_scores])
+        keep = scores >= min_score
+        if exclude:
+            keep &= ~np.isin(ids, np.asarray(list(exclude), dtype=np.int64))
+        ids, scores = ids[keep], scores[keep]
+        top = np.argsort(-scores, kind='stable')[:k]
+        return [(int(ids[i]), round(float(scores[i]), 3)) for i in top]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def index_directory():
+    return Path(getattr(settings, 'TASK_SIMILARITY_INDEX_DIR', Path(settings.BASE_DIR) / 'similarity_index'))
+
+
+def get_index():
+    """
+    当前进程的索引（按目录缓存）
+    请求中不构建索引：由 build_similarity_index 命令构建，构建之前相似任务建议为空
+    """
+    directory = index_directory()
+    with _indexes_lock:
+        index = _indexes.get(directory)
+        if index is None:
+            index = _indexes[directory] = SimilarityIndex(directory)
+    return index
+
+
+def rebuild_index(index=None, chunk_size=5000):
+    """从数据库重建索引：按 id 分块读取标题和摘要，批量计算签名，返回任务数"""
+    from .models import Task
+
+    index = index or get_index()
+    # 同一时间只有一个进程重建；读取数据库之前记下增量日志的位置
+    with index.file_lock(exclusive=True, name='build.lock'):
+        since = index.delta_position()
+        id_chunks, sig_chunks = [], []
+        rows = Task.objects.order_by('id').values_list('id', 'task_title', 'task_description_excerpt')
+        chunk = []
+        for row in rows.iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                id_chunks.append(np.fromiter((r[0] for r in chunk), dtype=np.int64, count=len(chunk)))
+                sig_chunks.append(signatures([task_text(r[1], r[2]) for r in chunk]))
+                chunk = []
+        if chunk:
+            id_chunks.append(np.fromiter((r[0] for r in chunk), dtype=np.int64, count=len(chunk)))
+            sig_chunks.append(signatures([task_text(r[1], r[2]) for r in chunk]))
+        ids = np.concatenate(id_chunks) if id_chunks else np.zeros(0, dtype=np.int64)
+        sigs = np.concatenate(sig_chunks) if sig_chunks else np.zeros((0, NUM_PERM), dtype=np.uint32)
+        index.write_base(ids, sigs, since)
+    return len(ids)
+
+
+def index_task(task_id, text):
+    """增量更新一个任务的签名；索引尚未构建时跳过，构建时会从数据库读取"""
+    index = get_index()
+    if index.sync():
+        index.update(task_id, text)
+
+
+def index_tasks(items):
+    """批量创建的任务（bulk_create 不触发 post_save）一次写入索引；items 为 [(任务 id, 文本)]"""
+    if not items:
+        return
+    index = get_index()
+    if index.sync():
+        index.update_many(items)
+
+
+def unindex_task(task_id):
+    index = get_index()
+    if index.sync():
+        index.remove(task_id)
+
+
+def similar_tasks(title, excerpt='', k=DEFAULT_TOP_K, exclude=()):
+    """相似任务建议：索引给出 id 和相似度，再一次查询取出任务信息"""
+    from .models import Task
+
+    matches = get_index().query(task_text(title, excerpt), k=k, exclude=exclude)
+    if not matches:
+        return []
+    tasks = Task.objects.select_related('task_belongsto_project_id', 'task_belongsto_model_id').only(
+        'id', 'task_title', 'task_status', 'task_belongsto_project_id__project_name', 'task_belongsto_model_id__model_name',
+    ).in_bulk([task_id for task_id, _ in matches])
+    return [
+        {
+            'id': task.id,
+            'title': task.task_title,
+            'status': task.get_task_status_display(),
+            'project': task.task_belongsto_project_id.project_name,
+            'model': task.task_belongsto_model_id.model_name,
+            'url': task.get_absolute_url(),
+            'score': score,
+        }
+        for task_id, score in matches
+        if (task := tasks.get(task_id)) is not None
+    ]
@@ -0,0 +1,201 @@
+import gzip
+import json
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from uuid import UUID
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connections, router, transaction
+from django.utils import timezone
+from django.utils.duration import duration_iso_string
+
+from .caching import bump_task_cache_version
+
+SNAPSHOT_FORMAT = 'tasks-snapshot'
+SNAPSHOT_VERSION = 1
+DEFAULT_CHUNK_SIZE = 2000
+
+# 需要类型还原的字段，其余字段 JSON 原样可用
+_CONVERTED_FIELD_TYPES = {'DateTimeField', 'DateField', 'TimeField', 'DecimalField', 'DurationField', 'UUIDField'}
+
+
+def snapshot_models():
+    """
+    快照包含的模型（用户 + tasks 应用的全部表），按外键依赖排序：被引用的表在前
+    - 用户的组和权限依赖各库的 contenttypes 主键，不在快照范围内
+    """
+    candidates = [User] + list(apps.get_app_config('tasks').get_models(include_auto_created=True))
+    ordered = []
+    pending = list(candidates)
+    while pending:
+        for model in pending:
+            dependencies = {
+                field.related_model for field in model._meta.concrete_fields
+                if field.is_relation and field.related_model is not model and field.related_model in candidates
+            }
+            if dependencies <= set(ordered):
+                ordered.append(model)
+                pending.remove(model)
+                break
+        else:
+            raise ValueError(f"模型之间存在循环外键依赖: {', '.join(m._meta.label for m in pending)}")
+    return ordered
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return duration_iso_string(value)
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    raise TypeError(f'无法序列化的类型: {type(value).__name__}')
+
+
+_encoder = json.JSONEncoder(default=_json_default, ensure_ascii=False, separators=(',', ':'))
+
+
+@contextmanager
+def _consistent_read(using):
+    """所有表在同一个只读事务中读取，得到一致的快照"""
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        # PostgreSQL 默认读已提交，需在事务第一条语句前切换为可重复读；
+        # MySQL InnoDB 默认可重复读，SQLite 事务内的读本身就是一致的
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+        yield
+
+
+def write_snapshot(path, using='default', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    导出快照到 gzip 压缩的 JSONL 文件，返回 {模型标签: 行数}
+    - 第一行为文件头；每个表先写一行列名，之后每行一条记录（按列顺序的数组）
+    - 按主键顺序流式读取，内存占用与表大小无关
+    """
+    counts = {}
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as output, _consistent_read(using):
+        output.write(_encoder.encode({
+            'format': SNAPSHOT_FORMAT, 'version': SNAPSHOT_VERSION, 'created': timezone.now(),
+        }) + '\n')
+        for model in snapshot_models():
+            columns = [field.attname for field in model._meta.concrete_fields]
+            output.write(_encoder.encode({'model': model._meta.label_lower, 'columns': columns}) + '\n')
+            rows = model._base_manager.using(using).order_by('pk').values_list(*columns).iterator(chunk_size=chunk_size)
+            count = 0
+            lines = []
+            for row in rows:
+                lines.append(_encoder.encode(row))
+                count += 1
+                if len(lines) >= chunk_size:
+                    output.write('\n'.join(lines) + '\n')
+                    lines = []
+            if lines:
+                output.write('\n'.join(lines) + '\n')
+            counts[model._meta.label_lower] = count
+    return counts
+
+
+def _converters(model, columns):
+    fields = {field.attname: field for field in model._meta.concrete_fields}
+    missing = [column for column in columns if column not in fields]
+    if missing:
+        raise ValueError(f"{model._meta.label} 没有字段: {', '.join(missing)}")
+    return [
+        fields[column].to_python if fields[column].get_internal_type() in _CONVERTED_FIELD_TYPES else None
+        for column in columns
+    ]
+
+
+def _bulk_insert(model, columns, rows, using):
+    """
+    按快照原样批量插入（保留主键和时间字段）
+    bulk_create 会用当前时间覆盖 auto_now / auto_now_add 字段，这里用 raw 插入，与 loaddata 的行为一致
+    """
+    fields = [model._meta.get_field(column) for column in columns]
+    objs = [model(**dict(zip(columns, row))) for row in rows]
+    connection = connections[using]
+    batch_size = max(connection.ops.bulk_batch_size(fields, objs), 1)
+    queryset = model._base_manager.using(using)
+    for start in range(0, len(objs), batch_size):
+        queryset._insert(objs[start:start + batch_size], fields=fields, using=using, raw=True)
+
+
+def _check_empty(models, using):
+    non_empty = [model._meta.label for model in models if model._base_manager.using(using).exists()]
+    if non_empty:
+        raise ValueError(f"目标数据库中已有数据: {', '.join(non_empty)}，请使用 --flush 先清空")
+
+
+def flush_tables(models, using='default'):
+    """清空快照涉及的表（级联清空引用这些表的其他表，如后台操作日志）并重置自增序列"""
+    connection = connections[using]
+    tables = [model._meta.db_table for model in models]
+    sql_list = connection.ops.sql_flush(no_style(), tables, reset_sequences=True, allow_cascade=True)
+    connection.ops.execute_sql_flush(sql_list)
+
+
+def read_snapshot(path, using='default', batch_size=DEFAULT_CHUNK_SIZE, flush=False):
+    """
+    从快照恢复，返回 {模型标签: 行数}
+    - 在一个事务中按外键顺序批量插入，外键检查推迟到全部插入之后统一进行
+    - 结束后重置主键序列，并使任务相关缓存失效
+    """
+    models = [model for model in snapshot_models() if router.allow_migrate_model(using, model)]
+    by_label = {model._meta.label_lower: model for model in models}
+    connection = connections[using]
+    counts = {}
+
+    with gzip.open(path, 'rt', encoding='utf-8') as source, transaction.atomic(using=using):
+        header = json.loads(source.readline() or '{}')
+        if header.get('format') != SNAPSHOT_FORMAT or header.get('version') != SNAPSHOT_VERSION:
+            raise ValueError('不是有效的任务快照文件或版本不兼容')
+        if flush:
+            flush_tables(models, using)
+        else:
+            _check_empty(models, using)
+
+        with connection.constraint_checks_disabled():
+            model = columns = converters = None
+            rows = []
+            for line in source:
+                item = json.loads(line)
+                if isinstance(item, list):
+                    if converters is not None:
+                        item = [value if convert is None or value is None else convert(value) for convert, value in zip(converters, item)]
+                    rows.append(item)
+                    if len(rows) >= batch_size:
+                        _bulk_insert(model, columns, rows, using)
+                        counts[model._meta.label_lower] += len(rows)
+                        rows = []
+                    continue
+                if rows:
+                    _bulk_insert(model, columns, rows, using)
+                    counts[model._meta.label_lower] += len(rows)
+                    rows = []
+                if item.get('model') not in by_label:
+                    raise ValueError(f"快照中包含未知的模型: {item.get('model')}")
+                model = by_label[item['model']]
+                columns = item['columns']
+                converters = _converters(model, columns)
+                if not any(converters):
+                    converters = None
+                counts[model._meta.label_lower] = 0
+            if rows:
+                _bulk_insert(model, columns, rows, using)
+                counts[model._meta.label_lower] += len(rows)
+
+        # 不支持延迟约束的数据库（SQLite、MySQL）在这里统一检查外键
+        connection.check_constraints(table_names=[model._meta.db_table for model in models])
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), models)
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+
+    bump_task_cache_version()
+    return counts
@@ -0,0 +1,153 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import ProjectStatusSnapshot, Task, TaskActivityRecord
+
+# 燃尽图中视为“已关闭”的状态
+CLOSED_STATUSES = ('completed', 'cancelled')
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _copy_rows(rows, day):
+    return [
+        ProjectStatusSnapshot(
+            snapshot_date=day,
+            snapshot_belongsto_project_id_id=row.snapshot_belongsto_project_id_id,
+            snapshot_belongsto_model_id_id=row.snapshot_belongsto_model_id_id,
+            snapshot_task_status=row.snapshot_task_status,
+            snapshot_task_type=row.snapshot_task_type,
+            snapshot_task_priority=row.snapshot_task_priority,
+            snapshot_task_count=row.snapshot_task_count,
+        )
+        for row in rows
+    ]
+
+
+def _changed_model_ids(last_date):
+    """
+    找出自上次快照以来有变化的机型：
+    - 有任务在上次快照当天或之后被创建/修改（按 task_updated_time；计数 UPDATE 和 rerender_richtext 也会写入该字段）
+    - 有任务被删除或移到其他机型：原机型从动态日志中取得（删除记录的原值为所属机型 id），
+      不必对全部任务重新 GROUP BY 比对总数
+    """
+    since = _start_of_day(last_date)
+    changed = set(
+        Task.objects.filter(task_updated_time__gte=since)
+        .values_list('task_belongsto_model_id', flat=True)
+        .distinct()
+    )
+    previous_models = (
+        TaskActivityRecord.objects.filter(activity_created_time__gte=since)
+        .filter(Q(activity_action='deleted') | Q(activity_action='updated', activity_field='task_belongsto_model_id'))
+        .exclude(activity_old_value='')
+        .values_list('activity_old_value', flat=True)
+        .distinct()
+    )
+    changed.update(int(model_id) for model_id in previous_models if model_id.isdigit())
+    return changed
+
+
+def _count_rows(day, model_ids=None):
+    tasks = Task.objects.all()
+    if model_ids is not None:
+        tasks = tasks.filter(task_belongsto_model_id__in=model_ids)
+    grouped = (
+        tasks.values_list('task_belongsto_project_id', 'task_belongsto_model_id', 'task_status', 'task_type', 'task_priority')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    return [
+        ProjectStatusSnapshot(
+            snapshot_date=day,
+            snapshot_belongsto_project_id_id=project_id,
+            snapshot_belongsto_model_id_id=model_id,
+            snapshot_task_status=status,
+            snapshot_task_type=task_type,
+            snapshot_task_priority=priority,
+            snapshot_task_count=total,
+        )
+        for project_id, model_id, status, task_type, priority, total in grouped
+    ]
+
+
+def update_snapshots(day=None):
+    """
+    增量生成截至 day（默认今天）的每日快照，返回 (补齐天数, 重新统计的机型数)
+    - 缺失的中间日期沿用上一份快照（两次运行之间的变化计入 day 当天）
+    - day 当天只对有变化的机型重新执行 GROUP BY，其余机型直接沿用上一份快照
+    - 统计的是当前任务数据，无法还原过去某天的状态，因此 day 不能早于已有的最新快照，否则抛出 ValueError
+    """
+    day = day or timezone.localdate()
+    last_date = (
+        ProjectStatusSnapshot.objects.order_by('-snapshot_date')
+        .values_list('snapshot_date', flat=True)
+        .first()
+    )
+    if last_date is not None and day < last_date:
+        raise ValueError(f'快照日期 {day} 早于已有的最新快照 {last_date}，无法按当前数据回填过去的快照')
+
+    with transaction.atomic():
+        if last_date is None:
+            rows = _count_rows(day)
+            ProjectStatusSnapshot.objects.bulk_create(rows, batch_size=1000)
+            return 0, len({row.snapshot_belongsto_model_id_id for row in rows})
+
+        changed = _changed_model_ids(last_date)
+        previous = list(ProjectStatusSnapshot.objects.filter(snapshot_date=last_date))
+        unchanged_rows = [row for row in previous if row.snapshot_belongsto_model_id_id not in changed]
+
+        gap_days = 0
+        new_rows = []
+        if last_date < day:
+            cursor = last_date + timedelta(days=1)
+            while cursor < day:
+                new_rows.extend(_copy_rows(previous, cursor))
+                cursor += timedelta(days=1)
+                gap_days += 1
+            new_rows.extend(_copy_rows(unchanged_rows, day))
+        else:
+            # 当天重复运行：只替换有变化机型的快照
+            ProjectStatusSnapshot.objects.filter(snapshot_date=day, snapshot_belongsto_model_id__in=changed).delete()
+
+        if changed:
+            new_rows.extend(_count_rows(day, changed))
+        ProjectStatusSnapshot.objects.bulk_create(new_rows, batch_size=1000)
+    return gap_days, len(changed)
+
+
+def flow_series(snapshots, start, end):
+    """
+    从快照表读取日期区间内的累积流图与燃尽图数据
+    单次按 (项目|机型, 日期) 索引的范围扫描
+    """
+    grouped = (
+        snapshots.filter(snapshot_date__gte=start, snapshot_date__lte=end)
+        .values_list('snapshot_date', 'snapshot_task_status')
+        .annotate(total=Sum('snapshot_task_count'))
+        .order_by('snapshot_date')
+    )
+    by_date = defaultdict(dict)
+    for snapshot_date, status, total in grouped:
+        by_date[snapshot_date][status] = total
+
+    dates = sorted(by_date)
+    statuses = {
+        status: [by_date[snapshot_date].get(status, 0) for snapshot_date in dates]
+        for status, _ in Task.TASK_STATUS_CHOICES
+    }
+    remaining = [
+        sum(total for status, total in by_date[snapshot_date].items() if status not in CLOSED_STATUSES)
+        for snapshot_date in dates
+    ]
+    return {
+        'dates': [snapshot_date.isoformat() for snapshot_date in dates],
+        'statuses': statuses,
+        'remaining': remaining,
+    }
@@ -0,0 +1,229 @@
+import gzip
+import mimetypes
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.template.utils import get_app_template_dirs
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，缺失时只生成 gzip 版本
+    brotli = None
+
+try:
+    from fontTools import subset as font_subset
+    from fontTools.ttLib import TTFont
+except ImportError:  # fontTools 为可选依赖，缺失时保留完整字体文件
+    font_subset = None
+
+# 需要预压缩的文本类资源；woff/woff2 等本身已压缩的格式不再处理
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.map', '.txt', '.json', '.html')
+COMPRESS_MIN_SIZE = 512
+
+ICON_CSS = 'css/bootstrap-icons.css'
+ICON_FONTS = ('fonts/bootstrap-icons.woff2', 'fonts/bootstrap-icons.woff')
+ICON_SPRITE = 'icons/bootstrap-icons.svg'
+
+ICON_CLASS_RE = re.compile(r'\bbi-([a-z0-9]+(?:-[a-z0-9]+)*)')
+ICON_RULE_RE = re.compile(r'^\.bi-([a-z0-9-]+)::before\s*\{\s*content:\s*"\\([0-9a-f]+)";\s*\}\s*$', re.MULTILINE)
+SPRITE_SYMBOL_RE = re.compile(r'<symbol\b[^>]*\bid="([^"]+)"[^>]*>.*?</symbol>', re.DOTALL)
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MUTABLE_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+
+def find_used_icons():
+    """扫描模板和自定义脚本中出现的 bi-* 图标名，外加 TASKS_EXTRA_ICONS 中动态拼接的图标"""
+    used = set(getattr(settings, 'TASKS_EXTRA_ICONS', ()))
+    template_dirs = list(get_app_template_dirs('templates'))
+    for engine in settings.TEMPLATES:
+        template_dirs.extend(Path(d) for d in engine.get('DIRS', []))
+    script_dirs = [Path(d) for d in getattr(settings, 'STATICFILES_DIRS', [])]
+
+    for directory, suffixes in [(d, ('.html', '.txt')) for d in template_dirs] + [(d, ('.js',)) for d in script_dirs]:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith(suffixes) and not filename.endswith('.min.js'):
+                    with open(os.path.join(root, filename), encoding='utf-8', errors='ignore') as f:
+                        used.update(ICON_CLASS_RE.findall(f.read()))
+    return used
+
+
+def subset_icon_css(css, used):
+    """只保留用到的图标规则，返回 (新的 CSS, 用到的字形码位)"""
+    codepoints = set()
+
+    def keep(match):
+        if match.group(1) in used:
+            codepoints.add(int(match.group(2), 16))
+            return match.group(0)
+        return ''
+
+    subset = ICON_RULE_RE.sub(keep, css)
+    return re.sub(r'\n{2,}', '\n', subset), codepoints
+
+
+def subset_icon_sprite(svg, used):
+    return SPRITE_SYMBOL_RE.sub(lambda m: m.group(0) if m.group(1) in used else '', svg)
+
+
+def subset_icon_font(path, codepoints):
+    if font_subset is None or not codepoints:
+        return False
+    flavor = 'woff2' if path.endswith('.woff2') else 'woff'
+    if flavor == 'woff2' and brotli is None:
+        return False
+    options = font_subset.Options()
+    options.flavor = flavor
+    options.layout_features = ['*']
+    font = TTFont(path)
+    subsetter = font_subset.Subsetter(options=options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    font.flavor = flavor
+    font.save(path)
+    return True
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    collectstatic 时：
+    - 将图标 CSS、字体和 SVG 精灵图裁剪为模板实际用到的图标
+    - 为所有资源生成带内容哈希的文件名（Manifest）
+    - 为文本类资源生成 .gz 和 .br 预压缩版本
+    """
+
+    # 第三方 .min 文件带有 sourceMappingURL 但未附带 .map 文件，不处理该引用
+    patterns = tuple(
+        (extension, tuple(
+            pattern for pattern in extension_patterns
+            if 'sourceMappingURL' not in (pattern[0] if isinstance(pattern, tuple) else pattern)
+        ))
+        for extension, extension_patterns in ManifestStaticFilesStorage.patterns
+    )
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = self._subset_icons(dict(paths))
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            yield name, hashed_name, processed
+        if not dry_run:
+            for name in self.hashed_files.values():
+                self._compress(name)
+
+    def stored_name(self, name):
+        # 尚未执行 collectstatic（开发、测试环境）时回退到原始文件名
+        if not self.hashed_files and not self.exists(self.manifest_name):
+            return name
+        return super().stored_name(name)
+
+    def _subset_icons(self, paths):
+        """
+        裁剪后的图标文件写入 STATIC_ROOT，并让后续哈希处理读取裁剪后的版本
+        始终基于源文件裁剪，未重新复制的文件也能反映模板中新增的图标
+        """
+        if ICON_CSS not in paths:
+            return paths
+        used = find_used_icons()
+        css, codepoints = subset_icon_css(self._read_source(paths, ICON_CSS).decode('utf-8'), used)
+        self._overwrite(ICON_CSS, css.encode('utf-8'))
+        paths[ICON_CSS] = (self, ICON_CSS)
+
+        for font in ICON_FONTS:
+            if font in paths:
+                self._overwrite(font, self._read_source(paths, font))
+                subset_icon_font(self.path(font), codepoints)
+                paths[font] = (self, font)
+
+        if ICON_SPRITE in paths:
+            svg = subset_icon_sprite(self._read_source(paths, ICON_SPRITE).decode('utf-8'), used)
+            self._overwrite(ICON_SPRITE, svg.encode('utf-8'))
+            paths[ICON_SPRITE] = (self, ICON_SPRITE)
+        return paths
+
+    def _read_source(self, paths, name):
+        storage, path = paths[name]
+        with storage.open(path) as f:
+            return f.read()
+
+    def _overwrite(self, name, content):
+        with open(self.path(name), 'wb') as f:
+            f.write(content)
+
+    def _compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        path = self.path(name)
+        with open(path, 'rb') as f:
+            content = f.read()
+        if len(content) < COMPRESS_MIN_SIZE:
+            return
+
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(content):
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+
+
+@lru_cache(maxsize=1)
+def _hashed_names():
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for part in header.split(','):
+        token, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(token.strip().lower())
+    return accepted
+
+
+def serve_precompressed(request, path):
+    """
+    从 STATIC_ROOT 提供静态文件：
+    按 Accept-Encoding 选择 .br/.gz 预压缩版本，带哈希的文件名设置一年 immutable 缓存
+    """
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('文件不存在')
+    if not os.path.isfile(fullpath):
+        raise Http404('文件不存在')
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    served_path, content_encoding = fullpath, encoding
+    if encoding is None:
+        accepted = _accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        for token, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if token in accepted and os.path.isfile(fullpath + suffix):
+                served_path, content_encoding = fullpath + suffix, token
+                break
+
+    stat = os.stat(served_path)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(open(served_path, 'rb'), content_type=content_type or 'application/octet-stream')
+        response['Content-Length'] = stat.st_size
+        if content_encoding:
+            response['Content-Encoding'] = content_encoding
+
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Vary'] = 'Accept-Encoding'
+    immutable = path.replace(os.sep, '/') in _hashed_names()
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if immutable else MUTABLE_CACHE_CONTROL
+    return response
@@ -1,3 +1,1652 @@
-from django.test import TestCase
+import hashlib
+import gzip
+import hmac
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.db.models.signals import post_save
+from django.http import Http404, HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import rendering
+from .checks import check_shared_cache
+from .conditional import table_states
+from .filters import saved_filter_specs, saved_filters_with_counts
+from .middleware import ActivityLogMiddleware
+from .models import Project, ProjectModel, Task, TaskCommitRecord, TaskCommentRecord, TrickRecord, TaskActivityRecord, SavedTaskFilter, NotificationEvent, RecurringTaskTemplate, ProjectWebhook, WebhookOutboxEvent, ProjectStatusSnapshot
+from .notifications import deliver_digests
+from .occurrences import materialize_occurrences
+from .reports import cycle_time_stats, select_group, workload_matrix
+from .rollout import fan_out_task, rollout_progress
+from .rows import STATUS_BADGES, task_rows
+from .similarity import SimilarityIndex, get_index, rebuild_index, signatures, similar_tasks, task_text
+from .recurrence import iter_occurrences, parse_rrule
+from .rendering import content_hash, render_markdown, render_plain
+from .snapshot import read_snapshot, snapshot_models, write_snapshot
+from .snapshots import update_snapshots
+from .static_pipeline import (
+    ICON_CSS, ICON_FONTS, ICON_SPRITE, IMMUTABLE_CACHE_CONTROL, MUTABLE_CACHE_CONTROL,
+    _hashed_names, brotli, font_subset, serve_precompressed, subset_icon_css, subset_icon_sprite,
+)
+from .webhooks import ConnectionPool, deliver_webhooks
+
+
+class AdminChangelistQueryCountTests(TestCase):
+    """后台列表页的查询次数应为常数，不随行数或关联表大小增长"""
+
+    # 每个列表页允许的查询上限（会话、用户、计数、列表、已选筛选项等）
+    MAX_QUERIES = 8
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.project = Project.objects.create(project_name='项目', project_creator=cls.admin_user)
+        cls.model = ProjectModel.objects.create(
+            model_name='机型', model_creator=cls.admin_user, model_belongsto_project_id=cls.project,
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+        self.counter = 0
+        # 项目 Webhook 配置缓存在测试回滚后失效
+        self.addCleanup(cache.clear)
+
+    def add_rows(self, count):
+        for _ in range(count):
+            self.counter += 1
+            user = User.objects.create_user(f'user{self.counter}')
+            project = Project.objects.create(
+                project_name=f'项目{self.counter}', project_description='描述' * 100, project_creator=user,
+            )
+            ProjectModel.objects.create(
+                model_name=f'机型{self.counter}', model_creator=user, model_belongsto_project_id=project,
+            )
+            task = Task.objects.create(
+                task_title=f'任务{self.counter}',
+                task_description='很长的描述' * 200,
+                task_creator=user,
+                task_assigned_to_user_id=user,
+                task_belongsto_project_id=self.project,
+                task_belongsto_model_id=self.model,
+            )
+            TaskCommitRecord.objects.create(
+                commit_git_hash=f'{self.counter:040x}',
+                commit_message='提交信息' * 100,
+                commit_url=f'https://git.example.com/{self.counter}',
+                commit_submit_time=timezone.now(),
+                commit_belongsto_task_id=task,
+            )
+            TaskCommentRecord.objects.create(
+                comment_content='评论' * 100, comment_creator=user, comment_belongsto_task_id=task,
+            )
+            TrickRecord.objects.create(trick_title=f'技巧{self.counter}', trick_content='内容' * 100, trick_creator=user)
+            Task.objects.filter(pk=task.pk).update(task_status='in_progress')
+            TaskActivityRecord.objects.create(
+                activity_action='updated', activity_task_title=task.task_title,
+                activity_actor=user, activity_belongsto_task_id=task,
+            )
+            SavedTaskFilter.objects.create(
+                filter_name=f'筛选{self.counter}', filter_owner=user, filter_task_status='pending',
+                filter_belongsto_project_id=self.project, filter_belongsto_model_id=self.model,
+            )
+            RecurringTaskTemplate.objects.create(
+                template_title=f'周期任务{self.counter}', template_rrule='FREQ=WEEKLY', template_start_date=date(2024, 1, 1),
+                template_assigned_to_user_id=user, template_belongsto_project_id=project,
+            )
+            webhook = ProjectWebhook.objects.create(
+                webhook_name=f'Webhook{self.counter}', webhook_url='http://127.0.0.1:9/hook', webhook_belongsto_project_id=project,
+            )
+            WebhookOutboxEvent.objects.create(outbox_webhook=webhook, outbox_event='task.created', outbox_payload={'task': {'id': task.pk}})
+
+    def count_queries(self, url):
+        # 先请求一次，使会话和用户缓存生效
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assertConstantQueries(self, url):
+        self.add_rows(2)
+        few = self.count_queries(url)
+        self.add_rows(10)
+        many = self.count_queries(url)
+        self.assertEqual(few, many)
+        self.assertLessEqual(many, self.MAX_QUERIES)
+
+    def changelist_url(self, model, query=''):
+        url = reverse(f'admin:tasks_{model._meta.model_name}_changelist')
+        return f'{url}?{query}' if query else url
+
+    def test_project_changelist(self):
+        self.assertConstantQueries(self.changelist_url(Project))
+
+    def test_model_changelist(self):
+        self.assertConstantQueries(self.changelist_url(ProjectModel))
+
+    def test_task_changelist(self):
+        self.assertConstantQueries(self.changelist_url(Task))
+
+    def test_task_changelist_filtered_by_model(self):
+        query = f'task_belongsto_model_id__id__exact={self.model.pk}'
+        self.assertConstantQueries(self.changelist_url(Task, query))
+
+    def test_commit_changelist(self):
+        self.assertConstantQueries(self.changelist_url(TaskCommitRecord))
+
+    def test_comment_changelist(self):
+        self.assertConstantQueries(self.changelist_url(TaskCommentRecord))
+
+    def test_trick_changelist(self):
+        self.assertConstantQueries(self.changelist_url(TrickRecord))
+
+    def test_activity_changelist(self):
+        self.assertConstantQueries(self.changelist_url(TaskActivityRecord))
+
+    def test_saved_filter_changelist(self):
+        self.assertConstantQueries(self.changelist_url(SavedTaskFilter))
+
+    def test_notification_changelist(self):
+        self.assertConstantQueries(self.changelist_url(NotificationEvent))
+
+    def test_recurring_template_changelist(self):
+        self.assertConstantQueries(self.changelist_url(RecurringTaskTemplate))
+
+    def test_webhook_changelist(self):
+        self.assertConstantQueries(self.changelist_url(ProjectWebhook))
+
+    def test_webhook_outbox_changelist(self):
+        self.assertConstantQueries(self.changelist_url(WebhookOutboxEvent))
+
+    def test_changelist_does_not_load_full_text(self):
+        self.add_rows(1)
+        response = self.client.get(self.changelist_url(Task))
+        task = response.context['cl'].result_list[0]
+        self.assertIn('task_description', task.get_deferred_fields())
+        self.assertIn('task_description_html', task.get_deferred_fields())
+        self.assertNotContains(response, '很长的描述' * 20)
+
+
+class SavedFilterCountTests(TestCase):
+    """侧边栏筛选结果数：一次聚合查询，数据库中相关表的状态不变时使用缓存"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner')
+        cls.project = Project.objects.create(project_name='项目')
+        cls.model = ProjectModel.objects.create(model_name='机型', model_belongsto_project_id=cls.project)
+        for index, status in enumerate(['pending', 'pending', 'in_progress', 'completed']):
+            Task.objects.create(
+                task_title=f'任务{index}', task_status=status, task_assigned_to_user_id=cls.user,
+                task_belongsto_project_id=cls.project, task_belongsto_model_id=cls.model,
+            )
+        cls.all_filter = SavedTaskFilter.objects.create(filter_name='全部', filter_owner=cls.user)
+        cls.pending_filter = SavedTaskFilter.objects.create(filter_name='待处理', filter_owner=cls.user, filter_task_status='pending')
+        cls.search_filter = SavedTaskFilter.objects.create(filter_name='搜索', filter_owner=cls.user, filter_query='任务3')
+
+    def setUp(self):
+        cache.clear()
+
+    def counts(self):
+        return {item['name']: item['count'] for item in saved_filters_with_counts(self.user)}
+
+    def test_counts_use_one_aggregate_query_and_cache(self):
+        # 一次查询相关表的状态，一次查询筛选列表，一次条件聚合
+        with self.assertNumQueries(3):
+            self.assertEqual(self.counts(), {'全部': 4, '待处理': 2, '搜索': 1})
+        # 命中缓存时只查询状态；调用方已查询过状态时不再查询
+        with self.assertNumQueries(1):
+            self.counts()
+        states = table_states(*saved_filter_specs(self.user))
+        with self.assertNumQueries(0):
+            saved_filters_with_counts(self.user, states)
+
+    def test_other_process_changes_invalidate_counts(self):
+        self.counts()
+        # 模拟其他进程的修改：不经过信号，本进程的任务数据版本不变
+        Task.objects.filter(task_status='in_progress').update(task_status='pending', task_updated_time=timezone.now() + timedelta(seconds=1))
+        self.assertEqual(self.counts()['待处理'], 3)
+
+    def test_task_change_invalidates_counts(self):
+        self.counts()
+        task = Task.objects.filter(task_status='in_progress').get()
+        task.task_status = 'pending'
+        task.save()
+        self.assertEqual(self.counts()['待处理'], 3)
+
+    def test_filter_change_invalidates_counts(self):
+        self.counts()
+        SavedTaskFilter.objects.create(filter_name='已完成', filter_owner=self.user, filter_task_status='completed')
+        self.assertEqual(self.counts()['已完成'], 1)
+        self.pending_filter.delete()
+        self.assertNotIn('待处理', self.counts())
+
+    def test_task_list_applies_saved_filter(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('tasks:task_list'), {'filter': self.pending_filter.id})
+        self.assertEqual(len(response.context['tasks']), 2)
+        self.assertEqual(response.context['active_filter'], self.pending_filter)
+
+
+    def test_duplicate_name_shows_error(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('tasks:saved_filter_create'), {'filter_name': '全部'}, follow=True)
+        self.assertContains(response, '已存在名为“全部”的筛选。')
+        self.assertEqual(SavedTaskFilter.objects.filter(filter_owner=self.user, filter_name='全部').count(), 1)
+
+class AuthCacheTests(TestCase):
+    """会话和用户缓存放在共享缓存中：一处退出登录或修改密码后，持有同一会话的其他请求立即失效"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user('owner', password='old-password')
+        self.assertTrue(self.client.login(username='owner', password='old-password'))
+
+    def same_session_client(self):
+        # 模拟另一个 worker 处理同一浏览器会话的请求
+        other = Client()
+        other.cookies = self.client.cookies
+        return other
+
+    def test_cached_identity_skips_queries(self):
+        self.client.get(reverse('tasks:home'))
+        queries = CaptureQueriesContext(connection)
+        with queries:
+            self.assertEqual(self.client.get(reverse('tasks:home')).status_code, 200)
+        # 会话和用户都从缓存读取，识别身份不产生任何查询
+        identity = [
+            query for query in queries.captured_queries
+            if '"django_session"' in query['sql'] or 'FROM "auth_user" WHERE "auth_user"."id"' in query['sql']
+        ]
+        self.assertEqual(identity, [])
+
+    def test_logout_ends_session_everywhere(self):
+        other = self.same_session_client()
+        self.assertEqual(other.get(reverse('tasks:home')).status_code, 200)
+        self.client.get(reverse('logout'))
+        response = other.get(reverse('tasks:home'))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].startswith('/accounts/login/'))
+
+    def test_password_change_ends_other_sessions(self):
+        other = self.same_session_client()
+        self.assertEqual(other.get(reverse('tasks:home')).status_code, 200)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+        response = other.get(reverse('tasks:home'))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].startswith('/accounts/login/'))
+
+    def test_deploy_check_requires_shared_cache(self):
+        self.assertEqual([message.id for message in check_shared_cache(None)], ['tasks.W001'])
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379/1'}}):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+@override_settings(TASK_NOTIFICATION_DIGEST_WINDOW=300, TASK_NOTIFICATION_BATCH_SIZE=2)
+class NotificationDigestTests(TestCase):
+    """通知在请求中只记录事件，由 deliver_digests 按收件人合并发送"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = User.objects.create_user('creator', 'creator@example.com')
+        cls.project = Project.objects.create(project_name='项目')
+        cls.model = ProjectModel.objects.create(model_name='机型', model_belongsto_project_id=cls.project)
+
+    def create_task(self, assignee, title='任务'):
+        return Task.objects.create(
+            task_title=title, task_creator=self.creator, task_assigned_to_user_id=assignee,
+            task_belongsto_project_id=self.project, task_belongsto_model_id=self.model,
+        )
+
+    def later(self):
+        return timezone.now() + timedelta(seconds=301)
+
+    def test_events_are_coalesced_into_one_digest(self):
+        assignee = User.objects.create_user('assignee', 'assignee@example.com')
+        task = self.create_task(assignee)
+        for status in ('in_progress', 'completed'):
+            task.task_status = status
+            task.save()
+        TaskCommentRecord.objects.create(comment_content='看一下', comment_creator=self.creator, comment_belongsto_task_id=task)
+
+        # 合并窗口内不发送
+        self.assertEqual(deliver_digests(), (0, 0))
+
+        sent, processed = deliver_digests(now=self.later())
+        self.assertEqual(sent, 2)
+        self.assertEqual(processed, NotificationEvent.objects.count())
+        message = next(m for m in mail.outbox if m.to == ['assignee@example.com'])
+        self.assertIn('任务已分配给您', message.body)
+        self.assertIn('待处理 → 已完成', message.body)
+        self.assertIn('1 条新评论', message.body)
+        self.assertFalse(NotificationEvent.objects.filter(notification_sent_time__isnull=True).exists())
+
+        # 已发送的事件不会重复发送
+        self.assertEqual(deliver_digests(now=self.later()), (0, 0))
+
+    def test_reassigned_task_drops_stale_assignment(self):
+        first = User.objects.create_user('first', 'first@example.com')
+        second = User.objects.create_user('second', 'second@example.com')
+        task = self.create_task(first)
+        task.task_assigned_to_user_id = second
+        task.save()
+        deliver_digests(now=self.later())
+        self.assertEqual([m.to for m in mail.outbox], [['second@example.com']])
+
+    def test_delivery_queries_do_not_grow_with_recipients(self):
+        for index in range(6):
+            user = User.objects.create_user(f'user{index}', f'user{index}@example.com')
+            self.create_task(user, f'任务{index}')
+        # 每批 2 个收件人：(收件人、事件、用户、任务、标记已发送) × 3 批 + 最后一次空查询
+        with self.assertNumQueries(16):
+            sent, _ = deliver_digests(now=self.later())
+        self.assertEqual(sent, 6)
+
+
+class RecurringTaskTests(TestCase):
+    """周期任务：RRULE 展开，批量生成可重复运行，并从水位线继续"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner')
+        cls.project = Project.objects.create(project_name='项目')
+        cls.models = ProjectModel.objects.bulk_create(
+            ProjectModel(model_name=f'机型{index}', model_belongsto_project_id=cls.project) for index in range(5)
+        )
+
+    def create_template(self, rrule, **kwargs):
+        kwargs.setdefault('template_start_date', date(2024, 1, 1))
+        return RecurringTaskTemplate.objects.create(
+            template_title='周检', template_rrule=rrule, template_assigned_to_user_id=self.user,
+            template_belongsto_project_id=self.project, **kwargs,
+        )
+
+    def test_rrule_occurrences(self):
+        start, end = date(2024, 1, 1), date(2024, 3, 31)
+        self.assertEqual(
+            list(iter_occurrences('FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH', start, start, date(2024, 1, 20))),
+            [date(2024, 1, 1), date(2024, 1, 4), date(2024, 1, 15), date(2024, 1, 18)],
+        )
+        # 不存在的日期跳过，负数表示倒数第几天
+        self.assertEqual(
+            list(iter_occurrences('FREQ=MONTHLY;BYMONTHDAY=30,-1', start, start, end)),
+            [date(2024, 1, 30), date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 30), date(2024, 3, 31)],
+        )
+        # COUNT 从开始日期起计数，与查询区间无关
+        self.assertEqual(list(iter_occurrences('FREQ=DAILY;COUNT=3', start, date(2024, 1, 2), end)), [date(2024, 1, 2), date(2024, 1, 3)])
+        self.assertEqual(list(iter_occurrences('FREQ=MONTHLY;BYMONTHDAY=31;UNTIL=20240229', start, start, end)), [date(2024, 1, 31)])
+        for invalid in ('', 'FREQ=YEARLY', 'FREQ=DAILY;INTERVAL=0', 'FREQ=WEEKLY;BYDAY=XX', 'FREQ=DAILY;BYMONTHDAY=1', 'FREQ=DAILY;FOO=1'):
+            with self.assertRaises(ValueError):
+                parse_rrule(invalid)
+
+    def test_materialize_is_idempotent_and_incremental(self):
+        template = self.create_template('FREQ=WEEKLY;BYDAY=MO', template_deadline_days=2)
+        created, _ = materialize_occurrences(today=date(2024, 1, 1), horizon_days=27)
+        # 4 个周一 × 5 个机型
+        self.assertEqual(created, 20)
+        template.refresh_from_db()
+        self.assertEqual(template.template_materialized_until, date(2024, 1, 28))
+        task = template.occurrences.order_by('task_occurrence_date', 'id').first()
+        self.assertEqual(task.task_title, '周检 2024-01-01')
+        self.assertEqual(timezone.localdate(task.task_deadline), date(2024, 1, 3))
+        self.assertEqual(TaskActivityRecord.objects.filter(activity_action='created').count(), 20)
+
+        # 重复运行不会重复生成；水位线回退时由唯一约束去重
+        self.assertEqual(materialize_occurrences(today=date(2024, 1, 1), horizon_days=27), (0, 0))
+        RecurringTaskTemplate.objects.filter(pk=template.pk).update(template_materialized_until=None)
+        self.assertEqual(materialize_occurrences(today=date(2024, 1, 1), horizon_days=27)[0], 0)
+
+        # 窗口后移时只生成新增的日期
+        self.assertEqual(materialize_occurrences(today=date(2024, 1, 8), horizon_days=27)[0], 5)
+        self.assertEqual(template.occurrences.count(), 25)
+
+    def test_watermark_waits_for_models(self):
+        project = Project.objects.create(project_name='新项目')
+        template = RecurringTaskTemplate.objects.create(
+            template_title='日检', template_rrule='FREQ=DAILY', template_start_date=date(2024, 1, 1),
+            template_belongsto_project_id=project,
+        )
+        # 项目下还没有机型：不生成，也不推进水位线
+        self.assertEqual(materialize_occurrences(today=date(2024, 1, 1), horizon_days=6, templates=[template]), (0, 0))
+        template.refresh_from_db()
+        self.assertIsNone(template.template_materialized_until)
+
+        ProjectModel.objects.create(model_name='机型', model_belongsto_project_id=project)
+        self.assertEqual(materialize_occurrences(today=date(2024, 1, 3), horizon_days=4, templates=[template]), (7, 1))
+        self.assertEqual(template.occurrences.order_by('task_occurrence_date').first().task_occurrence_date, date(2024, 1, 1))
+
+    def test_rerun_after_watermark_reset_records_only_new_tasks(self):
+        template = self.create_template('FREQ=WEEKLY;BYDAY=MO', template_belongsto_model_id=self.models[0])
+        self.assertEqual(materialize_occurrences(today=date(2024, 1, 1), horizon_days=13)[0], 2)
+        RecurringTaskTemplate.objects.filter(pk=template.pk).update(template_materialized_until=None)
+        # 已存在的 2 个日期被唯一约束跳过，只记录新增日期的任务
+        self.assertEqual(materialize_occurrences(today=date(2024, 1, 1), horizon_days=27)[0], 2)
+        self.assertEqual(template.occurrences.count(), 4)
+        self.assertEqual(TaskActivityRecord.objects.filter(activity_action='created').count(), 4)
+
+    def test_materialize_queries_do_not_grow_with_models(self):
+        self.create_template('FREQ=DAILY')
+        self.create_template('FREQ=WEEKLY', template_belongsto_model_id=self.models[0])
+        with CaptureQueriesContext(connection) as context:
+            created, templates = materialize_occurrences(today=date(2024, 1, 1), horizon_days=89)
+        self.assertEqual((created, templates), (90 * 5 + 13, 2))
+        # 除批量 INSERT（批次数由数据库参数上限决定）外，查询数与模板、机型数量无关
+        queries = [query['sql'] for query in context.captured_queries]
+        inserts = [sql for sql in queries if sql.startswith('INSERT')]
+        self.assertLessEqual(len(queries) - len(inserts), 8)
+        self.assertLess(len(inserts), created / 10)
+
+
+class SnapshotTests(TestCase):
+    """快照导出后恢复，数据（包括主键和自动时间字段）保持不变"""
+
+    def dump(self):
+        return {
+            model._meta.label: list(model._base_manager.order_by('pk').values_list())
+            for model in snapshot_models()
+        }
+
+    def test_round_trip(self):
+        user = User.objects.create_user('owner', 'owner@example.com')
+        project = Project.objects.create(project_name='项目', project_creator=user)
+        model = ProjectModel.objects.create(model_name='机型', model_belongsto_project_id=project)
+        source = Task.objects.create(
+            task_title='源任务', task_description='**描述**', task_creator=user,
+            task_belongsto_project_id=project, task_belongsto_model_id=model,
+        )
+        Task.objects.create(
+            task_title='子任务', task_source_task_id=source, task_deadline=timezone.now(),
+            task_belongsto_project_id=project, task_belongsto_model_id=model,
+        )
+        TaskCommentRecord.objects.create(comment_content='评论', comment_creator=user, comment_belongsto_task_id=source)
+        RecurringTaskTemplate.objects.create(
+            template_title='周检', template_rrule='FREQ=WEEKLY', template_start_date=date(2024, 1, 1),
+            template_belongsto_project_id=project,
+        )
+        before = self.dump()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'snapshot.jsonl.gz')
+            counts = write_snapshot(path)
+            self.assertEqual(counts['tasks.task'], 2)
+            # 目标表非空时拒绝恢复
+            with self.assertRaises(ValueError):
+                read_snapshot(path)
+            read_snapshot(path, flush=True)
+
+        self.assertEqual(self.dump(), before)
+        # 恢复后自增序列继续可用
+        self.assertGreater(Project.objects.create(project_name='新项目').pk, project.pk)
+
+
+class StatusSnapshotTests(TestCase):
+    """每日状态快照：只重新统计有变化的机型，缺失日期沿用上一份快照，不接受早于最新快照的日期"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(project_name='项目')
+        cls.model = ProjectModel.objects.create(model_name='机型A', model_belongsto_project_id=cls.project)
+        cls.other_model = ProjectModel.objects.create(model_name='机型B', model_belongsto_project_id=cls.project)
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        for model, count in ((self.model, 3), (self.other_model, 2)):
+            for index in range(count):
+                Task.objects.create(task_title=f'{model.model_name}{index}', task_belongsto_project_id=self.project, task_belongsto_model_id=model)
+        Task.objects.update(task_updated_time=timezone.now() - timedelta(days=10))
+        TaskActivityRecord.objects.update(activity_created_time=timezone.now() - timedelta(days=10))
+
+    def totals(self, day):
+        return dict(
+            ProjectStatusSnapshot.objects.filter(snapshot_date=day)
+            .values_list('snapshot_belongsto_model_id').annotate(total=Sum('snapshot_task_count')).order_by()
+        )
+
+    def test_incremental_updates(self):
+        start = self.today - timedelta(days=3)
+        self.assertEqual(update_snapshots(start), (0, 2))
+        self.assertEqual(self.totals(start), {self.model.pk: 3, self.other_model.pk: 2})
+
+        # 没有变化：中间日期沿用上一份快照，不重新统计
+        self.assertEqual(update_snapshots(start + timedelta(days=2)), (1, 0))
+        self.assertEqual(self.totals(start + timedelta(days=1)), self.totals(start))
+        self.assertEqual(self.totals(start + timedelta(days=2)), self.totals(start))
+
+        # 任务被修改：只重新统计所在机型
+        task = Task.objects.filter(task_belongsto_model_id=self.model).first()
+        task.task_status = 'completed'
+        task.save()
+        self.assertEqual(update_snapshots(), (0, 1))
+        self.assertEqual(
+            ProjectStatusSnapshot.objects.get(snapshot_date=self.today, snapshot_belongsto_model_id=self.model, snapshot_task_status='completed').snapshot_task_count,
+            1,
+        )
+
+        # 任务被删除：从动态日志找到原机型，当天重复运行时替换该机型的快照
+        Task.objects.filter(task_belongsto_model_id=self.other_model).first().delete()
+        gap_days, changed = update_snapshots()
+        self.assertEqual((gap_days, changed), (0, 2))
+        self.assertEqual(self.totals(self.today), {self.model.pk: 3, self.other_model.pk: 1})
+
+        # 任务移到其他机型：原机型和新机型都重新统计
+        task.task_belongsto_model_id = self.other_model
+        task.save()
+        update_snapshots()
+        self.assertEqual(self.totals(self.today), {self.model.pk: 2, self.other_model.pk: 2})
+        self.assertEqual(self.totals(start), {self.model.pk: 3, self.other_model.pk: 2})
+
+    def test_update_paths_bypassing_save_are_detected(self):
+        update_snapshots(self.today - timedelta(days=1))
+        # 评论计数的 UPDATE
+        task = Task.objects.filter(task_belongsto_model_id=self.model).first()
+        TaskCommentRecord.objects.create(comment_content='评论', comment_belongsto_task_id=task)
+        self.assertEqual(update_snapshots(), (0, 1))
+
+        # 渲染器升级后的批量重新渲染
+        Task.objects.update(task_updated_time=timezone.now() - timedelta(days=10))
+        TaskActivityRecord.objects.update(activity_created_time=timezone.now() - timedelta(days=10))
+        with mock.patch.object(rendering, 'RENDERER_VERSION', 'next'):
+            call_command('rerender_richtext', stdout=StringIO())
+        self.assertEqual(update_snapshots(self.today + timedelta(days=1)), (0, 2))
+
+    def test_rejects_dates_before_latest_snapshot(self):
+        update_snapshots()
+        with self.assertRaises(ValueError):
+            update_snapshots(self.today - timedelta(days=1))
+        with self.assertRaises(CommandError):
+            call_command('update_status_snapshots', date=(self.today - timedelta(days=1)).isoformat(), stdout=StringIO())
+        self.assertFalse(ProjectStatusSnapshot.objects.exclude(snapshot_date=self.today).exists())
+
+
+class CycleTimeTests(TestCase):
+    """状态变化自动记录开始/结束时间；交付周期分位数按分组计算并缓存，其他进程修改数据后缓存失效"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner')
+        cls.project = Project.objects.create(project_name='项目')
+        cls.model = ProjectModel.objects.create(model_name='机型', model_belongsto_project_id=cls.project)
+
+    def setUp(self):
+        cache.clear()
+
+    def create_completed(self, lead_days, cycle_days, task_type='feature'):
+        end = timezone.now()
+        task = Task.objects.create(
+            task_title='任务', task_type=task_type, task_status='completed',
+            task_belongsto_project_id=self.project, task_belongsto_model_id=self.model,
+        )
+        Task.objects.filter(pk=task.pk).update(
+            task_created_time=end - timedelta(days=lead_days),
+            task_start_time=end - timedelta(days=cycle_days),
+            task_end_time=end,
+        )
+        return task
+
+    def test_status_changes_fill_start_and_end_time(self):
+        task = Task.objects.create(task_title='任务', task_belongsto_project_id=self.project, task_belongsto_model_id=self.model)
+        self.assertIsNone(task.task_start_time)
+        task = Task.objects.get(pk=task.pk)
+        task.task_status = 'in_progress'
+        task.save(update_fields=['task_status'])
+        task = Task.objects.get(pk=task.pk)
+        started = task.task_start_time
+        self.assertIsNotNone(started)
+        task.task_status = 'completed'
+        task.save()
+        task = Task.objects.get(pk=task.pk)
+        self.assertIsNotNone(task.task_end_time)
+        # 重新打开时清除结束时间，开始时间保持首次开始处理的时间
+        task.task_status = 'in_progress'
+        task.save()
+        task = Task.objects.get(pk=task.pk)
+        self.assertIsNone(task.task_end_time)
+        self.assertEqual(task.task_start_time, started)
+
+    def test_percentiles_by_group_are_cached(self):
+        for days in range(1, 11):
+            self.create_completed(days * 2, days)
+        self.create_completed(100, 50, task_type='bug')
+        with self.assertNumQueries(2):
+            stats = cycle_time_stats('type')
+        # 命中缓存时只查询任务表的状态
+        with self.assertNumQueries(1):
+            cycle_time_stats('type')
+        feature = next(row for row in stats['groups'] if row['key'] == 'feature')
+        self.assertEqual(feature['cycle_time'], {'count': 10, 'p50': 5.5, 'p85': 8.65, 'p95': 9.55})
+        self.assertEqual(feature['lead_time']['p50'], 11.0)
+        self.assertEqual(stats['overall']['cycle_time']['count'], 11)
+        self.assertEqual(cycle_time_stats(type='bug')['overall']['lead_time']['p50'], 100.0)
+
+        # 任务变更后重新计算
+        self.create_completed(1, 1, task_type='bug')
+        self.assertEqual(cycle_time_stats('type')['overall']['cycle_time']['count'], 12)
+
+        # 模拟其他进程的修改：不经过信号，本进程的任务数据版本不变
+        Task.objects.filter(task_type='bug').update(task_status='pending', task_updated_time=timezone.now() + timedelta(seconds=1))
+        self.assertEqual(cycle_time_stats('type')['overall']['cycle_time']['count'], 10)
+
+    def test_report_page_and_json(self):
+        self.create_completed(3, 2)
+        self.client.force_login(self.user)
+        url = reverse('tasks:cycle_time')
+        self.assertEqual(self.client.get(url, {'group': 'project'}).status_code, 200)
+        response = self.client.get(url, {'group': 'assignee', 'format': 'json'})
+        self.assertEqual(response.json()['groups'][0]['name'], '未分配')
+        self.assertEqual(self.client.get(url, {'project': 'x', 'format': 'json'}).status_code, 400)
+
+
+class WorkloadTests(TestCase):
+    """团队负载矩阵：按负责人 × 状态 × 优先级计数，可按项目拆分、导出 CSV；其他进程修改数据后缓存失效"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice')
+        cls.bob = User.objects.create_user('bob')
+        cls.project = Project.objects.create(project_name='项目A')
+        cls.other_project = Project.objects.create(project_name='项目B')
+        cls.model = ProjectModel.objects.create(model_name='机型A', model_belongsto_project_id=cls.project)
+        cls.other_model = ProjectModel.objects.create(model_name='机型B', model_belongsto_project_id=cls.other_project)
+        for user, status, priority, model, count in (
+            (cls.alice, 'pending', 'high', cls.model, 2),
+            (cls.alice, 'in_progress', 'low', cls.other_model, 1),
+            (cls.bob, 'pending', 'high', cls.other_model, 3),
+            (None, 'completed', 'urgent', cls.model, 1),
+        ):
+            for _ in range(count):
+                Task.objects.create(
+                    task_title='任务', task_status=status, task_priority=priority, task_assigned_to_user_id=user,
+                    task_belongsto_project_id=model.model_belongsto_project_id, task_belongsto_model_id=model,
+                )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def cell(self, workload, matrix, username, status, priority):
+        users = [name for _, name in workload['users']]
+        return int(matrix[users.index(username), workload['statuses'].index(status), workload['priorities'].index(priority)])
+
+    def test_matrix_and_split(self):
+        workload = workload_matrix()
+        matrix = select_group(workload)
+        self.assertEqual(self.cell(workload, matrix, 'alice', 'pending', 'high'), 2)
+        self.assertEqual(self.cell(workload, matrix, 'bob', 'pending', 'high'), 3)
+        self.assertEqual(self.cell(workload, matrix, '未分配', 'completed', 'urgent'), 1)
+        self.assertEqual(int(matrix.sum()), 7)
+
+        workload = workload_matrix('project')
+        self.assertEqual([name for _, name in workload['groups']], ['项目A', '项目B'])
+        matrix = select_group(workload, self.other_project.pk)
+        self.assertEqual(self.cell(workload, matrix, 'alice', 'in_progress', 'low'), 1)
+        self.assertEqual(self.cell(workload, matrix, 'alice', 'pending', 'high'), 0)
+        self.assertEqual(int(select_group(workload).sum()), 7)
+
+    def test_csv_export(self):
+        self.client.force_login(self.alice)
+        response = self.client.get(reverse('tasks:workload'), {'split': 'project', 'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = response.content.decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0], '分组,负责人,任务状态,任务优先级,任务数')
+        self.assertEqual(sorted(lines[1:]), sorted([
+            '项目A,alice,pending,high,2',
+            '项目A,未分配,completed,urgent,1',
+            '项目B,alice,in_progress,low,1',
+            '项目B,bob,pending,high,3',
+        ]))
+
+    def test_cache_follows_database_state(self):
+        self.assertEqual(int(select_group(workload_matrix()).sum()), 7)
+        with self.assertNumQueries(1):
+            workload_matrix()
+        # 模拟其他进程的修改：不经过信号，本进程的任务数据版本不变
+        Task.objects.filter(task_assigned_to_user_id=self.bob).update(task_status='completed', task_updated_time=timezone.now() + timedelta(seconds=1))
+        workload = workload_matrix()
+        self.assertEqual(self.cell(workload, select_group(workload), 'bob', 'completed', 'high'), 3)
+        Task.objects.filter(task_assigned_to_user_id=None).delete()
+        self.assertEqual(int(select_group(workload_matrix()).sum()), 6)
+
+
+class FanOutTests(TestCase):
+    """横展：一次批量创建各机型的关联任务，已有关联任务的机型跳过，进度一次聚合查询"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner')
+        cls.project = Project.objects.create(project_name='项目')
+        cls.models = ProjectModel.objects.bulk_create(
+            ProjectModel(model_name=f'机型{index}', model_belongsto_project_id=cls.project) for index in range(6)
+        )
+        other = Project.objects.create(project_name='其他项目')
+        ProjectModel.objects.create(model_name='其他机型', model_belongsto_project_id=other)
+        cls.source = Task.objects.create(
+            task_title='修复休眠唤醒问题', task_description='描述', task_type='bug', task_creator=cls.user,
+            task_belongsto_project_id=cls.project, task_belongsto_model_id=cls.models[0],
+        )
+
+    def test_fan_out_skips_covered_models(self):
+        first = fan_out_task(self.source, [self.models[1].id, self.models[2].id], creator=self.user)
+        self.assertEqual(len(first), 2)
+        self.assertEqual({task.task_type for task in Task.objects.filter(task_source_task_id=self.source)}, {'feedback'})
+
+        # 全部机型：跳过源任务所在机型和已横展的机型，其他项目的机型不受影响
+        with CaptureQueriesContext(connection) as context:
+            second = fan_out_task(self.source, creator=self.user)
+        self.assertEqual({task.task_belongsto_model_id_id for task in second}, {model.id for model in self.models[3:]})
+        self.assertEqual(sum(sql['sql'].startswith('INSERT INTO "tasks_task"') for sql in context.captured_queries), 1)
+        self.assertEqual(fan_out_task(self.source), [])
+        self.assertEqual(TaskActivityRecord.objects.filter(activity_action='created', activity_belongsto_task_id__task_source_task_id=self.source).count(), 5)
+
+    def test_progress_is_one_query(self):
+        fan_out_task(self.source, [self.models[1].id, self.models[2].id])
+        Task.objects.filter(task_source_task_id=self.source, task_belongsto_model_id=self.models[1]).update(task_status='completed')
+        with self.assertNumQueries(1):
+            progress = rollout_progress(self.source)
+        self.assertEqual(
+            {key: progress[key] for key in ('models', 'covered', 'tasks', 'completed', 'pending', 'percent')},
+            {'models': 5, 'covered': 2, 'tasks': 2, 'completed': 1, 'pending': 1, 'percent': 50},
+        )
+
+    def test_fan_out_view(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('tasks:task_fan_out', args=[self.source.id]), {'all_models': '1'})
+        self.assertRedirects(response, reverse('tasks:task_detail', args=[self.source.id]))
+        self.assertEqual(self.source.sub_tasks.count(), 5)
+        response = self.client.get(reverse('tasks:task_detail', args=[self.source.id]))
+        self.assertContains(response, '已覆盖 5/5 个机型')
+
+
+class SimilarityIndexTests(TestCase):
+    """相似任务索引：由命令构建并保存，保存/删除任务后增量更新，新进程从磁盘加载；重建期间的增量不会丢失"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner')
+        cls.project = Project.objects.create(project_name='项目')
+        cls.model = ProjectModel.objects.create(model_name='机型', model_belongsto_project_id=cls.project)
+        for title in ('蓝牙耳机连接后断开', '相机对焦模糊', '休眠唤醒后屏幕黑屏'):
+            cls.create_task(title)
+
+    @classmethod
+    def create_task(cls, title):
+        return Task.objects.create(
+            task_title=title, task_type='bug', task_belongsto_project_id=cls.project, task_belongsto_model_id=cls.model,
+        )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = override_settings(TASK_SIMILARITY_INDEX_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def similar(self, title):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('tasks:task_similar'), {'title': title})
+        return [item['title'] for item in response.json()['results']]
+
+    def test_suggestions_follow_task_changes(self):
+        # 请求中不构建索引
+        self.assertEqual(self.similar('休眠唤醒黑屏'), [])
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'base.npz')))
+        rebuild_index()
+        self.assertEqual(self.similar('休眠唤醒黑屏')[0], '休眠唤醒后屏幕黑屏')
+        self.assertEqual(self.similar(''), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task = self.create_task('蓝牙连接失败')
+        self.assertIn('蓝牙连接失败', self.similar('蓝牙连接失败了'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task.task_title = '充电发热严重'
+            task.save()
+        self.assertNotIn('蓝牙连接失败', self.similar('蓝牙连接失败了'))
+        self.assertEqual(self.similar('充电发热'), ['充电发热严重'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+        self.assertEqual(self.similar('充电发热'), [])
+
+        # 新进程：从基础文件和增量日志加载，结果一致
+        fresh = SimilarityIndex(self.directory)
+        self.assertTrue(fresh.sync())
+        self.assertEqual(fresh.query('休眠唤醒黑屏'), get_index().query('休眠唤醒黑屏'))
+        self.assertEqual(fresh.query('充电发热'), [])
+
+    def test_bulk_created_tasks_are_indexed(self):
+        rebuild_index()
+        other_model = ProjectModel.objects.create(model_name='机型二', model_belongsto_project_id=self.project)
+        source = self.create_task('扬声器播放破音')
+        with self.captureOnCommitCallbacks(execute=True):
+            copy, = fan_out_task(source, [other_model.id])
+        results = similar_tasks('扬声器播放破音', exclude=(source.pk,))
+        self.assertEqual([item['id'] for item in results], [copy.pk])
+        self.assertEqual(results[0]['model'], '机型二')
+
+    def test_rebuild_compacts_delta_log(self):
+        call_command('build_similarity_index', stdout=StringIO())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_task('指纹识别慢')
+        self.assertIn('delta-1.bin', os.listdir(self.directory))
+        call_command('build_similarity_index', stdout=StringIO())
+        self.assertEqual([name for name in os.listdir(self.directory) if name.endswith(('.bin', '.npz'))], ['base.npz'])
+        self.assertEqual(self.similar('指纹识别很慢'), ['指纹识别慢'])
+
+    def test_rebuild_replays_records_appended_meanwhile(self):
+        rebuild_index()
+        index = get_index()
+        removed = Task.objects.get(task_title='相机对焦模糊')
+        since = index.delta_position()
+        # 重建读取数据库之后才追加的记录：其他进程新增和删除的任务
+        other = SimilarityIndex(self.directory)
+        other.update(10001, task_text('指纹识别慢', ''))
+        other.remove(removed.pk)
+        ids = np.array(sorted(Task.objects.values_list('id', flat=True)), dtype=np.int64)
+        sigs = signatures([task_text(title, excerpt) for title, excerpt in Task.objects.order_by('id').values_list('task_title', 'task_description_excerpt')])
+        index.write_base(ids, sigs, since)
+
+        self.assertEqual(index.generation, 2)
+        self.assertEqual(sorted(name for name in os.listdir(self.directory) if name.endswith('.bin')), ['delta-2.bin'])
+        for fresh in (index, SimilarityIndex(self.directory)):
+            self.assertEqual([task_id for task_id, _ in fresh.query('指纹识别慢')], [10001])
+            self.assertEqual(fresh.query('相机对焦模糊'), [])
+        # 旧进程中的实例追加时先切换到新一代的日志
+        other.update(10002, task_text('扬声器破音', ''))
+        self.assertEqual([task_id for task_id, _ in index.query('扬声器破音')], [10002])
+
+
+class WebhookReceiver(BaseHTTPRequestHandler):
+    """测试用的本地接收端：记录每个请求及其所用连接，按 server.status 返回状态码"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append((self.client_address, dict(self.headers), body))
+        self.send_response(self.server.status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@override_settings(TASK_WEBHOOK_BATCH_SIZE=10, TASK_WEBHOOK_RETRY_BASE=30)
+class WebhookTests(TestCase):
+    """出站 Webhook：事件随业务变更写入发件箱，按顺序批量投递，失败后退避重试"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner')
+        cls.project = Project.objects.create(project_name='项目')
+        cls.other_project = Project.objects.create(project_name='其他项目')
+        cls.model = ProjectModel.objects.create(model_name='机型', model_belongsto_project_id=cls.project)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), WebhookReceiver)
+        self.server.requests = []
+        self.server.status = 200
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.webhook = ProjectWebhook.objects.create(
+            webhook_name='同步', webhook_url=f'http://127.0.0.1:{self.server.server_port}/hook',
+            webhook_events='task.created,task.updated,comment.created', webhook_belongsto_project_id=self.project,
+        )
+
+    def create_task(self, title, project=None):
+        return Task.objects.create(
+            task_title=title, task_belongsto_project_id=project or self.project, task_belongsto_model_id=self.model,
+        )
+
+    def delivered_events(self):
+        return [event for _, _, body in self.server.requests for event in json.loads(body)['events']]
+
+    def test_events_are_delivered_in_order_in_batches(self):
+        tasks = [self.create_task(f'任务{index}') for index in range(25)]
+        tasks[0].task_status = 'in_progress'
+        tasks[0].save()
+        TaskCommentRecord.objects.create(comment_content='评论', comment_creator=self.user, comment_belongsto_task_id=tasks[1])
+        # 其他项目和未订阅的事件不进入发件箱
+        self.create_task('无关任务', project=self.other_project)
+        tasks[2].delete()
+        self.assertEqual(WebhookOutboxEvent.objects.count(), 27)
+
+        started = time.perf_counter()
+        delivered, requests, failed = deliver_webhooks()
+        elapsed = time.perf_counter() - started
+        self.assertEqual((delivered, requests, failed), (27, 3, 0))
+        self.assertLess(elapsed, 5)
+
+        events = self.delivered_events()
+        self.assertEqual([event['id'] for event in events], sorted(event['id'] for event in events))
+        self.assertEqual([event['data']['task']['title'] for event in events[:25]], [task.task_title for task in tasks])
+        self.assertEqual(events[25]['event'], 'task.updated')
+        self.assertEqual(events[25]['data']['changes'], [{'field': 'task_status', 'old': 'pending', 'new': 'in_progress'}])
+        self.assertEqual(events[26]['event'], 'comment.created')
+        # 同一次运行的请求复用一个 keep-alive 连接
+        self.assertEqual(len({address for address, _, _ in self.server.requests}), 1)
+
+        _, headers, body = self.server.requests[0]
+        expected = hmac.new(
+            self.webhook.webhook_secret.encode(), f"{headers['X-Webhook-Timestamp']}.".encode() + body, hashlib.sha256,
+        ).hexdigest()
+        self.assertEqual(headers['X-Webhook-Signature'], f'sha256={expected}')
+        self.assertFalse(WebhookOutboxEvent.objects.filter(outbox_delivered_time__isnull=True).exists())
+        self.assertEqual(deliver_webhooks(), (0, 0, 0))
+
+    def test_failed_delivery_backs_off_and_retries(self):
+        self.create_task('任务')
+        self.server.status = 500
+        now = timezone.now()
+        self.assertEqual(deliver_webhooks(now=now), (0, 1, 1))
+        self.webhook.refresh_from_db()
+        self.assertEqual(self.webhook.webhook_failure_count, 1)
+        self.assertEqual(self.webhook.webhook_last_error, 'HTTP 500')
+        self.assertGreaterEqual(self.webhook.webhook_next_attempt_time, now + timedelta(seconds=30))
+
+        # 退避期间不投递，之后成功投递并重置失败计数
+        self.server.status = 200
+        self.assertEqual(deliver_webhooks(now=now + timedelta(seconds=10)), (0, 0, 0))
+        self.assertEqual(deliver_webhooks(now=now + timedelta(minutes=1)), (1, 1, 0))
+        self.webhook.refresh_from_db()
+        self.assertEqual(self.webhook.webhook_failure_count, 0)
+        self.assertIsNone(self.webhook.webhook_next_attempt_time)
+        self.assertEqual(WebhookOutboxEvent.objects.get().outbox_attempts, 2)
+
+    def test_delivery_claims_a_lease(self):
+        for index in range(25):
+            self.create_task(f'任务{index}')
+        # 其他 worker 持有未过期的租约时跳过
+        ProjectWebhook.objects.filter(pk=self.webhook.pk).update(webhook_locked_until=timezone.now() + timedelta(seconds=60))
+        self.assertEqual(deliver_webhooks(), (0, 0, 0))
+
+        # 租约过期后可以认领；投递中途租约被其他 worker 接管时停止，不覆盖对方的状态
+        ProjectWebhook.objects.filter(pk=self.webhook.pk).update(webhook_locked_until=timezone.now() - timedelta(seconds=1))
+        taken_over = timezone.now() + timedelta(minutes=5)
+
+        class TakeoverPool(ConnectionPool):
+            def post(pool, url, body, headers):
+                ProjectWebhook.objects.filter(pk=self.webhook.pk).update(webhook_locked_until=taken_over)
+                return super().post(url, body, headers)
+
+        pool = TakeoverPool()
+        self.addCleanup(pool.close)
+        self.assertEqual(deliver_webhooks(pool=pool), (10, 1, 0))
+        self.webhook.refresh_from_db()
+        self.assertEqual(self.webhook.webhook_locked_until, taken_over)
+        self.assertIsNone(self.webhook.webhook_last_delivery_time)
+
+        # 正常投递结束后释放租约
+        ProjectWebhook.objects.filter(pk=self.webhook.pk).update(webhook_locked_until=None)
+        self.assertEqual(deliver_webhooks(), (15, 2, 0))
+        self.webhook.refresh_from_db()
+        self.assertIsNone(self.webhook.webhook_locked_until)
+        self.assertIsNotNone(self.webhook.webhook_last_delivery_time)
+
+    def test_events_roll_back_with_the_change(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.create_task('回滚的任务')
+            raise RuntimeError
+        self.assertFalse(WebhookOutboxEvent.objects.exists())
+
+    def test_deleting_project_drops_its_webhooks_and_events(self):
+        # 订阅全部事件，包括 task.deleted
+        self.webhook.webhook_events = ''
+        self.webhook.save()
+        for index in range(3):
+            self.create_task(f'任务{index}')
+        other_model = ProjectModel.objects.create(model_name='其他机型', model_belongsto_project_id=self.other_project)
+        other_webhook = ProjectWebhook.objects.create(
+            webhook_name='其他', webhook_url=self.webhook.webhook_url, webhook_belongsto_project_id=self.other_project,
+        )
+        self.project.delete()
+        # 级联删除任务时不再为正在删除的项目写入事件，不留下指向已删除 Webhook 的发件箱记录
+        connection.check_constraints()
+        self.assertFalse(ProjectWebhook.objects.filter(pk=self.webhook.pk).exists())
+        self.assertFalse(WebhookOutboxEvent.objects.exists())
+        # 其他项目不受影响
+        Task.objects.create(task_title='新任务', task_belongsto_project_id=self.other_project, task_belongsto_model_id=other_model)
+        self.assertEqual(list(WebhookOutboxEvent.objects.values_list('outbox_webhook', flat=True)), [other_webhook.pk])
+
+    def test_send_webhooks_command(self):
+        self.create_task('任务')
+        output = StringIO()
+        call_command('send_webhooks', stdout=output)
+        self.assertIn('已投递 1 个事件', output.getvalue())
+        self.assertEqual(len(self.server.requests), 1)
+
+
+class ConditionalGetTests(TestCase):
+    """页面带 ETag/Last-Modified：未变化时在查询和渲染之前返回 304，变化后重新渲染"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner')
+        cls.project = Project.objects.create(project_name='项目')
+        cls.model = ProjectModel.objects.create(model_name='机型', model_belongsto_project_id=cls.project)
+        cls.task = Task.objects.create(
+            task_title='任务', task_assigned_to_user_id=cls.user,
+            task_belongsto_project_id=cls.project, task_belongsto_model_id=cls.model,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def revalidate(self, url):
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('no-cache', response['Cache-Control'])
+        with CaptureQueriesContext(connection) as context:
+            again = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], HTTP_ACCEPT_ENCODING='gzip')
+        return response, again, len(context.captured_queries)
+
+    def test_unchanged_pages_return_304(self):
+        for url in (
+            reverse('tasks:task_list'),
+            reverse('tasks:project_list'),
+            reverse('tasks:project_detail', args=[self.project.id]),
+            reverse('tasks:task_detail', args=[self.task.id]),
+            reverse('tasks:tricks'),
+        ):
+            # 首次访问带表单的页面时才生成 CSRF cookie，先访问一次
+            self.client.get(url)
+            response, again, queries = self.revalidate(url)
+            self.assertEqual(again.status_code, 304, url)
+            self.assertLessEqual(queries, 2, url)
+            self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_changes_invalidate_validators(self):
+        url = reverse('tasks:task_list')
+        self.client.get(url)
+        response, _, _ = self.revalidate(url)
+        self.task.task_title = '新标题'
+        self.task.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+        response, _, _ = self.revalidate(url)
+        self.model.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+        # 查询参数不同的页面校验值不同
+        response, _, _ = self.revalidate(url)
+        self.assertEqual(self.client.get(f'{url}?task_status=pending', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_validators_come_from_database(self):
+        # 其他进程中的修改不会递增本进程的任务数据版本，缓存被清空后版本也会回到初始值
+        for url in (reverse('tasks:task_list'), reverse('tasks:project_detail', args=[self.project.id])):
+            self.client.get(url)
+            response, _, _ = self.revalidate(url)
+            Task.objects.filter(id=self.task.id).update(task_status='in_progress', task_updated_time=timezone.now())
+            cache.clear()
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200, url)
+
+        # 子任务出现在任务详情中
+        url = reverse('tasks:task_detail', args=[self.task.id])
+        self.client.get(url)
+        response, _, _ = self.revalidate(url)
+        Task.objects.bulk_create([Task(
+            task_title='子任务', task_source_task_id=self.task, task_belongsto_project_id=self.project,
+            task_belongsto_model_id=self.model,
+        )])
+        cache.clear()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_renderer_and_build_changes_invalidate_validators(self):
+        url = reverse('tasks:task_detail', args=[self.task.id])
+        self.client.get(url)
+        response, _, _ = self.revalidate(url)
+        with mock.patch.object(rendering, 'RENDERER_VERSION', 'next'):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        with mock.patch('tasks.conditional.build_marker', return_value='next'):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_pending_messages_skip_validation(self):
+        url = reverse('tasks:task_detail', args=[self.task.id])
+        self.client.post(url, {'update_status': '1', 'task_status': 'in_progress'})
+        pending = self.client.get(url)
+        self.assertFalse(pending.has_header('ETag'))
+        self.assertContains(pending, '任务状态更新成功')
+        self.assertTrue(self.client.get(url).has_header('ETag'))
+
+
+class TaskRowTests(TestCase):
+    """列表页使用精简任务行：一次查询取出项目名和机型名，不加载描述全文"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner')
+        cls.project = Project.objects.create(project_name='项目')
+        cls.model = ProjectModel.objects.create(model_name='机型', model_belongsto_project_id=cls.project)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def add_tasks(self, count):
+        start = Task.objects.count()
+        for index in range(start, start + count):
+            project = Project.objects.create(project_name=f'项目{index}')
+            model = ProjectModel.objects.create(model_name=f'机型{index}', model_belongsto_project_id=project)
+            Task.objects.create(
+                task_title=f'任务{index}', task_description='很长的描述' * 500, task_status='in_progress',
+                task_assigned_to_user_id=self.user, task_belongsto_project_id=project, task_belongsto_model_id=model,
+            )
+
+    def count_queries(self, url):
+        # 先请求一次，使会话、用户和侧边栏缓存生效
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, context.captured_queries
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        for url in (reverse('tasks:task_list'), reverse('tasks:home')):
+            self.add_tasks(2)
+            _, few = self.count_queries(url)
+            self.add_tasks(8)
+            response, many = self.count_queries(url)
+            self.assertEqual(len(few), len(many), url)
+            self.assertContains(response, '机型1')
+            self.assertContains(response, 'bg-primary')
+            self.assertFalse(any('"task_description",' in query['sql'] for query in many), url)
+
+    def test_home_uses_status_keys(self):
+        for status in ('pending', 'in_progress', 'on_hold', 'completed', 'cancelled'):
+            Task.objects.create(
+                task_title=f'到期{status}', task_status=status, task_deadline=timezone.now() + timedelta(days=1),
+                task_assigned_to_user_id=self.user, task_belongsto_project_id=self.project, task_belongsto_model_id=self.model,
+            )
+        response = self.client.get(reverse('tasks:home'))
+        due_soon = [row.status for row in response.context['due_soon_tasks']]
+        self.assertCountEqual(due_soon, ['pending', 'in_progress', 'on_hold'])
+        self.assertEqual(response.context['in_progress_tasks'], 1)
+        self.assertEqual(response.context['on_hold_tasks'], 1)
+        row = response.context['due_soon_tasks'][0]
+        self.assertEqual(row.status_display, dict(Task.TASK_STATUS_CHOICES)[row.status])
+
+    def test_home_today_tasks_match_any_time_of_day(self):
+        # 当天晚些时候截止的任务（不是零点）
+        deadline = timezone.localtime().replace(hour=23, minute=30, second=0, microsecond=0)
+        task = Task.objects.create(
+            task_title='今天截止', task_deadline=deadline, task_assigned_to_user_id=self.user,
+            task_belongsto_project_id=self.project, task_belongsto_model_id=self.model,
+        )
+        response = self.client.get(reverse('tasks:home'))
+        self.assertEqual([row.id for row in response.context['today_tasks']], [task.id])
+        self.assertContains(response, '今天有<span id="today-task-count">1</span>个待处理任务')
+
+    def test_every_status_has_its_badge(self):
+        self.assertEqual(set(STATUS_BADGES), set(dict(Task.TASK_STATUS_CHOICES)))
+        expected = {
+            'pending': 'bg-warning', 'in_progress': 'bg-primary', 'completed': 'bg-success',
+            'on_hold': 'bg-secondary', 'cancelled': 'bg-dark',
+        }
+        for status, badge in expected.items():
+            Task.objects.create(
+                task_title=f'徽标{status}', task_status=status, task_assigned_to_user_id=self.user,
+                task_belongsto_project_id=self.project, task_belongsto_model_id=self.model,
+            )
+        rows = task_rows(Task.objects.filter(task_title__startswith='徽标'))
+        self.assertEqual({row.status: row.status_badge for row in rows}, expected)
+
+    def test_project_detail_preview(self):
+        for index in range(7):
+            Task.objects.create(
+                task_title=f'项目任务{index}', task_belongsto_project_id=self.project, task_belongsto_model_id=self.model,
+            )
+        response, _ = self.count_queries(reverse('tasks:project_detail', args=[self.project.id]))
+        self.assertEqual(len(response.context['project_tasks']), 5)
+        self.assertEqual(response.context['project_tasks'][0].model_name, '机型')
+        self.assertContains(response, '查看全部 7 个任务')
+
+
+class PriorityRankTests(TestCase):
+    """优先级排序值：列表按紧急 > 高 > 中 > 低 排序，各种写入路径都保持与优先级一致"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(project_name='项目')
+        cls.model = ProjectModel.objects.create(model_name='机型', model_belongsto_project_id=cls.project)
+
+    def create_task(self, priority):
+        return Task.objects.create(
+            task_title=priority, task_priority=priority, task_belongsto_project_id=self.project, task_belongsto_model_id=self.model,
+        )
+
+    def test_ordering_uses_rank(self):
+        for priority in ('medium', 'urgent', 'low', 'high'):
+            self.create_task(priority)
+        self.assertEqual([task.task_title for task in Task.objects.all()], ['urgent', 'high', 'medium', 'low'])
+
+    def test_rank_follows_every_write_path(self):
+        task = self.create_task('low')
+        task.task_priority = 'high'
+        task.save(update_fields=['task_priority'])
+        self.assertEqual(Task.objects.get(pk=task.pk).task_priority_rank, 3)
+
+        Task.objects.filter(pk=task.pk).update(task_priority='urgent')
+        self.assertEqual(Task.objects.get(pk=task.pk).task_priority_rank, 4)
+
+        other = self.create_task('medium')
+        Task.objects.filter(pk=other.pk).update(task_priority=F('task_type'))
+        self.assertEqual(Task.objects.get(pk=other.pk).task_priority_rank, 0)
+
+        task.task_priority = 'low'
+        Task.objects.bulk_update([task], ['task_priority'])
+        self.assertEqual(Task.objects.get(pk=task.pk).task_priority_rank, 1)
+
+        Project.objects.filter(pk=self.project.pk).update(project_priority='urgent')
+        ProjectModel.objects.filter(pk=self.model.pk).update(model_priority='low')
+        self.assertEqual(Project.objects.get(pk=self.project.pk).project_priority_rank, 4)
+        self.assertEqual(ProjectModel.objects.get(pk=self.model.pk).model_priority_rank, 1)
+
+
+class TaskRecordTests(TestCase):
+    """评论/提交记录：冗余计数由信号原子维护，任务详情只渲染首页，其余通过 JSON 接口按游标分页"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner')
+        cls.project = Project.objects.create(project_name='项目')
+        cls.model = ProjectModel.objects.create(model_name='机型', model_belongsto_project_id=cls.project)
+        cls.task = Task.objects.create(task_title='任务', task_belongsto_project_id=cls.project, task_belongsto_model_id=cls.model)
+
+    def add_comment(self, content='评论'):
+        return TaskCommentRecord.objects.create(comment_content=content, comment_creator=self.user, comment_belongsto_task_id=self.task)
+
+    def add_commit(self, index=0):
+        return TaskCommitRecord.objects.create(
+            commit_git_hash=f'{index:040x}', commit_url=f'https://git.example.com/{index}',
+            commit_submit_time=timezone.now(), commit_belongsto_task_id=self.task,
+        )
+
+    def counts(self):
+        task = Task.objects.get(pk=self.task.pk)
+        return task.task_comment_count, task.task_commit_count
+
+    def test_counts_follow_records(self):
+        comment = self.add_comment()
+        self.add_commit()
+        self.assertEqual(self.counts(), (1, 1))
+        comment.delete()
+        self.assertEqual(self.counts(), (0, 1))
+
+    def test_stale_instance_save_keeps_counts(self):
+        stale = Task.objects.get(pk=self.task.pk)
+        self.add_comment()
+        self.add_commit()
+        stale.task_title = '新标题'
+        stale.save()
+        self.assertEqual(self.counts(), (1, 1))
+        self.assertEqual(Task.objects.get(pk=self.task.pk).task_title, '新标题')
+
+    def test_json_pages(self):
+        for index in range(25):
+            self.add_comment(f'评论{index}')
+            self.add_commit(index)
+        self.client.force_login(self.user)
+        for name, key in (('tasks:task_comments', 'content_html'), ('tasks:task_commits', 'git_hash')):
+            url = reverse(name, args=[self.task.id])
+            first = self.client.get(url).json()
+            self.assertEqual(len(first['results']), 20)
+            self.assertIn(key, first['results'][0])
+            second = self.client.get(url, {'cursor': first['next_cursor']}).json()
+            self.assertEqual(len(second['results']), 5)
+            self.assertIsNone(second['next_cursor'])
+            ids = [item['id'] for item in first['results'] + second['results']]
+            self.assertEqual(ids, sorted(ids, reverse=True))
+
+
+class ActivityLogTests(TestCase):
+    """任务动态：请求内的字段变更缓冲后一次写入，时间线和个人动态按游标分页"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner')
+        cls.other = User.objects.create_user('other')
+        cls.project = Project.objects.create(project_name='项目')
+        cls.model = ProjectModel.objects.create(model_name='机型', model_belongsto_project_id=cls.project)
+
+    def setUp(self):
+        self.task = Task.objects.create(
+            task_title='任务', task_creator=self.user, task_assigned_to_user_id=self.user,
+            task_belongsto_project_id=self.project, task_belongsto_model_id=self.model,
+        )
+        self.client.force_login(self.user)
+
+    def test_request_changes_are_written_in_one_insert(self):
+        data = {
+            'task_title': '新标题', 'task_description': '', 'task_priority': 'urgent', 'task_status': 'pending',
+            'task_type': 'feature', 'task_assigned_to_user_id': self.other.pk,
+            'task_belongsto_project_id': self.project.pk, 'task_belongsto_model_id': self.model.pk,
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(reverse('tasks:task_edit', args=[self.task.id]), data)
+        self.assertEqual(response.status_code, 302)
+        inserts = [query for query in context.captured_queries if query['sql'].startswith('INSERT INTO "tasks_taskactivityrecord"')]
+        self.assertEqual(len(inserts), 1)
+
+        changes = {
+            record.activity_field: (record.activity_old_value, record.activity_new_value)
+            for record in TaskActivityRecord.objects.filter(activity_action='updated')
+        }
+        self.assertEqual(changes, {
+            'task_title': ('任务', '新标题'),
+            'task_priority': ('medium', 'urgent'),
+            'task_assigned_to_user_id': (str(self.user.pk), str(self.other.pk)),
+        })
+        self.assertEqual(set(TaskActivityRecord.objects.filter(activity_action='updated').values_list('activity_actor', flat=True)), {self.user.pk})
+
+        items = self.client.get(reverse('tasks:task_activity', args=[self.task.id])).json()['results']
+        assignee = next(item for item in items if item['field'] == 'task_assigned_to_user_id')
+        self.assertEqual((assignee['old_value'], assignee['new_value'], assignee['actor']), ('owner', 'other', 'owner'))
+
+    def test_failed_request_discards_buffer(self):
+        before = TaskActivityRecord.objects.count()
+
+        def failing_view(request):
+            self.task.task_title = '不会记录'
+            self.task.save()
+            middleware.process_exception(request, RuntimeError())
+            return HttpResponse(status=500)
+
+        middleware = ActivityLogMiddleware(failing_view)
+        request = RequestFactory().get('/')
+        request.user = self.user
+        middleware(request)
+        self.assertEqual(TaskActivityRecord.objects.count(), before)
+
+    def test_timeline_and_feed_are_cursor_paged(self):
+        TaskActivityRecord.objects.bulk_create([
+            TaskActivityRecord(
+                activity_action='updated', activity_field='task_title', activity_new_value=f'标题{index}',
+                activity_task_title='任务', activity_belongsto_task_id=self.task, activity_task_assignee=self.user,
+            )
+            for index in range(25)
+        ])
+        total = TaskActivityRecord.objects.filter(activity_belongsto_task_id=self.task).count()
+        for url in (reverse('tasks:task_activity', args=[self.task.id]), reverse('tasks:activity_feed')):
+            seen = []
+            cursor = None
+            while True:
+                page = self.client.get(url, {'cursor': cursor} if cursor else {}).json()
+                seen += [item['id'] for item in page['results']]
+                cursor = page['next_cursor']
+                if cursor is None:
+                    break
+            self.assertEqual(len(seen), total, url)
+            self.assertEqual(seen, sorted(seen, reverse=True), url)
+
+
+class StaticPipelineTests(TestCase):
+    """collectstatic 裁剪图标、生成哈希文件名和预压缩版本；静态文件视图按 Accept-Encoding 选择版本"""
+
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source)
+        self.addCleanup(shutil.rmtree, self.root)
+        _hashed_names.cache_clear()
+        self.addCleanup(_hashed_names.cache_clear)
+
+    def write(self, directory, name, content):
+        path = os.path.join(directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def static_settings(self):
+        return override_settings(
+            STATIC_ROOT=self.root,
+            STATICFILES_DIRS=[self.source],
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'tasks.static_pipeline.CompressedManifestStaticFilesStorage'},
+            },
+            TASKS_EXTRA_ICONS=['alarm'],
+        )
+
+    def test_subset_helpers(self):
+        css = '.bi-house::before { content: "\\f425"; }\n.bi-alarm::before { content: "\\f102"; }\n.bi-x::before { content: "\\f62a"; }\n'
+        subset, codepoints = subset_icon_css(css, {'house', 'x'})
+        self.assertNotIn('bi-alarm', subset)
+        self.assertIn('bi-house', subset)
+        self.assertEqual(codepoints, {0xf425, 0xf62a})
+        svg = '<svg><symbol id="house"><path/></symbol><symbol id="alarm"><path/></symbol></svg>'
+        self.assertEqual(subset_icon_sprite(svg, {'house'}), '<svg><symbol id="house"><path/></symbol></svg>')
+
+    def test_collectstatic_subsets_hashes_and_compresses(self):
+        static_dir = os.path.join(settings.BASE_DIR, 'static')
+        for name in (ICON_CSS, *ICON_FONTS):
+            with open(os.path.join(static_dir, name), 'rb') as f:
+                self.write(self.source, name, f.read())
+        self.write(self.source, ICON_SPRITE, b'<svg><symbol id="house"><path/></symbol><symbol id="alarm"><path/></symbol><symbol id="unused-icon"><path/></symbol></svg>')
+        self.write(self.source, 'js/app.js', b'// bi-house\n' + b'console.log("x");\n' * 100)
+
+        with self.static_settings():
+            call_command('collectstatic', interactive=False, verbosity=0)
+            hashed = staticfiles_storage.hashed_files
+
+        css_path = os.path.join(self.root, hashed[ICON_CSS])
+        with open(css_path, encoding='utf-8') as f:
+            css = f.read()
+        # 模板中用到的、脚本中用到的和 TASKS_EXTRA_ICONS 中的图标保留，其余裁掉
+        self.assertIn('.bi-house::before', css)
+        self.assertIn('.bi-alarm::before', css)
+        self.assertIn('.bi-arrow-left::before', css)
+        self.assertNotIn('.bi-0-circle::before', css)
+        with open(os.path.join(self.root, hashed[ICON_SPRITE]), encoding='utf-8') as f:
+            sprite = f.read()
+        self.assertIn('id="alarm"', sprite)
+        self.assertNotIn('unused-icon', sprite)
+        if font_subset is not None:
+            self.assertLess(os.path.getsize(os.path.join(self.root, hashed[ICON_FONTS[0]])), os.path.getsize(os.path.join(static_dir, ICON_FONTS[0])))
+
+        script = os.path.join(self.root, hashed['js/app.js'])
+        self.assertNotEqual(hashed['js/app.js'], 'js/app.js')
+        with open(script, 'rb') as f:
+            content = f.read()
+        with open(script + '.gz', 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), content)
+        self.assertEqual(os.path.exists(script + '.br'), brotli is not None)
+        # 字体本身已压缩，不生成预压缩版本
+        self.assertFalse(os.path.exists(os.path.join(self.root, hashed[ICON_FONTS[0]]) + '.gz'))
+
+        with self.static_settings():
+            response = serve_precompressed(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'), hashed['js/app.js'])
+            self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            response.close()
+
+    def test_serve_negotiates_encoding(self):
+        self.write(self.root, 'js/app.js', b'plain')
+        self.write(self.root, 'js/app.js.gz', b'gzip')
+        self.write(self.root, 'js/app.js.br', b'brotli')
+        factory = RequestFactory()
+        cases = [
+            ('gzip, deflate, br', 'br', b'brotli'),
+            ('gzip', 'gzip', b'gzip'),
+            ('br;q=0, gzip;q=0.5', 'gzip', b'gzip'),
+            ('identity', None, b'plain'),
+            ('', None, b'plain'),
+        ]
+        with self.static_settings():
+            for header, encoding, body in cases:
+                response = serve_precompressed(factory.get('/', HTTP_ACCEPT_ENCODING=header), 'js/app.js')
+                self.assertEqual(response.get('Content-Encoding'), encoding, header)
+                self.assertEqual(b''.join(response.streaming_content), body, header)
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+                self.assertEqual(response['Content-Type'], 'text/javascript')
+                self.assertEqual(response['Cache-Control'], MUTABLE_CACHE_CONTROL)
+                response.close()
+
+            response = serve_precompressed(factory.get('/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']), 'js/app.js')
+            self.assertEqual(response.status_code, 304)
+
+    def test_serve_rejects_paths_outside_static_root(self):
+        secret = self.write(self.source, 'secret.txt', b'secret')
+        request = RequestFactory().get('/')
+        with self.static_settings():
+            for path in ('../' + os.path.basename(self.source) + '/secret.txt', secret, 'missing.js', '', 'js'):
+                with self.assertRaises(Http404, msg=path):
+                    serve_precompressed(request, path)
+
+
+class RichTextRenderingTests(TestCase):
+    """富文本渲染：转义原始 HTML、清洗不安全链接；渲染器版本递增后 rerender_richtext 重新渲染旧记录"""
+
+    def test_markdown_is_sanitized(self):
+        cases = [
+            '[a](javascript:alert(1))',
+            '[a](JaVaScRiPt:alert(1))',
+            '[a]( javascript:alert(1))',
+            '[a](&#106;avascript:alert(1))',
+            '[a](vbscript:msgbox(1))',
+            '[a](data:text/html;base64,PHNjcmlwdD4=)',
+            '![i](data:image/svg+xml;base64,PHN2Zz4=)',
+            '![i](javascript:alert(1))',
+            '[a][ref]\n\n[ref]: javascript:alert(1)',
+            '![i][ref]\n\n[ref]: data:image/png;base64,AAAA',
+            '<javascript:alert(1)>',
+        ]
+        for source in cases:
+            html = render_markdown(source)
+            self.assertNotRegex(html, r'(?i)(href|src)="(?!#")', source)
+
+        for source in ('<script>alert(1)</script>', 'x <img src=x onerror=alert(1)> y', '<a href="javascript:alert(1)">a</a>', '<div onclick="alert(1)">\nx\n</div>'):
+            html = render_markdown(source)
+            self.assertNotIn('<script', html, source)
+            self.assertNotIn('<img', html, source)
+            self.assertNotIn('<a ', html, source)
+            self.assertNotIn('<div', html, source)
+            self.assertIn('&lt;', html, source)
+
+        self.assertEqual(render_markdown('[ok](https://example.com)'), '<p><a href="https://example.com" rel="nofollow noopener">ok</a></p>')
+        self.assertIn('href="/tasks/1"', render_markdown('[task][t]\n\n[t]: /tasks/1'))
+        self.assertIn('title="t&quot; onmouseover=&quot;x"', render_markdown('[a](https://example.com \'t" onmouseover="x\')'))
+        self.assertEqual(render_plain('<b>x</b>\nline'), '<p>&lt;b&gt;x&lt;/b&gt;<br>line</p>')
+
+    def test_renderer_version_triggers_rerender(self):
+        project = Project.objects.create(project_name='项目')
+        model = ProjectModel.objects.create(model_name='机型', model_belongsto_project_id=project)
+        task = Task.objects.create(task_title='任务', task_belongsto_project_id=project, task_belongsto_model_id=model)
+        comment = TaskCommentRecord.objects.create(comment_content='**粗体**', comment_belongsto_task_id=task)
+        self.assertEqual(comment.comment_content_html, '<p><strong>粗体</strong></p>')
+
+        def rerender(*args):
+            out = StringIO()
+            call_command('rerender_richtext', *args, stdout=out)
+            return out.getvalue()
+
+        # 版本不变时内容哈希一致，不重新渲染
+        self.assertIn('评论记录: 重新渲染 0 条', rerender())
+
+        # 模拟旧版本渲染器留下的结果
+        TaskCommentRecord.objects.filter(pk=comment.pk).update(comment_content_html='<script>old</script>', comment_content_excerpt='old')
+        self.assertIn('评论记录: 重新渲染 0 条', rerender())
+        with mock.patch.object(rendering, 'RENDERER_VERSION', '2'):
+            output = rerender()
+            self.assertIn('评论记录: 重新渲染 1 条', output)
+            self.assertIn('任务: 重新渲染 1 条', output)
+            comment.refresh_from_db()
+            self.assertEqual(comment.comment_content_html, '<p><strong>粗体</strong></p>')
+            self.assertEqual(comment.comment_content_excerpt, '粗体')
+            self.assertEqual(comment.comment_content_hash, content_hash('markdown', '**粗体**'))
+            self.assertIn('评论记录: 重新渲染 0 条', rerender())
+        self.assertIn('评论记录: 重新渲染 1 条', rerender('--force'))
+
+
+class BoardTests(TestCase):
+    """看板：脚本只输出一次；拖动以版本号做条件更新，版本过期时返回 409；保存任务时本地递增版本号"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner')
+        cls.project = Project.objects.create(project_name='项目')
+        cls.model = ProjectModel.objects.create(model_name='机型', model_belongsto_project_id=cls.project)
+
+    def setUp(self):
+        self.task = Task.objects.create(
+            task_title='任务', task_creator=self.user, task_assigned_to_user_id=self.user,
+            task_belongsto_project_id=self.project, task_belongsto_model_id=self.model,
+        )
+        self.client.force_login(self.user)
+
+    def move(self, status, version, position=1.5):
+        return self.client.patch(
+            reverse('tasks:task_move', args=[self.task.id]),
+            json.dumps({'status': status, 'position': position, 'version': version}),
+            content_type='application/json',
+        )
+
+    def test_board_script_renders_once(self):
+        content = self.client.get(reverse('tasks:project_board', args=[self.project.id])).content.decode('utf-8')
+        self.assertEqual(content.count('let draggedCard = null;'), 1)
+        # 基础模板中的脚本保留
+        self.assertEqual(content.count('function loadModels('), 1)
+
+    def test_move_conflict_returns_current_state(self):
+        response = self.move('in_progress', self.task.task_version)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['version'], self.task.task_version + 1)
+
+        # 客户端持有过期的版本号：不修改，返回当前状态和版本号
+        response = self.move('completed', self.task.task_version, position=9)
+        self.assertEqual(response.status_code, 409)
+        data = response.json()
+        self.assertEqual((data['status'], data['position'], data['version']), ('in_progress', 1.5, self.task.task_version + 1))
+        task = Task.objects.get(pk=self.task.pk)
+        self.assertEqual((task.task_status, task.task_end_time), ('in_progress', None))
+        self.assertEqual(TaskActivityRecord.objects.filter(activity_belongsto_task_id=self.task, activity_field='task_status').count(), 1)
+
+    def test_save_increments_version_without_reloading(self):
+        seen = []
+
+        def receiver(sender, instance, created, **kwargs):
+            seen.append(instance.task_version)
+
+        post_save.connect(receiver, sender=Task)
+        self.addCleanup(post_save.disconnect, receiver, sender=Task)
+        version = self.task.task_version
+        self.task.task_title = '新标题'
+        with CaptureQueriesContext(connection) as context:
+            self.task.save()
+        self.assertFalse([query for query in context.captured_queries if query['sql'].startswith('SELECT "tasks_task"."id", "tasks_task"."task_version"')])
+        self.assertEqual(self.task.task_version, version + 1)
+        self.assertEqual(seen, [version + 1])
+        self.assertEqual(Task.objects.get(pk=self.task.pk).task_version, version + 1)
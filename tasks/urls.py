@@ -11,13 +11,32 @@ urlpatterns = [
     path('project/<int:project_id>/edit/', views.project_edit, name='project_edit'),
     path('project/<int:project_id>/', views.project_detail, name='project_detail'),
     path('project/<int:project_id>/models/', views.project_models, name='project_models'),
+    path('project/<int:project_id>/charts/flow/', views.project_flow_chart, name='project_flow_chart'),
+    path('project/<int:project_id>/board/', views.project_board, name='project_board'),
+    path('project/<int:project_id>/board/<str:status>/', views.project_board_column, name='project_board_column'),
     path('models/<int:model_id>/edit/', views.model_edit, name='model_edit'),
     path('models/<int:model_id>/delete/', views.model_delete, name='model_delete'),
+    path('models/<int:model_id>/charts/flow/', views.model_flow_chart, name='model_flow_chart'),
     path('task_list', views.task_list, name='task_list'),
+    path('filters/save/', views.saved_filter_create, name='saved_filter_create'),
+    path('filters/<int:filter_id>/delete/', views.saved_filter_delete, name='saved_filter_delete'),
     path('task/create/', views.task_create, name='task_create'),
+    path('task/similar/', views.task_similar, name='task_similar'),
     path('task/<int:task_id>/', views.task_detail, name='task_detail'),
     path('task/<int:task_id>/edit/', views.task_edit, name='task_edit'),
     path('task/<int:task_id>/delete/', views.task_delete, name='task_delete'),
+    path('task/<int:task_id>/activity/', views.task_activity, name='task_activity'),
+    path('task/<int:task_id>/comments/', views.task_comments, name='task_comments'),
+    path('task/<int:task_id>/commits/', views.task_commits, name='task_commits'),
+    path('task/<int:task_id>/move/', views.task_move, name='task_move'),
+    path('task/<int:task_id>/fan-out/', views.task_fan_out, name='task_fan_out'),
+    path('board/', views.user_board, name='board'),
+    path('board/user/<int:user_id>/', views.user_board, name='user_board'),
+    path('board/user/<int:user_id>/<str:status>/', views.user_board_column, name='user_board_column'),
+    path('activity/feed/', views.activity_feed, name='activity_feed'),
     path('calendar/', views.calendar_view, name='calendar'),
+    path('reports/workload/', views.workload_report, name='workload'),
+    path('reports/cycle-time/', views.cycle_time_report, name='cycle_time'),
     path('tricks/', views.tricks_view, name='tricks'),
+    path('tricks/<int:trick_id>/', views.trick_detail, name='trick_detail'),
 ]
\ No newline at end of file
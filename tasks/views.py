@@ -2,15 +2,40 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.forms import UserCreationForm
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, Http404
 from django.contrib.auth.models import User
-from django.db.models import Count, Q
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 from django.contrib import messages
-from datetime import timedelta, datetime
+from datetime import timedelta, datetime, date
+import csv
+import json
+import math
 
-from .models import PRIORITY_CHOICES, Task, Project, ProjectModel, TaskCommitRecord, TaskCommentRecord, TrickRecord
-from .forms import ProjectForm, ProjectModelForm, TaskForm, CommentForm, TrickForm, CommitForm
+from .models import PRIORITY_CHOICES, Task, Project, ProjectModel, TaskCommitRecord, TaskCommentRecord, TrickRecord, TaskActivityRecord, SavedTaskFilter
+from .forms import ProjectForm, ProjectModelForm, TaskForm, CommentForm, TrickForm, CommitForm, SavedTaskFilterForm
+from .activity import describe_activities, record_task_field_change
+from .caching import bump_task_cache_version
+from .conditional import conditional_page
+from .filters import task_filter_q
+from .rollout import fan_out_task, rollout_progress
+from .rows import task_rows
+from .rendering import EXCERPT_LENGTH
+from .similarity import DEFAULT_TOP_K, similar_tasks
+from .paging import cursor_paginate, parse_cursor, parse_position_cursor, position_paginate
+from .snapshots import flow_series
+from .reports import WORKLOAD_SPLITS, workload_matrix, select_group, iter_workload_csv_rows, CYCLE_TIME_FILTERS, CYCLE_TIME_GROUPS, cycle_time_stats
+
+ACTIVITY_PAGE_SIZE = 20
+RECORD_PAGE_SIZE = 20
+BOARD_COLUMN_PAGE_SIZE = 20
+CHART_DEFAULT_DAYS = 30
+# 项目详情页预览的任务数
+PROJECT_TASK_PREVIEW = 5
 
 # Create your views here.
 
@@ -51,29 +76,28 @@ def home(request):
     # 获取统计信息
     total_tasks = Task.objects.filter(task_assigned_to_user_id=request.user).count()
     pending_tasks = Task.objects.filter(task_assigned_to_user_id=request.user, task_status='pending').count()
-    in_progress_tasks = Task.objects.filter(task_assigned_to_user_id=request.user, task_status='in-progress').count()
+    in_progress_tasks = Task.objects.filter(task_assigned_to_user_id=request.user, task_status='in_progress').count()
     completed_tasks = Task.objects.filter(task_assigned_to_user_id=request.user, task_status='completed').count()
-    on_hold_tasks = Task.objects.filter(task_assigned_to_user_id=request.user, task_status='on-hold').count()
+    on_hold_tasks = Task.objects.filter(task_assigned_to_user_id=request.user, task_status='on_hold').count()
     cancelled_tasks = Task.objects.filter(task_assigned_to_user_id=request.user, task_status='cancelled').count()
 
     # 获取今天到期的任务
-    today = timezone.now().date()
-    today_tasks = Task.objects.filter(
+    # 截止时间是日期时间，按当前时区的日期比较
+    today = timezone.localdate()
+    today_tasks = task_rows(Task.objects.filter(
         task_assigned_to_user_id=request.user,
-        task_deadline=today,
-        task_status__in=['pending', 'in-progress', 'on-hold']
-    )
+        task_deadline__date=today,
+    ).exclude(task_status__in=Task.DONE_STATUSES))
 
     # 获取最近任务
-    recent_tasks = Task.objects.filter(task_assigned_to_user_id=request.user).order_by('-task_created_time')[:10]
+    recent_tasks = task_rows(Task.objects.filter(task_assigned_to_user_id=request.user).order_by('-task_created_time')[:10])
 
     # 获取即将到期的任务
-    due_soon_tasks = Task.objects.filter(
+    due_soon_tasks = task_rows(Task.objects.filter(
         task_assigned_to_user_id=request.user,
-        task_deadline__gte=today,
-        task_deadline__lte=today + timedelta(days=7),
-        task_status__in=['pending', 'in-progress', 'on-hold']
-    )
+        task_deadline__date__gte=today,
+        task_deadline__date__lte=today + timedelta(days=7),
+    ).exclude(task_status__in=Task.DONE_STATUSES))
 
     # 获取项目统计
     projects = Project.objects.annotate(
@@ -84,6 +108,12 @@ def home(request):
     # 获取所有项目用于侧边栏
     all_projects = Project.objects.all()[:6]  # 只取前6个项目显示在侧边栏
 
+    # 获取我负责任务的最新动态
+    feed_records, feed_next_cursor = cursor_paginate(
+        TaskActivityRecord.objects.filter(activity_task_assignee=request.user),
+        limit=ACTIVITY_PAGE_SIZE,
+    )
+
     context = {
         'total_tasks': total_tasks,
         'pending_tasks': pending_tasks,
@@ -95,11 +125,23 @@ def home(request):
         'due_soon_tasks': due_soon_tasks,
         'projects': projects,
         'all_projects': all_projects,  # 传递给侧边栏
+        'activity_feed': describe_activities(feed_records),
+        'activity_next_cursor': feed_next_cursor,
     }
 
     return render(request, 'tasks/home.html', context)
 
+def _catalog_state(project_id=None):
+    # 项目和机型
+    project_q = Q(id=project_id) if project_id else None
+    model_q = Q(model_belongsto_project_id=project_id) if project_id else None
+    return [(Project, 'project_updated_time', project_q), (ProjectModel, 'model_updated_time', model_q)]
+
+def _project_list_state(request):
+    return _catalog_state()
+
 @login_required
+@conditional_page(_project_list_state)
 def project_list(request):
     projects = Project.objects.all()
 
@@ -134,7 +176,7 @@ def project_edit(request, project_id):
     # 如果是管理员或创建者，则允许编辑
     project = get_object_or_404(Project, id=project_id)
     # 检查当前用户是否为管理员或创建者
-    if not (request.user == project.project_creator or request.user.is_superuser):
+    if not (project.project_creator_id == request.user.id or request.user.is_superuser):
         messages.error(request, '您没有权限编辑该项目。')
         return redirect('tasks:project_list')
     
@@ -155,7 +197,11 @@ def project_edit(request, project_id):
     
     return render(request, 'tasks/project_create.html', context)
 
+def _project_detail_state(request, project_id):
+    return [*_catalog_state(project_id), (Task, 'task_updated_time', Q(task_belongsto_project_id=project_id))]
+
 @login_required
+@conditional_page(_project_detail_state)
 def project_detail(request, project_id):
     # 如果是管理员或创建者，则允许编辑和删除
     project = get_object_or_404(Project, id=project_id)
@@ -191,10 +237,14 @@ def project_detail(request, project_id):
     else:
         model_form = ProjectModelForm()
         
+    project_tasks = task_rows(project.tasks.all()[:PROJECT_TASK_PREVIEW])
     context = {
         'project': project,
         'project_form': project_form,
         'model_form': model_form,
+        'project_tasks': project_tasks,
+        # 预览未取满时无需再 COUNT
+        'project_task_count': project.tasks.count() if len(project_tasks) == PROJECT_TASK_PREVIEW else len(project_tasks),
     }
     return render(request, 'tasks/project_detail.html', context)
 
@@ -203,7 +253,7 @@ def model_edit(request, model_id):
     model = get_object_or_404(ProjectModel, id=model_id)
     project = model.model_belongsto_project_id
     # 检查当前用户是否为管理员或创建者
-    if not (request.user == project.project_creator or request.user.is_superuser):
+    if not (project.project_creator_id == request.user.id or request.user.is_superuser):
         messages.error(request, '您没有权限编辑该机型。')
         return redirect('tasks:project_detail', project_id=project.id)
     
@@ -232,7 +282,7 @@ def model_delete(request, model_id):
     model = get_object_or_404(ProjectModel, id=model_id)
     project = model.model_belongsto_project_id
     # 检查当前用户是否为管理员或创建者
-    if not (request.user == project.project_creator or request.user.is_superuser):
+    if not (project.project_creator_id == request.user.id or request.user.is_superuser):
         messages.error(request, '您没有权限删除该机型。')
         return redirect('tasks:project_detail', project_id=project.id)
     
@@ -248,40 +298,90 @@ def model_delete(request, model_id):
     
     return render(request, 'tasks/model_confirm_delete.html', context)
 
+def _task_list_url(params, **overrides):
+    query = urlencode({name: value for name, value in {**params, **overrides}.items() if value})
+    url = reverse('tasks:task_list')
+    return f'{url}?{query}' if query else url
+
+def _task_list_state(request):
+    # 当前用户名下的任务已包含在公共校验值中，这里只需项目和机型（筛选链接）
+    return _catalog_state()
+
 @login_required
+@conditional_page(_task_list_state)
 def task_list(request):
     tasks = Task.objects.filter(task_assigned_to_user_id=request.user).order_by('-task_created_time')
-    # 处理并合并所有筛选条件
-    status_filter = request.GET.get('task_status')
-    project_filter = request.GET.get('project_id')
-    model_filter = request.GET.get('model_id')
-    search_query = request.GET.get('q')
-
-    if status_filter:
-        tasks = tasks.filter(task_status=status_filter)
-    if project_filter:
-        tasks = tasks.filter(task_belongsto_project_id=project_filter)
-    if model_filter:
-        tasks = tasks.filter(task_belongsto_model_id=model_filter)
-    if search_query:
-        tasks = tasks.filter(Q(task_title__icontains=search_query) | Q(task_description__icontains=search_query))
-    
+    # 处理并合并所有筛选条件；?filter= 时使用保存的筛选条件
+    active_filter = None
+    filter_id = request.GET.get('filter', '')
+    if filter_id.isdigit():
+        active_filter = SavedTaskFilter.objects.filter(id=filter_id, filter_owner=request.user).first()
+    if active_filter:
+        params = active_filter.params
+    else:
+        params = {name: request.GET.get(name) for name in ('task_status', 'project_id', 'model_id', 'q')}
+    tasks = tasks.filter(task_filter_q(params))
+
+    status_filter = params['task_status']
+    project_filter = str(params['project_id'] or '')
+    model_filter = str(params['model_id'] or '')
+    search_query = params['q']
+
     # 获取所有项目用于筛选
     all_projects = Project.objects.all()
     all_models = ProjectModel.objects.all()
 
+    status_links = [('', '全部任务')] + list(Task.TASK_STATUS_CHOICES)
     context = {
-        'tasks': tasks,
+        'tasks': task_rows(tasks),
         'projects': all_projects,
         'models': all_models,
+        'status_links': [
+            (label, _task_list_url(params, task_status=value), (status_filter or '') == value)
+            for value, label in status_links
+        ],
+        'project_links': [('全部项目', _task_list_url(params, project_id=None, model_id=None), not project_filter)] + [
+            (project.project_name, _task_list_url(params, project_id=project.id, model_id=None), project_filter == str(project.id))
+            for project in all_projects
+        ],
         'status_filter': status_filter,
         'project_filter': project_filter,
         'model_filter': model_filter,
         'search_query': search_query or '',
+        'active_filter': active_filter,
+        'has_filters': any(params.values()),
     }
 
     return render(request, 'tasks/task_list.html', context)
 
+@login_required
+@require_http_methods(['POST'])
+def saved_filter_create(request):
+    # 将当前的任务列表筛选条件保存为命名筛选
+    form = SavedTaskFilterForm(request.POST)
+    if not form.is_valid():
+        messages.error(request, '筛选条件有误，请检查后重试。')
+        return redirect('tasks:task_list')
+    saved_filter = form.save(commit=False)
+    saved_filter.filter_owner = request.user
+    # 重复提交时两次请求可能同时通过存在性检查，以唯一约束为准
+    try:
+        with transaction.atomic():
+            saved_filter.save()
+    except IntegrityError:
+        messages.error(request, f'已存在名为“{saved_filter.filter_name}”的筛选。')
+        return redirect('tasks:task_list')
+    messages.success(request, '筛选保存成功')
+    return redirect(saved_filter.get_absolute_url())
+
+@login_required
+@require_http_methods(['POST'])
+def saved_filter_delete(request, filter_id):
+    saved_filter = get_object_or_404(SavedTaskFilter, id=filter_id, filter_owner=request.user)
+    saved_filter.delete()
+    messages.success(request, '筛选已删除')
+    return redirect('tasks:task_list')
+
 @login_required
 def task_create(request):
     if request.method == 'POST':
@@ -306,7 +406,7 @@ def task_create(request):
 def task_edit(request, task_id):
     task = get_object_or_404(Task, id=task_id)
     # 检查当前用户是否为任务创建者或负责人，或管理员
-    if not (request.user == task.task_creator or request.user == task.task_assigned_to_user_id or request.user.is_superuser):
+    if not (request.user.id in (task.task_creator_id, task.task_assigned_to_user_id_id) or request.user.is_superuser):
         messages.error(request, '您没有权限编辑该任务。')
         return redirect('tasks:task_detail', task_id=task.id)
     
@@ -331,7 +431,7 @@ def task_edit(request, task_id):
 def task_delete(request, task_id):
     task = get_object_or_404(Task, id=task_id)
     # 检查当前用户是否为任务创建者或负责人，或管理员
-    if not (request.user == task.task_creator or request.user == task.task_assigned_to_user_id or request.user.is_superuser):
+    if not (request.user.id in (task.task_creator_id, task.task_assigned_to_user_id_id) or request.user.is_superuser):
         messages.error(request, '您没有权限删除该任务。')
         return redirect('tasks:task_detail', task_id=task.id)
     
@@ -346,11 +446,22 @@ def task_delete(request, task_id):
     
     return render(request, 'tasks/task_confirm_delete.html', context)
 
+def _task_detail_state(request, task_id):
+    # 评论、提交记录和动态的增删改不一定经过任务，单独统计；用户列表用于指派下拉框
+    return [
+        (Task, 'task_updated_time', Q(id=task_id) | Q(task_source_task_id=task_id)),
+        (TaskCommentRecord, 'comment_updated_time', Q(comment_belongsto_task_id=task_id)),
+        (TaskCommitRecord, 'commit_created_time', Q(commit_belongsto_task_id=task_id)),
+        (TaskActivityRecord, 'activity_created_time', Q(activity_belongsto_task_id=task_id)),
+        (Project, 'project_updated_time', None),
+        (ProjectModel, 'model_updated_time', None),
+        (User, 'date_joined', None),
+    ]
+
 @login_required
+@conditional_page(_task_detail_state)
 def task_detail(request, task_id):
-    task = get_object_or_404(Task, id=task_id)
-    commit_records = TaskCommitRecord.objects.filter(commit_belongsto_task_id=task).order_by('-commit_created_time')
-    comment_records = TaskCommentRecord.objects.filter(comment_belongsto_task_id=task).order_by('comment_created_time')
+    task = get_object_or_404(Task.objects.select_related('task_belongsto_project_id', 'task_belongsto_model_id', 'task_assigned_to_user_id'), id=task_id)
 
     if request.method == 'POST':
         if 'add_comment' in request.POST:
@@ -367,7 +478,6 @@ def task_detail(request, task_id):
             else:
                 messages.error(request, '评论内容不能为空。')
         elif 'add_commit' in request.POST:
-            print("Received POST data for commit:", request.POST)  # Debugging line
             commit_form = CommitForm(request.POST)
             if commit_form.is_valid():
                 commit = commit_form.save(commit=False)                
@@ -380,7 +490,7 @@ def task_detail(request, task_id):
                 messages.error(request, '提交记录信息有误，请检查表单。')
         elif 'update_status' in request.POST:
             new_status = request.POST.get('task_status')
-            if new_status in dict(Task.STATUS_CHOICES).keys():
+            if new_status in dict(Task.TASK_STATUS_CHOICES).keys():
                 task.task_status = new_status
                 task.save()
                 messages.success(request, '任务状态更新成功')
@@ -417,10 +527,34 @@ def task_detail(request, task_id):
     task_priorities = PRIORITY_CHOICES
     task_statuses = Task.TASK_STATUS_CHOICES
 
+    activity_records, activity_next_cursor = cursor_paginate(
+        TaskActivityRecord.objects.filter(activity_belongsto_task_id=task),
+        limit=ACTIVITY_PAGE_SIZE,
+    )
+
+    # 只渲染最新的若干条评论和提交记录，其余通过“加载更多”按游标分页获取
+    comments, comments_next_cursor = cursor_paginate(_task_comments(task), limit=RECORD_PAGE_SIZE)
+    commits, commits_next_cursor = cursor_paginate(_task_commits(task), limit=RECORD_PAGE_SIZE)
+
+    # 关联任务及横展进度
+    related_tasks = list(
+        task.sub_tasks.select_related('task_belongsto_model_id', 'task_assigned_to_user_id')
+        .only('id', 'task_title', 'task_status', 'task_belongsto_model_id__model_name', 'task_assigned_to_user_id__username')
+        .order_by('task_belongsto_model_id__model_name', 'id')
+    )
+    covered_model_ids = {related.task_belongsto_model_id_id for related in related_tasks}
+
     context = {
         'task': task,
-        'commit_form': commit_records,
-        'comment_form': comment_records,
+        'related_tasks': related_tasks,
+        'rollout': rollout_progress(task) if related_tasks else None,
+        'covered_model_ids': covered_model_ids,
+        'activities': describe_activities(activity_records),
+        'activity_next_cursor': activity_next_cursor,
+        'comments': comments,
+        'comments_next_cursor': comments_next_cursor,
+        'commits': commits,
+        'commits_next_cursor': commits_next_cursor,
         'projects': projects,
         'models': models,
         'users': users,
@@ -483,6 +617,344 @@ def create_related_task(request, task_id):
 
     return render(request, 'tasks/task_create.html', context)
 
+@login_required
+@require_http_methods(['POST'])
+def task_fan_out(request, task_id):
+    # 横展：将任务复制到同项目的选定机型（或全部机型），已有关联任务的机型自动跳过
+    task = get_object_or_404(Task, id=task_id)
+    if request.POST.get('all_models'):
+        model_ids = None
+    else:
+        model_ids = [int(value) for value in request.POST.getlist('model_ids') if value.isdigit()]
+        if not model_ids:
+            messages.error(request, '请选择要横展的机型。')
+            return redirect('tasks:task_detail', task_id=task.id)
+    created = fan_out_task(task, model_ids, creator=request.user)
+    if created:
+        messages.success(request, f'已横展到 {len(created)} 个机型')
+    else:
+        messages.info(request, '所选机型均已有关联任务，未创建新任务。')
+    return redirect('tasks:task_detail', task_id=task.id)
+
+@login_required
+def task_similar(request):
+    # 相似任务建议（创建表单查重用）：按标题和描述在相似度索引中查询 top-k
+    title = request.GET.get('title', '')
+    # 索引中保存的是描述摘要，查询时同样只取描述开头部分
+    description = ' '.join(request.GET.get('description', '').split())[:EXCERPT_LENGTH]
+    try:
+        k = min(max(int(request.GET.get('k', DEFAULT_TOP_K)), 1), 20)
+        exclude = [int(value) for value in request.GET.getlist('exclude') if value]
+    except ValueError:
+        return JsonResponse({'error': '请求参数有误'}, status=400)
+    return JsonResponse({'results': similar_tasks(title, description, k=k, exclude=exclude)})
+
+def _activity_page_response(queryset, request):
+    records, next_cursor = cursor_paginate(queryset, parse_cursor(request.GET.get('cursor')), ACTIVITY_PAGE_SIZE)
+    return JsonResponse({
+        'results': describe_activities(records),
+        'next_cursor': next_cursor,
+    })
+
+def _task_comments(task):
+    return TaskCommentRecord.objects.filter(comment_belongsto_task_id=task).select_related('comment_creator').only(
+        'id', 'comment_content_html', 'comment_created_time', 'comment_creator__username'
+    )
+
+def _task_commits(task):
+    return TaskCommitRecord.objects.filter(commit_belongsto_task_id=task)
+
+@login_required
+def task_comments(request, task_id):
+    # 评论“加载更多”（游标分页）
+    task = get_object_or_404(Task.objects.only('id'), id=task_id)
+    comments, next_cursor = cursor_paginate(_task_comments(task), parse_cursor(request.GET.get('cursor')), RECORD_PAGE_SIZE)
+    return JsonResponse({
+        'results': [{
+            'id': comment.id,
+            'creator': comment.comment_creator.username if comment.comment_creator else '',
+            'created_time': comment.comment_created_time,
+            'content_html': comment.comment_content_html,
+        } for comment in comments],
+        'next_cursor': next_cursor,
+    })
+
+@login_required
+def task_commits(request, task_id):
+    # 提交记录“加载更多”（游标分页）
+    task = get_object_or_404(Task.objects.only('id'), id=task_id)
+    commits, next_cursor = cursor_paginate(_task_commits(task), parse_cursor(request.GET.get('cursor')), RECORD_PAGE_SIZE)
+    return JsonResponse({
+        'results': [{
+            'id': commit.id,
+            'git_hash': commit.commit_git_hash,
+            'message': commit.commit_message,
+            'url': commit.commit_url,
+            'submit_time': commit.commit_submit_time,
+            'is_merged': commit.commit_is_merged,
+            'merge_request_url': commit.commit_merge_request_url,
+        } for commit in commits],
+        'next_cursor': next_cursor,
+    })
+
+@login_required
+def task_activity(request, task_id):
+    # 任务动态时间线（游标分页）
+    task = get_object_or_404(Task.objects.only('id'), id=task_id)
+    return _activity_page_response(TaskActivityRecord.objects.filter(activity_belongsto_task_id=task), request)
+
+@login_required
+def activity_feed(request):
+    # 当前用户负责任务的动态（游标分页）
+    return _activity_page_response(TaskActivityRecord.objects.filter(activity_task_assignee=request.user), request)
+
+def _chart_response(request, snapshots):
+    # 解析日期区间，默认最近30天
+    try:
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else timezone.localdate()
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else end - timedelta(days=CHART_DEFAULT_DAYS - 1)
+    except ValueError:
+        return JsonResponse({'error': '无效的日期'}, status=400)
+
+    task_type = request.GET.get('task_type')
+    priority = request.GET.get('priority')
+    if task_type:
+        snapshots = snapshots.filter(snapshot_task_type=task_type)
+    if priority:
+        snapshots = snapshots.filter(snapshot_task_priority=priority)
+
+    return JsonResponse(flow_series(snapshots, start, end))
+
+@login_required
+def project_flow_chart(request, project_id):
+    # 项目燃尽图/累积流图数据
+    project = get_object_or_404(Project.objects.only('id'), id=project_id)
+    return _chart_response(request, project.status_snapshots.all())
+
+@login_required
+def model_flow_chart(request, model_id):
+    # 机型燃尽图/累积流图数据
+    model = get_object_or_404(ProjectModel.objects.only('id'), id=model_id)
+    return _chart_response(request, model.status_snapshots.all())
+
+@login_required
+def workload_report(request):
+    # 团队负载热力图：负责人 × 状态 × 优先级，可按项目或机型拆分
+    split = request.GET.get('split')
+    workload = workload_matrix(split)
+
+    if request.GET.get('format') == 'csv':
+        response = HttpResponse(content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="workload.csv"'
+        response.write('\ufeff')  # Excel 识别 UTF-8
+        writer = csv.writer(response)
+        writer.writerow(['分组', '负责人', '任务状态', '任务优先级', '任务数'])
+        writer.writerows(iter_workload_csv_rows(workload))
+        return response
+
+    try:
+        group_id = int(request.GET['group'])
+    except (KeyError, ValueError):
+        group_id = None
+    matrix = select_group(workload, group_id)
+
+    # 每行展开为 状态 × 优先级 个单元格，颜色深浅按全表最大值归一化
+    flat = matrix.reshape(matrix.shape[0], -1)
+    peak = int(flat.max()) if flat.size else 0
+    intensity = flat / peak if peak else flat.astype(float)
+    rows = []
+    for index, (user_id, username) in enumerate(workload['users']):
+        cells = [(int(count), round(float(alpha), 2)) for count, alpha in zip(flat[index], intensity[index])]
+        rows.append({'username': username, 'cells': cells, 'total': int(flat[index].sum())})
+    rows.sort(key=lambda row: row['total'], reverse=True)
+
+    status_labels = dict(Task.TASK_STATUS_CHOICES)
+    priority_labels = dict(PRIORITY_CHOICES)
+
+    context = {
+        'rows': rows,
+        'status_headers': [status_labels[status] for status in workload['statuses']],
+        'priority_headers': [priority_labels[priority] for priority in workload['priorities']] * len(workload['statuses']),
+        'priority_count': len(workload['priorities']),
+        'groups': workload['groups'],
+        'split': workload['split'],
+        'group_id': group_id,
+        'splits': [(key, {'project': '按项目', 'model': '按机型'}[key]) for key in WORKLOAD_SPLITS],
+    }
+
+    return render(request, 'tasks/workload.html', context)
+
+def _cycle_time_filters(query):
+    # 解析筛选参数，类型需在选项中，其余为 id
+    filters = {}
+    for name in CYCLE_TIME_FILTERS:
+        value = query.get(name)
+        if not value:
+            continue
+        if name == 'type':
+            if value not in dict(Task.TASK_TYPE_CHOICES):
+                raise ValueError(name)
+            filters[name] = value
+        else:
+            filters[name] = int(value)
+    return filters
+
+def _cycle_time_url(params, **overrides):
+    query = urlencode({name: value for name, value in {**params, **overrides}.items() if value})
+    url = reverse('tasks:cycle_time')
+    return f'{url}?{query}' if query else url
+
+@login_required
+def cycle_time_report(request):
+    # 交付周期统计：已完成任务前置时间/周期时间的 P50/P85/P95，可分组和筛选；format=json 返回 JSON
+    as_json = request.GET.get('format') == 'json'
+    group = request.GET.get('group') or None
+    try:
+        filters = _cycle_time_filters(request.GET)
+    except ValueError:
+        if as_json:
+            return JsonResponse({'error': '无效的筛选条件'}, status=400)
+        messages.error(request, '无效的筛选条件，已显示全部任务。')
+        filters = {}
+    stats = cycle_time_stats(group, **filters)
+
+    if as_json:
+        return JsonResponse(stats)
+
+    params = {'group': stats['group'], **filters}
+    group_labels = {'project': '按项目', 'model': '按机型', 'type': '按类型', 'assignee': '按负责人'}
+    projects = Project.objects.only('id', 'project_name').order_by('project_name')
+    context = {
+        'stats': stats,
+        'group_links': [('不分组', _cycle_time_url(params, group=None), not stats['group'])] + [
+            (group_labels[key], _cycle_time_url(params, group=key), stats['group'] == key) for key in CYCLE_TIME_GROUPS
+        ],
+        'project_links': [('全部项目', _cycle_time_url(params, project=None, model=None), 'project' not in filters)] + [
+            (project.project_name, _cycle_time_url(params, project=project.id, model=None), filters.get('project') == project.id)
+            for project in projects
+        ],
+        'type_links': [('全部类型', _cycle_time_url(params, type=None), 'type' not in filters)] + [
+            (label, _cycle_time_url(params, type=value), filters.get('type') == value) for value, label in Task.TASK_TYPE_CHOICES
+        ],
+        'json_url': _cycle_time_url(params, format='json'),
+    }
+    return render(request, 'tasks/cycle_time.html', context)
+
+def _board_columns(url_name, owner_id):
+    return [
+        {'status': status, 'label': label, 'url': reverse(url_name, args=[owner_id, status])}
+        for status, label in Task.TASK_STATUS_CHOICES
+    ]
+
+@login_required
+def user_board(request, user_id=None):
+    # 个人看板：按状态分列展示负责的任务，列内容由前端按需加载
+    board_user = request.user if user_id is None else get_object_or_404(User, id=user_id)
+    context = {
+        'board_title': f'{board_user.username} 的看板',
+        'columns': _board_columns('tasks:user_board_column', board_user.id),
+    }
+    return render(request, 'tasks/board.html', context)
+
+@login_required
+def project_board(request, project_id):
+    project = get_object_or_404(Project.objects.only('id', 'project_name'), id=project_id)
+    context = {
+        'board_title': f'{project.project_name} 看板',
+        'project': project,
+        'columns': _board_columns('tasks:project_board_column', project.id),
+    }
+    return render(request, 'tasks/board.html', context)
+
+def _board_column_response(request, queryset, status):
+    if status not in dict(Task.TASK_STATUS_CHOICES):
+        raise Http404('无效的任务状态')
+    queryset = queryset.filter(task_status=status).select_related(
+        'task_assigned_to_user_id', 'task_belongsto_model_id'
+    ).only(
+        'id', 'task_title', 'task_priority', 'task_type', 'task_status', 'task_deadline',
+        'task_board_position', 'task_version',
+        'task_assigned_to_user_id__username', 'task_belongsto_model_id__model_name',
+    )
+    tasks, next_cursor = position_paginate(
+        queryset, 'task_board_position', parse_position_cursor(request.GET.get('cursor')), BOARD_COLUMN_PAGE_SIZE
+    )
+    return JsonResponse({
+        'results': [{
+            'id': task.id,
+            'title': task.task_title,
+            'priority': task.task_priority,
+            'priority_display': task.get_task_priority_display(),
+            'type_display': task.get_task_type_display(),
+            'assignee': task.task_assigned_to_user_id.username if task.task_assigned_to_user_id else '',
+            'model': task.task_belongsto_model_id.model_name,
+            'deadline': task.task_deadline,
+            'is_overdue': task.is_overdue(),
+            'position': task.task_board_position,
+            'version': task.task_version,
+            'url': task.get_absolute_url(),
+        } for task in tasks],
+        'next_cursor': next_cursor,
+    })
+
+@login_required
+def user_board_column(request, user_id, status):
+    return _board_column_response(request, Task.objects.filter(task_assigned_to_user_id=user_id), status)
+
+@login_required
+def project_board_column(request, project_id, status):
+    return _board_column_response(request, Task.objects.filter(task_belongsto_project_id=project_id), status)
+
+@login_required
+@require_http_methods(['PATCH'])
+def task_move(request, task_id):
+    """
+    看板拖动：只修改状态和列内位置
+    以客户端持有的版本号做一次条件 UPDATE，版本不一致（已被他人修改）时返回 409
+    """
+    try:
+        payload = json.loads(request.body or b'{}')
+        new_status = payload['status']
+        position = float(payload['position'])
+        version = int(payload['version'])
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': '请求参数有误'}, status=400)
+    if new_status not in dict(Task.TASK_STATUS_CHOICES) or not math.isfinite(position):
+        return JsonResponse({'error': '请求参数有误'}, status=400)
+
+    task = get_object_or_404(Task.objects.only(
+        'id', 'task_title', 'task_status', 'task_type', 'task_priority', 'task_start_time', 'task_end_time', 'task_creator',
+        'task_assigned_to_user_id', 'task_belongsto_project_id', 'task_belongsto_model_id',
+    ), id=task_id)
+    if not (request.user.id in (task.task_creator_id, task.task_assigned_to_user_id_id) or request.user.is_superuser):
+        return JsonResponse({'error': '您没有权限修改该任务。'}, status=403)
+
+    now = timezone.now()
+    changes = {'task_status': new_status, 'task_board_position': position, 'task_updated_time': now}
+    if new_status != task.task_status:
+        changes.update(task.status_time_changes(new_status, now))
+    old_status = task.task_status
+    # 条件 UPDATE 与手动记录的 Webhook 事件在同一个事务中提交
+    with transaction.atomic():
+        updated = Task.objects.filter(id=task.id, task_version=version).update(task_version=F('task_version') + 1, **changes)
+        # 条件 UPDATE 绕过了 save() 和信号，手动记录动态
+        if updated and new_status != old_status:
+            task.task_status = new_status
+            record_task_field_change(task, 'task_status', old_status, new_status)
+    if not updated:
+        current = Task.objects.filter(id=task.id).values('task_status', 'task_board_position', 'task_version').first()
+        if current is None:
+            raise Http404('任务不存在')
+        return JsonResponse({
+            'error': '任务已被其他人修改，请刷新后重试。',
+            'status': current['task_status'],
+            'position': current['task_board_position'],
+            'version': current['task_version'],
+        }, status=409)
+
+    bump_task_cache_version()
+    return JsonResponse({'id': task.id, 'status': new_status, 'position': position, 'version': version + 1})
+
 @login_required
 def calendar_view(request):
 
@@ -526,22 +998,51 @@ def calendar_view(request):
 
     return render(request, 'tasks/calendar.html', context)
 
+def _tricks_state(request):
+    return [(TrickRecord, 'trick_updated_time', None)]
+
 @login_required
+@conditional_page(_tricks_state)
 def tricks_view(request):
-    tricks = TrickRecord.objects.all().order_by('-trick_created_time')
+    if request.method == 'POST':
+        form = TrickForm(request.POST)
+        if form.is_valid():
+            trick = form.save(commit=False)
+            trick.trick_creator = request.user
+            trick.save()
+            messages.success(request, '技巧添加成功')
+            return redirect('tasks:tricks')
+    else:
+        form = TrickForm()
+
+    # 列表只读取标题和预先生成的摘要
+    tricks = TrickRecord.objects.select_related('trick_creator').only(
+        'id', 'trick_title', 'trick_content_excerpt', 'trick_created_time', 'trick_creator__username'
+    ).order_by('-trick_created_time')
 
     context = {
         'tricks': tricks,
+        'form': form,
     }
 
     return render(request, 'tasks/tricks.html', context)
 
+@login_required
+def trick_detail(request, trick_id):
+    trick = get_object_or_404(TrickRecord.objects.select_related('trick_creator').defer('trick_content'), id=trick_id)
+
+    context = {
+        'trick': trick,
+    }
+
+    return render(request, 'tasks/trick_detail.html', context)
+
 
 @login_required
 def project_models(request, project_id):
     
     try:
-        models = ProjectModel.objects.filter(model_belongsto_project_id=project_id).order_by('-model_priority', '-model_created_time')
+        models = ProjectModel.objects.filter(model_belongsto_project_id=project_id).order_by('-model_priority_rank', '-model_created_time')
         data = [{'id': model.id, 'name': model.model_name} for model in models]
         return JsonResponse(data, safe=False)
     except Exception as e:
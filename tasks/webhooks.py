@@ -0,0 +1,341 @@
+import hashlib
+import hmac
+import http.client
+import json
+import random
+import time
+from contextvars import ContextVar
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from .models import ProjectWebhook, WebhookOutboxEvent
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_TIMEOUT = 10
+DEFAULT_RETRY_BASE = 10
+DEFAULT_RETRY_MAX = 3600
+# 投递租约（秒），需大于单个请求的最长耗时（超时后换连接重试一次）
+DEFAULT_LEASE = 60
+
+# 各项目启用的 Webhook 很少变化，缓存起来，没有配置 Webhook 的项目写入路径上不产生额外查询
+_WEBHOOKS_CACHE_KEY = 'tasks:project-webhooks'
+_WEBHOOKS_CACHE_TIMEOUT = 300
+
+USER_AGENT = 'task-manager-webhooks/1'
+
+# 正在删除的项目：级联删除任务时不再为其写入事件，项目的 Webhook 和发件箱随后一并删除，
+# 否则任务的 post_delete 会写入指向已删除 Webhook 的发件箱记录
+_deleting_projects = ContextVar('webhook_deleting_projects', default=frozenset())
+
+
+def begin_project_delete(project_id):
+    _deleting_projects.set(_deleting_projects.get() | {project_id})
+
+
+def end_project_delete(project_id):
+    _deleting_projects.set(_deleting_projects.get() - {project_id})
+
+
+def invalidate_webhooks():
+    cache.delete(_WEBHOOKS_CACHE_KEY)
+
+
+def _project_webhooks():
+    """{项目 id: [(Webhook id, 订阅的事件集合，空集合表示全部)]}"""
+    hooks = cache.get(_WEBHOOKS_CACHE_KEY)
+    if hooks is None:
+        hooks = {}
+        rows = ProjectWebhook.objects.filter(webhook_is_active=True).values_list('id', 'webhook_belongsto_project_id', 'webhook_events')
+        for webhook_id, project_id, events in rows:
+            hooks.setdefault(project_id, []).append(
+                (webhook_id, frozenset(event.strip() for event in events.split(',') if event.strip()))
+            )
+        cache.set(_WEBHOOKS_CACHE_KEY, hooks, _WEBHOOKS_CACHE_TIMEOUT)
+    return hooks
+
+
+def wants(project_id, event):
+    if project_id in _deleting_projects.get():
+        return False
+    return any(not events or event in events for _, events in _project_webhooks().get(project_id, ()))
+
+
+def enqueue(items):
+    """
+    写入发件箱：items 为 [(项目 id, 事件类型, 事件内容)]，按订阅展开后一次 bulk_create
+    在调用方的事务中执行，业务变更回滚时事件一并回滚
+    """
+    hooks = _project_webhooks()
+    deleting = _deleting_projects.get()
+    now = timezone.now()
+    rows = [
+        WebhookOutboxEvent(outbox_webhook_id=webhook_id, outbox_event=event, outbox_payload=payload, outbox_created_time=now)
+        for project_id, event, payload in items
+        if project_id not in deleting
+        for webhook_id, events in hooks.get(project_id, ())
+        if not events or event in events
+    ]
+    if rows:
+        WebhookOutboxEvent.objects.bulk_create(rows, batch_size=500)
+
+
+def task_payload(task):
+    return {
+        'id': task.pk,
+        'title': task.task_title,
+        'status': task.task_status,
+        'type': task.task_type,
+        'priority': task.task_priority,
+        'project_id': task.task_belongsto_project_id_id,
+        'model_id': task.task_belongsto_model_id_id,
+        'assignee_id': task.task_assigned_to_user_id_id,
+        'url': f"{settings.TASK_NOTIFICATION_BASE_URL.rstrip('/')}{task.get_absolute_url()}",
+    }
+
+
+def task_events(event, tasks, changes=None):
+    """任务事件；changes 为 [(字段名, 原值, 新值)]，只用于 task.updated"""
+    items = []
+    for task in tasks:
+        project_id = task.task_belongsto_project_id_id
+        if not wants(project_id, event):
+            continue
+        payload = {'task': task_payload(task)}
+        if changes is not None:
+            payload['changes'] = [{'field': name, 'old': old, 'new': new} for name, old, new in changes]
+        items.append((project_id, event, payload))
+    enqueue(items)
+
+
+def comment_event(comment):
+    task = comment.comment_belongsto_task_id
+    if not wants(task.task_belongsto_project_id_id, 'comment.created'):
+        return
+    enqueue([(task.task_belongsto_project_id_id, 'comment.created', {
+        'task': task_payload(task),
+        'comment': {
+            'id': comment.pk,
+            'creator_id': comment.comment_creator_id,
+            'excerpt': comment.comment_content_excerpt,
+        },
+    })])
+
+
+def commit_event(commit):
+    task = commit.commit_belongsto_task_id
+    if not wants(task.task_belongsto_project_id_id, 'commit.created'):
+        return
+    enqueue([(task.task_belongsto_project_id_id, 'commit.created', {
+        'task': task_payload(task),
+        'commit': {
+            'id': commit.pk,
+            'hash': commit.commit_git_hash,
+            'url': commit.commit_url,
+            'message': commit.commit_message[:500],
+            'is_merged': commit.commit_is_merged,
+        },
+    })])
+
+
+def sign(secret, timestamp, body):
+    """签名内容为 "时间戳.请求体"，接收方可同时校验时间戳防止重放"""
+    return hmac.new(secret.encode('utf-8'), f'{timestamp}.'.encode('ascii') + body, hashlib.sha256).hexdigest()
+
+
+class ConnectionPool:
+    """按 (协议, 主机) 复用 keep-alive 连接；复用的连接被对端关闭时换新连接重试一次"""
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout or getattr(settings, 'TASK_WEBHOOK_TIMEOUT', DEFAULT_TIMEOUT)
+        self._connections = {}
+
+    def _connect(self, scheme, netloc):
+        connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return connection_class(netloc, timeout=self.timeout)
+
+    def post(self, url, body, headers):
+        """发送 POST，返回 (状态码, 响应体)；网络错误抛出 OSError 或 HTTPException"""
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise http.client.InvalidURL(f'不支持的地址: {url}')
+        key = (parts.scheme, parts.netloc)
+        path = parts.path or '/'
+        if parts.query:
+            path = f'{path}?{parts.query}'
+        reused = key in self._connections
+        connection = self._connections.get(key) or self._connect(*key)
+        try:
+            connection.request('POST', path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self._connections.pop(key, None)
+            if not reused:
+                raise
+            return self.post(url, body, headers)
+        if response.will_close:
+            connection.close()
+            self._connections.pop(key, None)
+        else:
+            self._connections[key] = connection
+        return response.status, data
+
+    def close(self):
+        for connection in self._connections.values():
+            connection.close()
+        self._connections.clear()
+
+
+def retry_delay(failures):
+    """指数退避：基础间隔 × 2^(失败次数-1)，不超过上限，并加入最多 10% 的随机抖动避免同时重试"""
+    base = getattr(settings, 'TASK_WEBHOOK_RETRY_BASE', DEFAULT_RETRY_BASE)
+    limit = getattr(settings, 'TASK_WEBHOOK_RETRY_MAX', DEFAULT_RETRY_MAX)
+    delay = min(base * 2 ** max(failures - 1, 0), limit)
+    return timedelta(seconds=delay * (1 + random.random() * 0.1))
+
+
+def _request_body(webhook, events):
+    return json.dumps({
+        'webhook_id': webhook.id,
+        'project_id': webhook.webhook_belongsto_project_id_id,
+        'events': [
+            {'id': event.id, 'event': event.outbox_event, 'created_time': event.outbox_created_time, 'data': event.outbox_payload}
+            for event in events
+        ],
+    }, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8')
+
+
+def _claim(webhook_id, lease):
+    """
+    认领一个 Webhook：租约为空或已过期时用条件 UPDATE 写入新的到期时间，立即提交
+    返回认领到的 Webhook（webhook_locked_until 为本次租约），已被其他 worker 持有时返回 None
+    """
+    now = timezone.now()
+    locked_until = now + lease
+    claimed = (
+        ProjectWebhook.objects.filter(pk=webhook_id, webhook_is_active=True)
+        .filter(Q(webhook_locked_until__isnull=True) | Q(webhook_locked_until__lte=now))
+        .update(webhook_locked_until=locked_until)
+    )
+    if not claimed:
+        return None
+    return ProjectWebhook.objects.filter(pk=webhook_id, webhook_locked_until=locked_until).first()
+
+
+def _renew(webhook, lease):
+    """续租；租约已过期并被其他 worker 认领时返回 False"""
+    locked_until = timezone.now() + lease
+    renewed = ProjectWebhook.objects.filter(pk=webhook.pk, webhook_locked_until=webhook.webhook_locked_until).update(
+        webhook_locked_until=locked_until,
+    )
+    if renewed:
+        webhook.webhook_locked_until = locked_until
+    return bool(renewed)
+
+
+def _deliver_webhook(webhook, pool, now, batch_size, max_batches, lease):
+    """
+    按 id 顺序逐批投递一个 Webhook 的事件；某批失败时停止，保证接收方看到的事件不乱序
+    调用方已持有租约：HTTP 请求不在事务中进行，每批投递结果单独提交，结束时释放租约
+    """
+    delivered = requests = 0
+    pending = webhook.outbox_events.filter(outbox_delivered_time__isnull=True).order_by('id')
+    error = ''
+    for _ in range(max_batches):
+        # 每批请求前续租，租约已被他人接管时停止，避免重复投递
+        if not _renew(webhook, lease):
+            break
+        events = list(pending[:batch_size])
+        if not events:
+            break
+        body = _request_body(webhook, events)
+        timestamp = str(int(time.time()))
+        headers = {
+            'Content-Type': 'application/json; charset=utf-8',
+            'User-Agent': USER_AGENT,
+            'X-Webhook-Id': str(webhook.id),
+            'X-Webhook-Timestamp': timestamp,
+            'X-Webhook-Signature': f'sha256={sign(webhook.webhook_secret, timestamp, body)}',
+        }
+        requests += 1
+        event_ids = [event.id for event in events]
+        try:
+            status, _ = pool.post(webhook.webhook_url, body, headers)
+            if not 200 <= status < 300:
+                error = f'HTTP {status}'
+        except (OSError, http.client.HTTPException) as exc:
+            error = f'{type(exc).__name__}: {exc}'
+        if error:
+            WebhookOutboxEvent.objects.filter(id__in=event_ids).update(outbox_attempts=F('outbox_attempts') + 1)
+            break
+        WebhookOutboxEvent.objects.filter(id__in=event_ids).update(
+            outbox_attempts=F('outbox_attempts') + 1, outbox_delivered_time=now,
+        )
+        delivered += len(events)
+
+    # 记录投递状态并释放租约；租约已被他人接管时不覆盖对方的状态
+    owned = ProjectWebhook.objects.filter(pk=webhook.pk, webhook_locked_until=webhook.webhook_locked_until)
+    if error:
+        failures = webhook.webhook_failure_count + 1
+        owned.update(
+            webhook_failure_count=failures,
+            webhook_next_attempt_time=now + retry_delay(failures),
+            webhook_last_error=error[:255],
+            webhook_locked_until=None,
+        )
+    elif delivered:
+        owned.update(
+            webhook_failure_count=0, webhook_next_attempt_time=None, webhook_last_error='', webhook_last_delivery_time=now,
+            webhook_locked_until=None,
+        )
+    else:
+        owned.update(webhook_locked_until=None)
+    return delivered, requests, bool(error)
+
+
+def deliver_webhooks(now=None, batch_size=None, max_batches=20, pool=None):
+    """
+    投递发件箱中的事件，返回 (投递事件数, 请求数, 失败的 Webhook 数)
+    - 每个 Webhook 每次请求最多携带 batch_size 个事件，按 id 顺序投递
+    - 失败后按指数退避推迟该 Webhook 的下次投递，期间新事件继续在发件箱中排队
+    - 处理每个 Webhook 前用条件 UPDATE 认领一个短租约（跳过其他 worker 持有的），
+      不依赖长事务和行锁，多个 worker 并行时不会重复投递；HTTP 请求不在任何事务中进行
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or getattr(settings, 'TASK_WEBHOOK_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    lease = timedelta(seconds=getattr(settings, 'TASK_WEBHOOK_LEASE', DEFAULT_LEASE))
+    own_pool = pool is None
+    pool = pool or ConnectionPool()
+    pending = WebhookOutboxEvent.objects.filter(outbox_webhook=OuterRef('pk'), outbox_delivered_time__isnull=True)
+    webhook_ids = list(
+        ProjectWebhook.objects.filter(webhook_is_active=True)
+        .filter(Q(webhook_next_attempt_time__isnull=True) | Q(webhook_next_attempt_time__lte=now))
+        .filter(Exists(pending))
+        .order_by('id').values_list('id', flat=True)
+    )
+    totals = [0, 0, 0]
+    try:
+        for webhook_id in webhook_ids:
+            webhook = _claim(webhook_id, lease)
+            if webhook is None:
+                continue
+            for index, value in enumerate(_deliver_webhook(webhook, pool, now, batch_size, max_batches, lease)):
+                totals[index] += value
+    finally:
+        if own_pool:
+            pool.close()
+    return tuple(totals)
+
+
+def purge_delivered(days, now=None):
+    """删除投递成功超过 days 天的事件，返回删除数"""
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    deleted, _ = WebhookOutboxEvent.objects.filter(outbox_delivered_time__lt=cutoff).delete()
+    return deleted